@@ -119,6 +119,66 @@ def read_power_data(f: TextIOBase) -> Dict[str, Dict[str, Union[str, float]]]:
     return rows
 
 
+def read_timing_data(f: TextIOBase) -> Dict[str, Union[str, float]]:
+    # the worst path of report_timing:
+    #  Startpoint / Endpoint / Path Group, the startpoint and the endpoint
+    #   with their kind, e.g., "input port" or "rising edge-triggered
+    #   flip-flop" (the parenthesis wraps to the next line for long names)
+    #  data arrival time
+    #  clock <name> (rise edge) at the capture edge, i.e., the clock period
+    #  data required time
+    #  slack (MET) or slack (VIOLATED)
+
+    result: Dict[str, Union[str, float]] = {}
+    clock_edges: List[float] = []
+    # the point whose kind is still to be read
+    point = None
+
+    for line in f:
+        x = line.split()
+        if len(x) == 0:
+            continue
+        if point is not None and x[0].startswith("("):
+            result[f"{point}_kind"] = line.strip()[1:].split(" clocked by")[0].rstrip(")")
+            point = None
+            continue
+        point = None
+        if x[0] in ["Startpoint:", "Endpoint:"]:
+            point = x[0][:-1].lower()
+            result[point] = x[1]
+            if len(x) > 2:
+                result[f"{point}_kind"] = " ".join(x[2:])[1:].split(" clocked by")[0].rstrip(")")
+                point = None
+        elif x[0] == "Path" and x[1] == "Group:":
+            result["path_group"] = x[2]
+        elif x[0] == "clock" and "edge)" in x:
+            clock_edges.append(float(x[-1]))
+        elif line.strip().startswith("data arrival time") and "data_arrival_time" not in result:
+            result["data_arrival_time"] = abs(float(x[-1]))
+        elif line.strip().startswith("data required time") and "data_required_time" not in result:
+            result["data_required_time"] = float(x[-1])
+        elif x[0] == "slack":
+            result["slack"] = float(x[-1])
+            break
+
+    # the launch edge is at 0, the capture edge one period later
+    if len(clock_edges) >= 2:
+        result["clock_period"] = clock_edges[1] - clock_edges[0]
+    return result
+
+
+def read_synthesis_duration(f: TextIOBase) -> Union[float, None]:
+    # syn.tcl prints "==> Duration: <min> min <sec> sec" after compile_ultra
+    # to the dc_shell.log; returns the seconds, None for an unfinished run
+
+    duration = None
+    for line in f:
+        x = line.split()
+        if len(x) == 6 and x[:2] == ["==>", "Duration:"] and x[3] == "min" and x[5] == "sec":
+            duration = (duration or 0) + 60 * float(x[2]) + float(x[4])
+    return duration
+
+
 def main():
     should_save_fig = True
 
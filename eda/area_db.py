@@ -1,61 +1,432 @@
+from concurrent.futures import Future
 import os
-from typing import Callable, Dict, List, Optional, Union
+import threading
+from typing import BinaryIO, Callable, Dict, List, Optional, Set, TextIO, Union
 from analyze_reports import read_area_data
+from area_hierarchy import AreaHierarchy
 from modules import Module
+from report_archive import ingest
+from synthesis_index import SynthesisIndex
 import pickle
 
 
 class AreaDatabase:
-    def __init__(self, dirpath: Optional[str] = None, force_rebuild: bool = False) -> None:
+    """
+    Maps modules to their areas, first from the synthesis results and then
+    from the registered on-miss handlers (estimators).
+
+    With `thread_safe=True`, the database can be shared between threads. Hits
+    are read without locking, concurrent misses for the same module run the
+    handlers only once (the other threads wait for that result), and writes
+    are serialized so that `add()` and `pickle_save()` are safe while other
+    threads are reading.
+
+    When loaded from a directory, `add()` appends to `cache.journal` next to
+    `cache.pickle` instead of rewriting the snapshot. The journal is fsynced
+    every `journal_batch` records (or on `flush()`) and replayed on load.
+    `compact()` folds it into the snapshot, which also happens on load once
+    the journal has `compact_threshold` records.
+
+    With `lazy=True`, a rebuild only lists the output tree and every report
+    is parsed on the first lookup of its module; `prefetch=True` parses the
+    rest in a background thread. The snapshot is written once every report
+    is parsed.
+
+    Every parsed report (rebuilt, lazily loaded or ingested) also keeps its
+    full area hierarchy in `hierarchy`, saved next to the snapshot as
+    `cache_hierarchy.npz` whenever the snapshot is. A value without a
+    report (`add()`, the journal) drops the hierarchy of its module, which
+    no longer matches it.
+
+    The database records which modules every estimate looked up. `add()`
+    drops the estimates depending on the added module (transitively) and
+    tells the `add_on_update()` listeners which modules changed.
+
+    Subclasses store other metrics of the synthesis reports by overriding
+    `CACHE_NAME`, `REPORT` and `read_report()`.
+    """
+
+    CACHE_NAME = "cache"
+    REPORT = "area.log"
+
+    def __init__(
+            self,
+            dirpath: Optional[str] = None,
+            force_rebuild: bool = False,
+            thread_safe: bool = False,
+            journal_batch: int = 64,
+            compact_threshold: int = 1024,
+            lazy: bool = False,
+            prefetch: bool = False) -> None:
         self._data: Dict[Module, float] = {}
+        # modules whose area comes from the on-miss handlers
+        self._estimated: Set[Module] = set()
         self._on_miss: List[Callable[[Module], Union[float, None]]] = []
+        self._on_update: List[Callable[[Set[Module]], None]] = []
+        # estimated modules by the modules their handlers looked up
+        self._dependents: Dict[Module, Set[Module]] = {}
+        # the modules whose handlers run on this thread, innermost last
+        self._resolving = threading.local()
+        self._thread_safe = thread_safe
+        self._lock = threading.RLock()
+        self._inflight: Dict[Module, Future] = {}
+        self._cache_path: Optional[str] = None
+        self._journal_path: Optional[str] = None
+        self._journal: Optional[BinaryIO] = None
+        self._journal_batch = journal_batch
+        self._journal_pending = 0
+        self.hierarchy = AreaHierarchy()
+        self._index: Optional[SynthesisIndex] = None
+        # synthesized modules whose report is not parsed yet (lazy mode)
+        self._pending: Set[Module] = set()
+        self._prefetch_thread: Optional[threading.Thread] = None
+        self._stop_prefetch = threading.Event()
 
         if dirpath is not None:
-            if not force_rebuild and os.path.exists(f"{dirpath}/cache.pickle"):
-                print(f"Loading database from {dirpath}/cache.pickle")
-                self.pickle_load(f"{dirpath}/cache.pickle")
+            self._cache_path = f"{dirpath}/{self.CACHE_NAME}.pickle"
+            self._journal_path = f"{dirpath}/{self.CACHE_NAME}.journal"
+            if not force_rebuild and os.path.exists(self._cache_path):
+                print(f"Loading database from {self._cache_path}")
+                self.pickle_load(self._cache_path)
+                if os.path.exists(self._hierarchy_path()):
+                    self.hierarchy = AreaHierarchy.load(self._hierarchy_path())
             else:
                 print(f"Rebuilding database")
-                self.build_from(dirpath)
-                self.pickle_save(f"{dirpath}/cache.pickle")
+                # the reports are the source of truth on a forced rebuild, the
+                # journal of the previous snapshot may hold outdated values
+                if force_rebuild and os.path.exists(self._journal_path):
+                    os.remove(self._journal_path)
+                if lazy:
+                    self._index = SynthesisIndex(dirpath)
+                    self._pending = set(self._index.modules())
+                else:
+                    self.build_from(dirpath)
+                    self._save_rebuilt()
+            if self._replay_journal() >= compact_threshold:
+                self.compact()
+            if prefetch and len(self._pending) > 0:
+                self._prefetch_thread = threading.Thread(target=self._prefetch, daemon=True)
+                self._prefetch_thread.start()
 
     def build_from(self, dirpath: str) -> None:
-        entries = [x for x in os.listdir(
-            dirpath) if os.path.isdir(f"{dirpath}/{x}")]
-        for entry in entries:
-            print(f"Found directory: {entry}")
-            module = Module.from_string(entry)
-            module_name = type(module).__name__
-            print(f"    Instantiated module: {entry}")
-            with open ( f"{dirpath}/{entry}/RPT/{module_name}/area.log") as f:
-                area = read_area_data(f)[module_name]["global/absolute"]
-            self._data[module] = area
+        index = SynthesisIndex(dirpath)
+        for module in index.modules():
+            print(f"Found directory: {index.directory(module)}")
+            self._load_report(index, module)
+
+    def _load_report(self, index: SynthesisIndex, m: Module) -> None:
+        fpath = index.report_path(m, self.REPORT)
+        if not os.path.exists(fpath):
+            print(f"Skipping {index.directory(m)}, no {self.REPORT}")
+            return
+        with open(fpath) as f:
+            value = self.read_report(f, m)
+        self._store(m, value, estimated=False)
+
+    def _save_rebuilt(self) -> None:
+        # no reports yet, do not freeze an empty snapshot
+        if len(self._data) > 0:
+            self.pickle_save(self._cache_path)
+        self._save_hierarchy()
+
+    def _save_hierarchy(self) -> None:
+        if self._cache_path is None:
+            return
+        fpath = self._hierarchy_path()
+        if len(self.hierarchy) > 0 or os.path.exists(fpath):
+            self.hierarchy.save(fpath)
+
+    def _load_pending(self, m: Module) -> None:
+        with self._lock:
+            if m not in self._pending:
+                return
+            self._pending.discard(m)
+            self._load_report(self._index, m)
+            if len(self._pending) == 0:
+                self._save_rebuilt()
+
+    def load_all(self) -> None:
+        """
+        Parses the reports that the lazy mode has not parsed yet.
+        """
+        for m in list(self._pending):
+            self._load_pending(m)
+
+    def _prefetch(self) -> None:
+        for m in list(self._pending):
+            if self._stop_prefetch.is_set():
+                return
+            self._load_pending(m)
+
+    def ingest_report(self, m: Module, f: TextIO) -> None:
+        """
+        Stores the metric of a report read from elsewhere (e.g., an archive),
+        replacing the report of the output tree. Like `add()`, it drops the
+        estimates depending on the module, but it is not journaled.
+        """
+        value = self.read_report(f, m)
+        with self._lock:
+            self._store(m, value, estimated=False)
+            changed = self._invalidate(m)
+        for on_update in self._on_update:
+            on_update(changed)
+
+    def build_from_archive(self, fpath: str) -> int:
+        """
+        Parses the reports of a `.tar`, `.tar.gz` or `.zip` bundle of output
+        trees without extracting it, returns their number.
+        """
+        return ingest([fpath], [self])
+
+    def read_report(self, f: TextIO, m: Module) -> float:
+        """
+        Extracts the stored metric of the design from its report.
+        """
+        rows = read_area_data(f)
+        self.hierarchy.add(m, rows)
+        return rows[m.design_name()]["global/absolute"]
+
+    def _hierarchy_path(self) -> str:
+        return f"{os.path.dirname(self._cache_path)}/{self.CACHE_NAME}_hierarchy.npz"
 
     def pickle_load(self, fpath: str) -> None:
         with open(fpath, "rb") as f:
-            self._data.update(pickle.load(f))
+            data = pickle.load(f)
+        with self._lock:
+            self._data.update(data)
+
+    def pickle_save(self, fpath: str, measured_only: bool = False) -> None:
+        """
+        Writes the database atomically: to a temporary file first, which then
+        replaces `fpath`.
+        """
+        self.load_all()
+        with self._lock:
+            data = self._data.copy()
+            if measured_only:
+                for m in self._estimated:
+                    data.pop(m, None)
+        with open(f"{fpath}.tmp", "wb") as f:
+            pickle.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{fpath}.tmp", fpath)
+
+    def _replay_journal(self) -> int:
+        """
+        Applies the journal records, returns their count. A torn record at the
+        end (e.g., after a crash) is dropped.
+        """
+        if not os.path.exists(self._journal_path):
+            return 0
+        count = 0
+        with open(self._journal_path, "r+b") as f:
+            end = 0
+            while True:
+                try:
+                    m, area = pickle.load(f)
+                except EOFError:
+                    break
+                except (pickle.UnpicklingError, ValueError, TypeError):
+                    print(f"Dropping a damaged record at the end of {self._journal_path}")
+                    break
+                end = f.tell()
+                self._store(m, area, estimated=False)
+                self._drop_hierarchy(m)
+                count = count + 1
+            f.truncate(end)
+        if count > 0:
+            print(f"Replayed {count} records from {self._journal_path}")
+        return count
+
+    def _append_journal(self, m: Module, area: float) -> None:
+        if self._journal is None:
+            self._journal = open(self._journal_path, "ab")
+        self._journal.write(pickle.dumps((m, area)))
+        # hand the record to the OS right away, a crashed process loses nothing
+        self._journal.flush()
+        self._journal_pending = self._journal_pending + 1
+        if self._journal_pending >= self._journal_batch:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Makes the journal records durable.
+        """
+        with self._lock:
+            if self._journal is not None and self._journal_pending > 0:
+                os.fsync(self._journal.fileno())
+                self._journal_pending = 0
 
-    def pickle_save(self, fpath: str) -> None:
-        with open(fpath, "wb") as f:
-            pickle.dump(self._data, f)
+    def save(self) -> None:
+        """
+        Writes the snapshot, with the journal folded in, and the hierarchy.
+        """
+        self.compact()
+
+    def compact(self) -> None:
+        """
+        Folds the journal into `cache.pickle` and empties the journal. The
+        hierarchy is saved with the snapshot.
+        """
+        if self._cache_path is None:
+            return
+        with self._lock:
+            self.pickle_save(self._cache_path, measured_only=True)
+            self._save_hierarchy()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+                self._journal_pending = 0
+            if os.path.exists(self._journal_path):
+                os.remove(self._journal_path)
+
+    def close(self) -> None:
+        if self._prefetch_thread is not None:
+            self._stop_prefetch.set()
+            self._prefetch_thread.join()
+            self._prefetch_thread = None
+        with self._lock:
+            if self._journal is not None:
+                self.flush()
+                self._journal.close()
+                self._journal = None
     
     def add_on_miss(self, on_miss: Callable[[Module], Union[float, None]]) -> None:
         self._on_miss.append(on_miss)
     
+    def on_miss_handlers(self) -> List[Callable[[Module], Union[float, None]]]:
+        return self._on_miss
+
+    def add_on_update(self, on_update: Callable[[Set[Module]], None]) -> None:
+        """
+        Registers a listener called by `add()` and `add_many()` with the
+        added modules and the estimates they invalidated.
+        """
+        self._on_update.append(on_update)
+
+    def dependents(self, m: Module) -> Set[Module]:
+        """
+        Returns the estimated modules whose handlers looked up `m`.
+        """
+        with self._lock:
+            return set(self._dependents.get(m, ()))
+
+    def _invalidate(self, m: Module) -> Set[Module]:
+        changed = {m}
+        stack = [m]
+        while stack:
+            for d in self._dependents.pop(stack.pop(), ()):
+                if d not in changed and d in self._estimated:
+                    self._data.pop(d, None)
+                    self._estimated.discard(d)
+                    changed.add(d)
+                    stack.append(d)
+        return changed
+
+    def _store(self, m: Module, area: float, estimated: bool) -> None:
+        with self._lock:
+            self._data[m] = area
+            if estimated:
+                self._estimated.add(m)
+            else:
+                self._estimated.discard(m)
+                # a journaled value takes precedence over the report
+                self._pending.discard(m)
+
+    def _drop_hierarchy(self, m: Module) -> None:
+        if m in self.hierarchy:
+            self.hierarchy.remove(m)
+
     def add(self, m: Module, area: float) -> None:
-        self._data[m] = area
+        self.add_many({m: area})
 
-    def __call__(self, m: Module) -> float:
-        r = self._data.get(m, None)
-        if r is None:
+    def add_many(self, entries: Dict[Module, float]) -> None:
+        """
+        `add()` of many entries, under one lock and with one call of the
+        `add_on_update()` listeners.
+        """
+        changed: Set[Module] = set()
+        with self._lock:
+            for m, area in entries.items():
+                self._store(m, area, estimated=False)
+                self._drop_hierarchy(m)
+                if self._journal_path is not None:
+                    self._append_journal(m, area)
+                changed |= self._invalidate(m)
+        if len(changed) == 0:
+            return
+        for on_update in self._on_update:
+            on_update(changed)
+
+    def _resolve(self, m: Module) -> float:
+        stack = self._resolving.__dict__.setdefault("stack", [])
+        stack.append(m)
+        try:
             for on_miss in self._on_miss:
                 r = on_miss(m)
                 if r is not None:
-                    self.add(m, r)
+                    self._store(m, r, estimated=True)
                     return r
-            raise KeyError(f"We cannot find an area estimation for {m}")
-        else:
+        finally:
+            stack.pop()
+        raise KeyError(f"We cannot find an estimation for {m} in the {type(self).__name__}")
+
+    def _resolve_single_flight(self, m: Module) -> float:
+        with self._lock:
+            r = self._data.get(m, None)
+            if r is not None:
+                return r
+            future = self._inflight.get(m, None)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[m] = future
+
+        if not owner:
+            # another thread is already running the handlers for this module
+            return future.result()
+
+        try:
+            r = self._resolve(m)
+            future.set_result(r)
             return r
-    
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[m]
+
+    def __call__(self, m: Module) -> float:
+        stack = self._resolving.__dict__.get("stack", None)
+        if stack:
+            with self._lock:
+                self._dependents.setdefault(m, set()).add(stack[-1])
+        # dictionary reads are atomic, hits do not need the lock
+        r = self._data.get(m, None)
+        if r is not None:
+            return r
+        if m in self._pending:
+            self._load_pending(m)
+            r = self._data.get(m, None)
+            if r is not None:
+                return r
+        if self._thread_safe:
+            return self._resolve_single_flight(m)
+        return self._resolve(m)
+
+    def measured(self) -> Dict[Module, float]:
+        """
+        Returns the entries that do not come from the on-miss handlers.
+        """
+        self.load_all()
+        with self._lock:
+            return {m: a for m, a in self._data.items() if m not in self._estimated}
+
     def data(self) -> Dict[Module, float]:
+        self.load_all()
+        if self._thread_safe:
+            with self._lock:
+                return self._data.copy()
         return self._data
@@ -2,6 +2,7 @@ from typing import Callable, Dict, List, Tuple, Union
 
 from numpy.core.shape_base import block
 from area_db import AreaDatabase
+from fixed_point_estimators import FixedPointEstimators, PolynomialEstimator
 from data_types import BlockFloatingPoint, FixedPointWithExponent, FloatingPoint, FloatingPointVec, Data, SInt
 from modules import Add, DotProduct, FloatingPointToBlockFloatingPoint, Module, Multiply
 import numpy as np
@@ -45,6 +46,75 @@ class DotProductAreaHandler:
         return None
 
 
+class AdderTreeAreaHandler:
+    """
+    Estimates the area of the BFP dot products as `block_size` multipliers
+    followed by an adder tree, level by level, with the multiplier and adder
+    costs looked up in the database: the measured modules first, then its
+    estimators (e.g., `FixedPointEstimators`). The fits are clamped at 0,
+    as a quadratic fit extrapolated to narrow widths goes negative.
+
+    Without a `gen_accum` the tree grows one bit per level (the width needed
+    not to overflow); with `gen_accum` every adder has its width, as the
+    `reduceTree(_ + _)` of `BlockFloatALU` does.
+    """
+
+    def __init__(self, area_db: AreaDatabase) -> None:
+        self._area_db = area_db
+
+    def _cost(self, m: Module):
+        return np.maximum(self._area_db(m), 0)
+
+    def _costs(self, module: Callable[[int], Module], widths: np.ndarray) -> np.ndarray:
+        # one lookup per distinct width
+        unique, inverse = np.unique(widths, return_inverse=True)
+        costs = np.array([self._cost(module(int(w))) for w in unique], dtype=np.float64)
+        return costs[inverse].reshape(np.shape(widths))
+
+    def area(
+            self,
+            block_size: np.ndarray,
+            mantissa_width: np.ndarray,
+            exponent_width: np.ndarray,
+            accum_width: np.ndarray = None) -> np.ndarray:
+        """
+        Evaluates the model over (broadcast) arrays of parameters.
+        """
+        block_size, mantissa_width, exponent_width = np.broadcast_arrays(
+            *(np.asarray(x, dtype=np.int64) for x in (block_size, mantissa_width, exponent_width)))
+        area = block_size * self._costs(lambda w: Multiply(SInt(w)), mantissa_width) + \
+            self._costs(lambda w: Add(SInt(w)), exponent_width)
+
+        # a level of n operands has n // 2 adders and leaves (n + 1) // 2
+        n = block_size
+        for level in range(int(np.ceil(np.log2(max(block_size.max(initial=1), 1))))):
+            width = 2 * mantissa_width + level if accum_width is None else accum_width
+            area = area + (n // 2) * self._costs(lambda w: Add(SInt(w)), np.broadcast_to(width, n.shape))
+            n = (n + 1) // 2
+        return area
+
+    def __call__(self, m: Module) -> Union[float, None]:
+        if not (isinstance(m, DotProduct) and isinstance(m.gen_vec, BlockFloatingPoint)):
+            return None
+
+        gen = m.gen_vec
+        if m.gen_accum is None:
+            accum_width = None
+        elif isinstance(m.gen_accum, SInt):
+            accum_width = m.gen_accum.width
+        else:
+            return None
+
+        # scalar lookups: a database may return arrays of samples
+        area = gen.block_size * self._cost(Multiply(SInt(gen.mantissa_width))) + \
+            self._cost(Add(SInt(gen.exponent_width)))
+        n, width = gen.block_size, 2 * gen.mantissa_width
+        while n > 1:
+            area = area + (n // 2) * self._cost(Add(SInt(accum_width or width)))
+            n, width = (n + 1) // 2, width + 1
+        return area
+
+
 class FloatingPointToBlockFloatingPointAreaHandler:
     """"
     Applies linear regression by varying the block size to estimate the
@@ -57,7 +127,7 @@ class FloatingPointToBlockFloatingPointAreaHandler:
     ) -> None:
         self._area_db = area_db
         self._estimators: Dict[Tuple[FloatingPoint,
-                                     FixedPointWithExponent], Callable[[int], float]] = {}
+                                     FixedPointWithExponent], PolynomialEstimator] = {}
 
     def add_estimator(self, gen_fp: FloatingPoint, gen_fxe: FixedPointWithExponent, block_sizes: List[int]) -> None:
         @np.vectorize
@@ -69,8 +139,7 @@ class FloatingPointToBlockFloatingPointAreaHandler:
             return area
         # we do linear estimation
         area = get_area(block_sizes)
-        z = np.polyfit(block_sizes, area, 1)
-        self._estimators[(gen_fp, gen_fxe)] = np.poly1d(z)
+        self._estimators[(gen_fp, gen_fxe)] = PolynomialEstimator(1, block_sizes, area)
 
     def __call__(self, m: Module) -> Union[float, None]:
         if not isinstance(m, FloatingPointToBlockFloatingPoint):
@@ -82,3 +151,42 @@ class FloatingPointToBlockFloatingPointAreaHandler:
             return None
         
         return estimator(m.gen_bfp.block_size)
+
+    def residual_std(self, m: Module) -> Union[float, None]:
+        """
+        Returns the residual standard deviation of the fit estimating the
+        module, or None if it is not estimated by this handler.
+        """
+        if not isinstance(m, FloatingPointToBlockFloatingPoint):
+            return None
+
+        estimator = self._estimators.get((m.gen_fp, m.gen_bfp.as_fixed_point_with_exponent()), None)
+        return None if estimator is None else estimator.residual_std
+
+    @staticmethod
+    def _key(gen_fp: FloatingPoint, gen_fxe: FixedPointWithExponent) -> str:
+        return f"fp2bfp/{gen_fp}/{gen_fxe}"
+
+    @staticmethod
+    def coefficient_key(m: Module) -> Union[Tuple[str, int], None]:
+        """
+        Returns the key of the exported polynomial for the module, and the
+        value to evaluate it at.
+        """
+        if not isinstance(m, FloatingPointToBlockFloatingPoint):
+            return None
+
+        return (
+            FloatingPointToBlockFloatingPointAreaHandler._key(
+                m.gen_fp, m.gen_bfp.as_fixed_point_with_exponent()),
+            m.gen_bfp.block_size
+        )
+
+    def export_coefficients(self) -> Tuple[Callable[[Module], Union[Tuple[str, int], None]], Dict[str, np.ndarray]]:
+        """
+        Returns the key function and the coefficients of the fitted polynomials.
+        """
+        return (FloatingPointToBlockFloatingPointAreaHandler.coefficient_key, {
+            FloatingPointToBlockFloatingPointAreaHandler._key(gen_fp, gen_fxe): estimator.coefficients()
+            for (gen_fp, gen_fxe), estimator in self._estimators.items()
+        })
@@ -0,0 +1,185 @@
+from typing import Dict, Iterable, List, Union
+from modules import Module
+import numpy as np
+
+COLUMNS = [
+    "global/absolute",
+    "local/combinational",
+    "local/noncombinational",
+    "local/blackboxes",
+]
+
+
+class AreaHierarchy:
+    """
+    Keeps the full `area.log` hierarchy of many modules as one array-backed
+    tree: every cell is a row with the index of its parent (-1 for the top
+    cell), its depth, the interned cell and design names and the area
+    columns. The rows of a module are contiguous and start with its top cell.
+    """
+
+    def __init__(self) -> None:
+        self.modules: List[Module] = []
+        self._module_index: Dict[Module, int] = {}
+        self._names: List[str] = []
+        self._name_index: Dict[str, int] = {}
+        self._offsets: List[int] = [0]
+        self._parent: List[int] = []
+        self._depth: List[int] = []
+        self._cell: List[int] = []
+        self._design: List[int] = []
+        self._areas: List[List[float]] = []
+        self._arrays: Union[Dict[str, np.ndarray], None] = None
+
+    def _intern(self, name: str) -> int:
+        i = self._name_index.get(name, None)
+        if i is None:
+            i = len(self._names)
+            self._names.append(name)
+            self._name_index[name] = i
+        return i
+
+    def add(self, m: Module, rows: Dict[str, Dict[str, Union[str, float]]]) -> None:
+        """
+        Adds the rows of `read_area_data()` for the module, which replace
+        any previous ones.
+        """
+        if m in self._module_index:
+            self.remove(m)
+        first = self._offsets[-1]
+        row_index: Dict[str, int] = {}
+        for path, row in rows.items():
+            parent_path, _, cell = path.rpartition("/")
+            parent = row_index.get(parent_path, -1)
+            row_index[path] = first + len(row_index)
+            self._parent.append(parent)
+            self._depth.append(0 if parent < 0 else self._depth[parent] + 1)
+            self._cell.append(self._intern(cell))
+            self._design.append(self._intern(row["design"]))
+            self._areas.append([row[c] for c in COLUMNS])
+        self._module_index[m] = len(self.modules)
+        self.modules.append(m)
+        self._offsets.append(first + len(row_index))
+        self._arrays = None
+
+    def remove(self, m: Module) -> None:
+        i = self._module_index.pop(m)
+        start, stop = self._offsets[i], self._offsets[i + 1]
+        n = stop - start
+        for column in [self._depth, self._cell, self._design, self._areas]:
+            del column[start:stop]
+        self._parent = self._parent[:start] + [p - n if p >= stop else p for p in self._parent[stop:]]
+        self._offsets = self._offsets[:i + 1] + [o - n for o in self._offsets[i + 2:]]
+        del self.modules[i]
+        self._module_index = {m: j for j, m in enumerate(self.modules)}
+        self._arrays = None
+
+    def __len__(self) -> int:
+        return len(self.modules)
+
+    def __contains__(self, m: Module) -> bool:
+        return m in self._module_index
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Returns the columns as arrays.
+        """
+        if self._arrays is None:
+            areas = np.array(self._areas, dtype=np.float64).reshape(-1, len(COLUMNS))
+            self._arrays = {
+                "offsets": np.array(self._offsets, dtype=np.int64),
+                "parent": np.array(self._parent, dtype=np.int32),
+                "depth": np.array(self._depth, dtype=np.int16),
+                "cell": np.array(self._cell, dtype=np.int32),
+                "design": np.array(self._design, dtype=np.int32),
+                "names": np.array(self._names, dtype=str),
+                "modules": np.array([m.to_string() for m in self.modules], dtype=str),
+                **{c: areas[:, i] for i, c in enumerate(COLUMNS)}
+            }
+        return self._arrays
+
+    def save(self, fpath: str) -> None:
+        a = self.arrays()
+        np.savez_compressed(fpath, **{k.replace("/", "."): v for k, v in a.items()})
+
+    @staticmethod
+    def load(fpath: str) -> "AreaHierarchy":
+        h = AreaHierarchy()
+        with np.load(fpath) as f:
+            a = {k.replace(".", "/"): f[k] for k in f.files}
+        h._names = a["names"].tolist()
+        h._name_index = {name: i for i, name in enumerate(h._names)}
+        h.modules = [Module.from_string(name) for name in a["modules"]]
+        h._module_index = {m: i for i, m in enumerate(h.modules)}
+        h._offsets = a["offsets"].tolist()
+        h._parent = a["parent"].tolist()
+        h._depth = a["depth"].tolist()
+        h._cell = a["cell"].tolist()
+        h._design = a["design"].tolist()
+        h._areas = np.stack([a[c] for c in COLUMNS], axis=-1).tolist()
+        return h
+
+    def cells(self, m: Module) -> Dict[str, Dict[str, Union[str, float]]]:
+        """
+        Returns the rows of a module in the format of `read_area_data()`.
+        """
+        i = self._module_index[m]
+        start, stop = self._offsets[i], self._offsets[i + 1]
+        paths: Dict[int, str] = {}
+        rows = {}
+        for r in range(start, stop):
+            name = self._names[self._cell[r]]
+            paths[r] = name if self._parent[r] < 0 else f"{paths[self._parent[r]]}/{name}"
+            rows[paths[r]] = {
+                **{c: self._areas[r][j] for j, c in enumerate(COLUMNS)},
+                "design": self._names[self._design[r]]
+            }
+        return rows
+
+    def _matches(self, design: str = None, cell: str = None, prefix: bool = False) -> np.ndarray:
+        a = self.arrays()
+        names = a["names"]
+        selected = np.char.startswith(names, design if design is not None else cell) if prefix else \
+            names == (design if design is not None else cell)
+        return selected[a["design"] if design is not None else a["cell"]]
+
+    def absolute(
+            self,
+            modules: Iterable[Module],
+            design: str = None,
+            cell: str = None,
+            prefix: bool = False,
+            column: str = "global/absolute") -> np.ndarray:
+        """
+        Returns, for every module, the area of its cells of the given design
+        (or with the given cell name), optionally matching name prefixes.
+        Cells nested in another matching cell are not counted twice. Modules
+        without a hierarchy give NaN.
+        """
+        assert((design is None) != (cell is None))
+        a = self.arrays()
+        match = self._matches(design, cell, prefix)
+
+        # drop the matches below a matching ancestor, one depth level at a time
+        covered = np.zeros_like(match)
+        parent, depth = a["parent"], a["depth"]
+        for d in range(1, int(depth.max(initial=0)) + 1):
+            rows = np.flatnonzero(depth == d)
+            covered[rows] = match[parent[rows]] | covered[parent[rows]]
+        top = match & ~covered
+
+        owner = np.repeat(np.arange(len(self.modules)), np.diff(a["offsets"]))
+        per_module = np.bincount(owner[top], weights=a[column][top], minlength=len(self.modules))
+
+        index = np.array([self._module_index.get(m, -1) for m in modules], dtype=np.int64)
+        return np.where(index >= 0, per_module[index] if len(per_module) > 0 else np.nan, np.nan)
+
+    def share(self, modules: Iterable[Module], **kwargs) -> np.ndarray:
+        """
+        Like `absolute()`, as a fraction of the total area of every module.
+        """
+        modules = list(modules)
+        a = self.arrays()
+        index = np.array([self._module_index.get(m, -1) for m in modules], dtype=np.int64)
+        total = np.where(index >= 0, a["global/absolute"][a["offsets"][:-1][index]] if len(self.modules) > 0 else np.nan, np.nan)
+        return self.absolute(modules, **kwargs) / total
@@ -0,0 +1,209 @@
+from dataclasses import dataclass, fields, is_dataclass
+import sqlite3
+from typing import Dict, List, Optional, Tuple, Type, Union
+from area_db import AreaDatabase
+from data_types import Data
+from modules import Module
+import numpy as np
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    area REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS data (
+    entry_id INTEGER NOT NULL REFERENCES entries(id) ON DELETE CASCADE,
+    field TEXT NOT NULL,
+    data_kind TEXT NOT NULL,
+    PRIMARY KEY (entry_id, field)
+);
+CREATE TABLE IF NOT EXISTS params (
+    entry_id INTEGER NOT NULL REFERENCES entries(id) ON DELETE CASCADE,
+    field TEXT NOT NULL,
+    param TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (entry_id, field, param)
+);
+CREATE INDEX IF NOT EXISTS entries_kind ON entries(kind);
+CREATE INDEX IF NOT EXISTS data_kind ON data(field, data_kind, entry_id);
+CREATE INDEX IF NOT EXISTS params_value ON params(param, value, entry_id);
+CREATE INDEX IF NOT EXISTS params_field_value ON params(field, param, value, entry_id);
+"""
+
+# a constraint is either an exact value or an inclusive (low, high) range
+Constraint = Union[int, Tuple[int, int]]
+
+
+@dataclass(frozen=True)
+class Selection:
+    """
+    The result of `SqliteAreaStore.select()`.
+    """
+    modules: List[Module]
+    area: np.ndarray
+
+    def param(self, name: str, field: Optional[str] = None) -> np.ndarray:
+        """
+        Returns the given integer parameter of the selected modules, e.g.,
+        `param("width")` for `Add(SInt(w))`.
+        """
+        def get(m: Module) -> int:
+            for f in fields(m):
+                if field is not None and f.name != field:
+                    continue
+                data = getattr(m, f.name)
+                if data is not None and hasattr(data, name):
+                    return getattr(data, name)
+            raise KeyError(f"{m} has no parameter {name}")
+        return np.array([get(m) for m in self.modules], dtype=np.int64)
+
+
+class SqliteAreaStore:
+    """
+    Stores module areas in SQLite with one row per module, data field and
+    integer parameter, so that parametric range queries run as one indexed
+    query. The file is in WAL mode; any number of processes can read it while
+    one process writes.
+    """
+
+    def __init__(self, fpath: str, read_only: bool = False) -> None:
+        if read_only:
+            self._conn = sqlite3.connect(f"file:{fpath}?mode=ro", uri=True, timeout=30)
+        else:
+            self._conn = sqlite3.connect(fpath, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _insert(self, m: Module, area: float) -> None:
+        name = m.to_string()
+        self._conn.execute("DELETE FROM entries WHERE name = ?", (name,))
+        entry_id = self._conn.execute(
+            "INSERT INTO entries (name, kind, area) VALUES (?, ?, ?)",
+            (name, type(m).__name__, float(area))).lastrowid
+        for f in fields(m):
+            data = getattr(m, f.name)
+            if data is None:
+                continue
+            self._conn.execute(
+                "INSERT INTO data (entry_id, field, data_kind) VALUES (?, ?, ?)",
+                (entry_id, f.name, type(data).__name__))
+            self._conn.executemany(
+                "INSERT INTO params (entry_id, field, param, value) VALUES (?, ?, ?, ?)",
+                [(entry_id, f.name, p.name, getattr(data, p.name)) for p in fields(data)])
+
+    def add(self, m: Module, area: float) -> None:
+        with self._conn:
+            self._insert(m, area)
+
+    def import_database(self, area_db: AreaDatabase, measured_only: bool = True) -> None:
+        """
+        Copies the entries of an area database, by default without the values
+        estimated by its handlers.
+        """
+        data = area_db.measured() if measured_only else area_db.data()
+        with self._conn:
+            for m, area in data.items():
+                self._insert(m, area)
+
+    def load_into(self, area_db: AreaDatabase) -> None:
+        """
+        Adds every stored entry to an area database, as `add()` would.
+        """
+        area_db.add_many({
+            Module.from_string(name): area
+            for name, area in self._conn.execute("SELECT name, area FROM entries")
+        })
+
+    def select(self, kind: Union[Type[Module], str, None] = None, **constraints) -> Selection:
+        """
+        Returns the stored modules matching all the constraints, e.g.,
+
+            select(kind=Add, gen=SInt, width=(8, 16))
+            select(kind=FloatingPointToBlockFloatingPoint,
+                   gen_fp=FloatingPoint.bfloat16,
+                   gen_bfp__exponent_width=10, gen_bfp__mantissa_width=4)
+
+        A keyword naming a data field takes a data type (matches the kind of
+        the field) or a data value (matches it exactly). Other keywords name an
+        integer parameter, optionally qualified by its field as
+        `field__param`, and take a value or an inclusive `(low, high)` range.
+        Unqualified parameters match any field. The result is ordered by the
+        range constraints in the given order.
+        """
+        where: List[str] = []
+        args: List[object] = []
+        order: List[str] = []
+        order_args: List[object] = []
+
+        if kind is not None:
+            where.append("e.kind = ?")
+            args.append(kind if isinstance(kind, str) else kind.__name__)
+
+        def param_query(field: Optional[str], param: str, value: Constraint) -> None:
+            query = "SELECT 1 FROM params p WHERE p.entry_id = e.id AND p.param = ?"
+            q_args: List[object] = [param]
+            if field is not None:
+                query += " AND p.field = ?"
+                q_args.append(field)
+            if isinstance(value, tuple):
+                query += " AND p.value BETWEEN ? AND ?"
+                q_args += [int(value[0]), int(value[1])]
+                order.append(
+                    "(SELECT MIN(p.value) FROM params p WHERE p.entry_id = e.id AND p.param = ?" +
+                    (" AND p.field = ?)" if field is not None else ")"))
+                order_args.extend([param] if field is None else [param, field])
+            else:
+                query += " AND p.value = ?"
+                q_args.append(int(value))
+            where.append(f"EXISTS ({query})")
+            args.extend(q_args)
+
+        for key, value in constraints.items():
+            if isinstance(value, type) and issubclass(value, Data):
+                where.append(
+                    "EXISTS (SELECT 1 FROM data d WHERE d.entry_id = e.id AND d.field = ? AND d.data_kind = ?)")
+                args += [key, value.__name__]
+            elif isinstance(value, Data):
+                assert(is_dataclass(value))
+                where.append(
+                    "EXISTS (SELECT 1 FROM data d WHERE d.entry_id = e.id AND d.field = ? AND d.data_kind = ?)")
+                args += [key, type(value).__name__]
+                for p in fields(value):
+                    param_query(key, p.name, getattr(value, p.name))
+            elif "__" in key:
+                field, param = key.split("__", 1)
+                param_query(field, param, value)
+            else:
+                param_query(None, key, value)
+
+        query = "SELECT e.name, e.area FROM entries e"
+        if len(where) > 0:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY " + ", ".join(order + ["e.name"])
+        rows = self._conn.execute(query, args + order_args).fetchall()
+
+        return Selection(
+            [Module.from_string(name) for name, _ in rows],
+            np.array([area for _, area in rows], dtype=np.float64))
+
+
+def main() -> None:
+    import os
+    DATA_DIR = os.path.dirname(os.path.abspath(__file__)) + "/output"
+    store = SqliteAreaStore(f"{DATA_DIR}/cache.sqlite")
+    store.import_database(AreaDatabase(DATA_DIR))
+    print(f"Stored {len(store)} modules in {DATA_DIR}/cache.sqlite")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
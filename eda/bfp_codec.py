@@ -0,0 +1,224 @@
+"""
+Bit-packed storage of HBFP tensors.
+
+A file holds a fixed header followed by the blocks, without any padding
+between them. Each block is the shared exponent (`exponent_width` bits)
+followed by `block_size` mantissas (`mantissa_width` bits each), all in two's
+complement and most significant bit first, i.e. exactly
+`BlockFloatingPoint.bits()` bits per block. Blocks run along the last axis of
+the tensor, which is zero padded to a multiple of the block size.
+
+The encoder streams the tensor into an `np.memmap` a chunk at a time (whole
+rows, or pieces of a row when a single row is too large), and any range of
+blocks can be decoded by reading only the bytes that cover it.
+"""
+
+import argparse
+import math
+import os
+import struct
+import time
+from typing import Tuple
+import numpy as np
+from bfp_emulator import quantize, dequantize
+from data_types import BlockFloatingPoint, FloatingPoint
+
+MAGIC = b"HBFP"
+VERSION = 1
+# magic, version, block size, exponent width, mantissa width, number of dims
+_header_fixed = struct.Struct("<4sHHHHH")
+
+
+def _header(shape: Tuple[int, ...], gen_bfp: BlockFloatingPoint) -> bytes:
+    header = _header_fixed.pack(
+        MAGIC, VERSION, gen_bfp.block_size, gen_bfp.exponent_width, gen_bfp.mantissa_width, len(shape))
+    header += struct.pack(f"<{len(shape)}Q", *shape)
+    # keeps the blocks 8 bytes aligned
+    return header + bytes(-len(header) % 8)
+
+
+def packed_size(shape: Tuple[int, ...], gen_bfp: BlockFloatingPoint) -> int:
+    """
+    Returns the size of the file holding a tensor of the given shape in bytes.
+    """
+    rows = math.prod(shape[:-1])
+    n_blocks = rows * math.ceil(shape[-1] / gen_bfp.block_size)
+    return len(_header(shape, gen_bfp)) + math.ceil(n_blocks * gen_bfp.bits() / 8)
+
+
+def _to_bits(x: np.ndarray, width: int) -> np.ndarray:
+    """
+    Returns the `width` low bits of `x` (MSB first) on a new last axis.
+    """
+    return ((x[..., None] >> np.arange(width - 1, -1, -1)) & 1).astype(np.uint8)
+
+
+def _from_bits(bits: np.ndarray, width: int) -> np.ndarray:
+    """
+    Inverse of `_to_bits()` for two's complement values.
+    """
+    x = bits.astype(np.int64) @ (1 << np.arange(width - 1, -1, -1))
+    return np.where(x >= 1 << (width - 1), x - (1 << width), x)
+
+
+def pack_blocks(
+        exponents: np.ndarray,
+        mantissas: np.ndarray,
+        gen_bfp: BlockFloatingPoint,
+        bit_offset: int = 0) -> np.ndarray:
+    """
+    Packs `n` blocks (shapes `(n,)` and `(n, block_size)`) into bytes, the
+    first block starting `bit_offset` zero bits into the result.
+    """
+    bits = np.concatenate([
+        _to_bits(exponents, gen_bfp.exponent_width),
+        _to_bits(mantissas, gen_bfp.mantissa_width).reshape(len(exponents), -1)
+    ], axis=-1)
+    return np.packbits(np.concatenate([np.zeros(bit_offset, dtype=np.uint8), bits.reshape(-1)]))
+
+
+def unpack_blocks(
+        data: np.ndarray,
+        n_blocks: int,
+        gen_bfp: BlockFloatingPoint,
+        bit_offset: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Inverse of `pack_blocks()`, the first block starting `bit_offset` bits
+    into `data`.
+    """
+    bits_per_block = gen_bfp.bits()
+    bits = np.unpackbits(data)[bit_offset:bit_offset + n_blocks * bits_per_block].reshape(n_blocks, -1)
+    exponents = _from_bits(bits[:, :gen_bfp.exponent_width], gen_bfp.exponent_width)
+    mantissas = _from_bits(
+        bits[:, gen_bfp.exponent_width:].reshape(n_blocks, gen_bfp.block_size, gen_bfp.mantissa_width),
+        gen_bfp.mantissa_width)
+    return exponents, mantissas
+
+
+class BfpFile:
+    """
+    Read access to a packed HBFP tensor through a memory map.
+    """
+
+    def __init__(self, fpath: str):
+        with open(fpath, "rb") as f:
+            fixed = f.read(_header_fixed.size)
+            magic, version, block_size, exponent_width, mantissa_width, ndim = _header_fixed.unpack(fixed)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{fpath} is not a version {VERSION} HBFP file")
+            self.shape = struct.unpack(f"<{ndim}Q", f.read(8 * ndim))
+        self.gen_bfp = BlockFloatingPoint(block_size, exponent_width, mantissa_width)
+        self.blocks_per_row = math.ceil(self.shape[-1] / block_size)
+        self.n_blocks = math.prod(self.shape[:-1]) * self.blocks_per_row
+        self.offset = len(_header(self.shape, self.gen_bfp))
+        self.data = np.memmap(fpath, dtype=np.uint8, mode="r", offset=self.offset)
+
+    def blocks(self, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the shared exponents and the mantissas of the blocks
+        `start` to `stop` (row major, the padding included).
+        """
+        stop = min(stop, self.n_blocks)
+        if start >= stop:
+            return np.empty(0, dtype=np.int64), np.empty((0, self.gen_bfp.block_size), dtype=np.int64)
+        bits_per_block = self.gen_bfp.bits()
+        first_bit = start * bits_per_block
+        last_byte = math.ceil(stop * bits_per_block / 8)
+        return unpack_blocks(
+            self.data[first_bit // 8:last_byte], stop - start, self.gen_bfp, first_bit % 8)
+
+    def rows(self, start: int, stop: int) -> np.ndarray:
+        """
+        Decodes the rows `start` to `stop` of the tensor flattened to 2D.
+        """
+        exponents, mantissas = self.blocks(start * self.blocks_per_row, stop * self.blocks_per_row)
+        x = dequantize(
+            exponents.reshape(-1, self.blocks_per_row),
+            mantissas.reshape(-1, self.blocks_per_row * self.gen_bfp.block_size),
+            self.gen_bfp, self.shape[-1])
+        return x
+
+    def read(self) -> np.ndarray:
+        """
+        Decodes the whole tensor.
+        """
+        return self.rows(0, math.prod(self.shape[:-1])).reshape(self.shape)
+
+    def bytes_per_element(self) -> float:
+        """
+        Measured storage cost, header and padding included.
+        """
+        return (self.offset + self.data.size) / math.prod(self.shape)
+
+    def close(self) -> None:
+        if self.data is not None:
+            self.data._mmap.close()
+            self.data = None
+
+
+def encode(
+        x: np.ndarray,
+        fpath: str,
+        gen_bfp: BlockFloatingPoint,
+        gen_fp: FloatingPoint = FloatingPoint.bfloat16,
+        chunk_bytes: int = 64 << 20,
+        negative_zero_saturates: bool = True) -> BfpFile:
+    """
+    Quantizes `x` (which can itself be an `np.memmap`) to `gen_bfp` through
+    `gen_fp` and writes it to `fpath`, about `chunk_bytes` of input at a time.
+    """
+    shape = x.shape
+    rows = x.reshape(-1, shape[-1])
+    bs = gen_bfp.block_size
+    blocks_per_row = math.ceil(shape[-1] / bs)
+    elements_per_chunk = max(bs, chunk_bytes // 8 // bs * bs)
+
+    header = _header(shape, gen_bfp)
+    with open(fpath, "wb") as f:
+        f.write(header)
+        f.truncate(packed_size(shape, gen_bfp))
+    out = np.memmap(fpath, dtype=np.uint8, mode="r+", offset=len(header))
+
+    def write(first_block: int, x: np.ndarray) -> None:
+        exponents, mantissas = quantize(x, gen_bfp, gen_fp, negative_zero_saturates)
+        first_bit = first_block * gen_bfp.bits()
+        packed = pack_blocks(exponents.reshape(-1), mantissas.reshape(-1, bs), gen_bfp, first_bit % 8)
+        # the file starts zeroed and chunks only share the bits of a boundary byte
+        out[first_bit // 8:first_bit // 8 + packed.size] |= packed
+
+    if shape[-1] <= elements_per_chunk:
+        rows_per_chunk = elements_per_chunk // shape[-1]
+        for i in range(0, rows.shape[0], rows_per_chunk):
+            write(i * blocks_per_row, rows[i:i + rows_per_chunk])
+    else:
+        for i in range(rows.shape[0]):
+            for j in range(0, shape[-1], elements_per_chunk):
+                write(i * blocks_per_row + j // bs, rows[i, j:j + elements_per_chunk])
+    out.flush()
+    out._mmap.close()
+    return BfpFile(fpath)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Packs a .npy tensor to HBFP and reports the storage cost.")
+    parser.add_argument("input", help=".npy file, memory mapped")
+    parser.add_argument("output")
+    parser.add_argument("--block-size", type=int, default=16)
+    parser.add_argument("--exponent-width", type=int, default=10)
+    parser.add_argument("--mantissa-width", type=int, default=8)
+    args = parser.parse_args()
+
+    gen_bfp = BlockFloatingPoint(args.block_size, args.exponent_width, args.mantissa_width)
+    x = np.load(args.input, mmap_mode="r")
+    start = time.time()
+    f = encode(x, args.output, gen_bfp)
+    duration = time.time() - start
+    print(f"{gen_bfp}: {x.size} elements in {duration:.2f} s, "
+          f"{f.bytes_per_element() * 8:.4f} bits per element measured, "
+          f"{gen_bfp.bits() / gen_bfp.block_size:.4f} on paper, "
+          f"{os.path.getsize(args.input) / os.path.getsize(args.output):.2f}x smaller than the input")
+    f.close()
+
+
+if __name__ == "__main__":
+    main()
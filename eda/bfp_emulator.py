@@ -0,0 +1,419 @@
+"""
+NumPy models of the block floating point datapaths in `src/main/scala/blockfloat`.
+
+Floating point values are handled as three integer arrays (sign, exponent,
+mantissa) holding the bit fields of a `FloatingPoint`, fixed point values
+as int64 arrays holding the two's complement value of the field.
+"""
+from typing import Dict, List, Tuple
+from data_types import BlockFloatingPoint, FixedPointWithExponent, FloatingPoint
+import numpy as np
+
+
+def exponent_offset(gen_fp: FloatingPoint) -> int:
+    return (1 << (gen_fp.exponent_width - 1)) - 1
+
+
+def wrap_signed(x: np.ndarray, width: int) -> np.ndarray:
+    """
+    Truncates to `width` bits and reinterprets as a two's complement value,
+    like assigning to an `SInt(width.W)` wire.
+    """
+    x = np.asarray(x, dtype=np.int64) & ((1 << width) - 1)
+    return np.where(x >= (1 << (width - 1)), x - (1 << width), x)
+
+
+def encode_floating_point(x: np.ndarray, gen_fp: FloatingPoint) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Converts float64 values to the bit fields of `gen_fp` in the same way as
+    `TestFloatingPoint.from_double`: the mantissa is truncated and values
+    below the exponent range become (positive) zero. Unlike the Scala helper,
+    values above the exponent range (and infinities, NaNs) saturate to the
+    largest representable magnitude.
+    """
+    assert(gen_fp.exponent_width <= 11 and gen_fp.mantissa_width <= 52)
+    bits = np.ascontiguousarray(x, dtype=np.float64).view(np.uint64).astype(np.int64)
+    # the sign bit is the MSB of the int64
+    sign = (bits >> 63) & 1
+    exponent = ((bits >> 52) & 0x7ff) - ((2048 - (1 << gen_fp.exponent_width)) >> 1)
+    mantissa = (bits & ((1 << 52) - 1)) >> (52 - gen_fp.mantissa_width)
+
+    underflow = exponent < 0
+    sign = np.where(underflow, 0, sign)
+    mantissa = np.where(underflow, 0, mantissa)
+    exponent = np.where(underflow, 0, exponent)
+
+    overflow = exponent >= (1 << gen_fp.exponent_width)
+    mantissa = np.where(overflow, (1 << gen_fp.mantissa_width) - 1, mantissa)
+    exponent = np.where(overflow, (1 << gen_fp.exponent_width) - 1, exponent)
+
+    return sign, exponent, mantissa
+
+
+def decode_floating_point(
+        sign: np.ndarray,
+        exponent: np.ndarray,
+        mantissa: np.ndarray,
+        gen_fp: FloatingPoint) -> np.ndarray:
+    """
+    Returns the float64 values of the bit fields. A zero exponent has no
+    hidden bit, as in `float.Add`.
+    """
+    exponent = np.asarray(exponent, dtype=np.int64)
+    hidden = (exponent != 0).astype(np.float64)
+    significand = hidden + np.asarray(mantissa, dtype=np.float64) / (1 << gen_fp.mantissa_width)
+    magnitude = np.ldexp(significand, np.maximum(exponent, 1) - exponent_offset(gen_fp))
+    return np.where(np.asarray(sign) != 0, -magnitude, magnitude)
+
+
+def to_fixed_point(
+        sign: np.ndarray,
+        exponent: np.ndarray,
+        mantissa: np.ndarray,
+        gen_fp: FloatingPoint,
+        width: int,
+        negative_zero_saturates: bool = True) -> np.ndarray:
+    """
+    Models `floatingPointHelpers.to_fixed_point` with an `SInt(width.W)`
+    result. Magnitudes that do not fit saturate. The RTL also takes a
+    negative value whose magnitude truncates to zero for an overflow and
+    returns the most negative value; with `negative_zero_saturates=False` it
+    returns zero instead, to study the datapath without this defect.
+    """
+    exponent = np.asarray(exponent, dtype=np.int64)
+    mantissa = np.asarray(mantissa, dtype=np.int64)
+    mantissa_width = gen_fp.mantissa_width
+    breakpt = exponent_offset(gen_fp) + width - 1
+
+    # to_unsigned_fixed_point
+    if width > mantissa_width:
+        a = (1 << (width - 1)) | (mantissa << (width - 1 - mantissa_width))
+    else:
+        a = (1 << (width - 1)) | (mantissa >> (mantissa_width - (width - 1)))
+    shift = np.clip(breakpt - exponent, 0, 63)
+    u = np.where(
+        exponent == 0,
+        0,
+        np.where(exponent > breakpt, (1 << width) - 1, a >> shift))
+
+    msb = 1 << (width - 1)
+    positive = np.where(u >= msb, msb - 1, u)
+    a_neg = (-u) & ((1 << width) - 1)
+    negative = np.where(a_neg < msb, -msb, a_neg - (1 << width))
+    if not negative_zero_saturates:
+        negative = np.where(u == 0, 0, negative)
+    return np.where(np.asarray(sign) != 0, negative, positive)
+
+
+def to_floating_point(x: np.ndarray, width: int, gen_fp: FloatingPoint) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Models `fixedPointHelpers.to_floating_point` for an `SInt(width.W)`
+    input: the integer value is normalized and its mantissa truncated.
+    """
+    x = np.asarray(x, dtype=np.int64)
+    mantissa_width = gen_fp.mantissa_width
+    sign = (x < 0).astype(np.int64)
+    # `width + 1` bits, enough for the magnitude of the most negative value
+    extended = np.abs(x)
+    # the bit length is exact in float64 for magnitudes below 2 ** 53
+    length = np.frexp(extended.astype(np.float64))[1].astype(np.int64)
+    shift = width + 1 - length
+    # the leading one is at bit `width` after the shift
+    shifted = extended << shift
+    if width >= mantissa_width:
+        mantissa = (shifted >> (width - mantissa_width)) & ((1 << mantissa_width) - 1)
+    else:
+        mantissa = (shifted & ((1 << width) - 1)) << (mantissa_width - width)
+    exponent = np.where(
+        x == 0,
+        0,
+        (width + exponent_offset(gen_fp) - shift) & ((1 << gen_fp.exponent_width) - 1))
+    return sign, exponent, mantissa
+
+
+def fixed_point_with_exponent_to_floating_point(
+        exponent: np.ndarray,
+        mantissa: np.ndarray,
+        gen_fxe: FixedPointWithExponent,
+        gen_fp: FloatingPoint) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Models `FixedPointWithExponentToFloatingPoint`: converts the mantissa and
+    adds the exponent to the result, truncating to the exponent field on
+    overflow and clamping the exponent to zero on underflow.
+    """
+    offset = np.asarray(exponent, dtype=np.int64)
+    sign, fp_exponent, fp_mantissa = to_floating_point(mantissa, gen_fxe.mantissa_width, gen_fp)
+    result_exponent = np.where(
+        offset > 0,
+        (fp_exponent + offset) & ((1 << gen_fp.exponent_width) - 1),
+        np.where(fp_exponent >= -offset, fp_exponent + offset, 0))
+    return sign, result_exponent, fp_mantissa
+
+
+def floating_point_to_block_floating_point(
+        sign: np.ndarray,
+        exponent: np.ndarray,
+        mantissa: np.ndarray,
+        gen_fp: FloatingPoint,
+        gen_bfp: BlockFloatingPoint,
+        negative_zero_saturates: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Models `FloatingPointToBlockFloatingPoint`. The blocks are consecutive
+    elements along the last axis, whose length must be a multiple of the
+    block size. Returns the shared exponents (one per block) and the
+    mantissas, both as signed integers; element `i` of block `b` stands for
+    `mantissas[..., i] * 2 ** exponents[..., b]`.
+    """
+    sign, exponent, mantissa = (np.asarray(x, dtype=np.int64) for x in (sign, exponent, mantissa))
+    shape = exponent.shape
+    assert(shape[-1] % gen_bfp.block_size == 0)
+    blocks = shape[:-1] + (shape[-1] // gen_bfp.block_size, gen_bfp.block_size)
+
+    max_exponent = exponent.reshape(blocks).max(axis=-1)
+    k = exponent_offset(gen_fp) + gen_bfp.mantissa_width - 2
+    shared_exponent = wrap_signed(max_exponent - k, gen_bfp.exponent_width)
+
+    # ChiselUtils.uint_diff_saturate(exponent + offset + mantissa_width, 2 + max_exponent)
+    shifted_exponent = exponent.reshape(blocks) + k - max_exponent[..., None]
+    shifted_exponent = np.where(
+        exponent.reshape(blocks) == 0, 0, np.maximum(shifted_exponent, 0)).reshape(shape)
+
+    mantissas = to_fixed_point(
+        sign, shifted_exponent, mantissa, gen_fp, gen_bfp.mantissa_width, negative_zero_saturates)
+    return shared_exponent, mantissas
+
+
+def quantize(
+        x: np.ndarray,
+        gen_bfp: BlockFloatingPoint,
+        gen_fp: FloatingPoint = FloatingPoint.bfloat16,
+        negative_zero_saturates: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converts a float tensor to `gen_fp` and then to HBFP blocks along its
+    last axis, which is zero padded to a multiple of the block size. Returns
+    the shared exponents and the mantissas (padded).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    pad = -x.shape[-1] % gen_bfp.block_size
+    if pad > 0:
+        x = np.concatenate([x, np.zeros(x.shape[:-1] + (pad,))], axis=-1)
+    return floating_point_to_block_floating_point(
+        *encode_floating_point(x, gen_fp), gen_fp, gen_bfp, negative_zero_saturates)
+
+
+def dequantize(exponents: np.ndarray, mantissas: np.ndarray, gen_bfp: BlockFloatingPoint, length: int = None) -> np.ndarray:
+    """
+    Returns the float64 values of HBFP blocks, optionally cutting the last
+    axis to `length` (to drop the padding added by `quantize()`).
+    """
+    scale = np.repeat(np.asarray(exponents, dtype=np.int64), gen_bfp.block_size, axis=-1)
+    x = np.ldexp(np.asarray(mantissas, dtype=np.float64), scale)
+    return x if length is None else x[..., :length]
+
+
+def floating_point_add(
+        a: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        b: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        gen_fp: FloatingPoint) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Models `float.Add` (the pipelined and the combinational version compute
+    the same): align the smaller operand by truncating shifts, add or
+    subtract, normalize. There is no rounding.
+    """
+    a_sign, a_exponent, a_mantissa = (np.asarray(x, dtype=np.int64) for x in a)
+    b_sign, b_exponent, b_mantissa = (np.asarray(x, dtype=np.int64) for x in b)
+    mantissa_width = gen_fp.mantissa_width
+    mantissa_mask = (1 << mantissa_width) - 1
+
+    a_bigger = (a_exponent > b_exponent) | ((a_exponent == b_exponent) & (a_mantissa > b_mantissa))
+    big_sign = np.where(a_bigger, a_sign, b_sign)
+    big_exponent = np.where(a_bigger, a_exponent, b_exponent)
+    big_mantissa = np.where(a_bigger, a_mantissa, b_mantissa)
+    small_sign = np.where(a_bigger, b_sign, a_sign)
+    small_exponent = np.where(a_bigger, b_exponent, a_exponent)
+    small_mantissa = np.where(a_bigger, b_mantissa, a_mantissa)
+
+    exponent_diff = big_exponent - small_exponent
+    small_extended = np.where(
+        exponent_diff >= mantissa_width,
+        0,
+        (((small_exponent != 0).astype(np.int64) << mantissa_width) | small_mantissa) >> np.minimum(exponent_diff, 63))
+    big_extended = ((big_exponent != 0).astype(np.int64) << mantissa_width) | big_mantissa
+    result = np.where(small_sign == big_sign, big_extended + small_extended, big_extended - small_extended)
+
+    # leading zeros of the (mantissa_width + 2)-bit result
+    length = np.frexp(result.astype(np.float64))[1].astype(np.int64)
+    shift = mantissa_width + 2 - length
+    shift_width = int(np.ceil(np.log2(mantissa_width + 2)))
+
+    subnormal = shift > big_exponent + 1
+    normal_mantissa = ((result << shift) >> 1) & mantissa_mask
+    subnormal_mantissa = ((result << (big_exponent & ((1 << shift_width) - 1))) >> 1) & mantissa_mask
+    zero = result == 0
+
+    sign = np.where(zero, 0, big_sign)
+    exponent = np.where(
+        zero | subnormal, 0, (big_exponent - shift + 1) & ((1 << gen_fp.exponent_width) - 1))
+    mantissa = np.where(zero, 0, np.where(subnormal, subnormal_mantissa, normal_mantissa))
+    return sign, exponent, mantissa
+
+
+def block_dot_products(
+        a_exponents: np.ndarray,
+        a_mantissas: np.ndarray,
+        b_exponents: np.ndarray,
+        b_mantissas: np.ndarray,
+        gen_bfp: BlockFloatingPoint,
+        gen_accum: FloatingPoint,
+        tree_width: int = None,
+        wrap_exponent: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Models the combinational part of `BlockFloatALU` for every pair of
+    blocks: `a_*` hold `m` blocks (shapes `(m,)` and `(m, block_size)`),
+    `b_*` hold `n` blocks, the results have the shape `(m, n)`.
+
+    The mantissa products are summed by an adder tree and the sum is
+    converted to `gen_accum`, whose exponent is offset by the two shared
+    exponents. The RTL tree keeps the `2 * mantissa_width` product width and
+    wraps around; pass `tree_width=2 * mantissa_width` to reproduce that. By
+    default the tree is wide enough not to overflow.
+
+    By default, the exponent of the sum and the shared exponents are added
+    before any truncation, and results outside the exponent range flush to
+    zero or saturate. The RTL reads the exponent field of the converted sum
+    `.asSInt`, adds the shared exponents and truncates back to the field.
+    Modulo the field width, this is the untruncated sum, so the results in
+    the exponent range are the same; the results outside it wrap around and
+    a zero sum gets the shared exponents (a power of two instead of zero).
+    Pass `wrap_exponent=True` to reproduce that.
+    """
+    natural_width = 2 * gen_bfp.mantissa_width + int(np.ceil(np.log2(gen_bfp.block_size)))
+    # exact, the sums stay far below 2 ** 53
+    sums = (a_mantissas.astype(np.float64) @ b_mantissas.astype(np.float64).T).astype(np.int64)
+    if tree_width is not None:
+        sums = wrap_signed(sums, tree_width)
+    sign, exponent, mantissa = to_floating_point(sums, tree_width or natural_width, gen_accum)
+
+    max_exponent = (1 << gen_accum.exponent_width) - 1
+    shared = a_exponents[:, None] + b_exponents[None, :]
+    if wrap_exponent:
+        return sign, (exponent + shared) & max_exponent, mantissa
+
+    # the exponent of `to_floating_point()` before it is truncated to the field
+    length = np.frexp(np.abs(sums).astype(np.float64))[1].astype(np.int64)
+    exponent = exponent_offset(gen_accum) + length - 1 + shared
+    underflow = (sums == 0) | (exponent < 1)
+    overflow = exponent > max_exponent
+    sign = np.where(underflow, 0, sign)
+    mantissa = np.where(underflow, 0, np.where(overflow, (1 << gen_accum.mantissa_width) - 1, mantissa))
+    exponent = np.where(underflow, 0, np.where(overflow, max_exponent, exponent))
+    return sign, exponent, mantissa
+
+
+def bfp_gemm(
+        a: np.ndarray,
+        b: np.ndarray,
+        gen_bfp: BlockFloatingPoint,
+        gen_accum: FloatingPoint = FloatingPoint.ieee_fp16,
+        gen_fp: FloatingPoint = FloatingPoint.bfloat16,
+        tree_width: int = None,
+        tile: int = 256,
+        negative_zero_saturates: bool = True,
+        wrap_exponent: bool = False) -> np.ndarray:
+    """
+    Computes `a @ b` the way an array of `BlockFloatALU`s would: both
+    operands are converted to `gen_fp` and then to HBFP blocks along the
+    inner dimension, each pair of blocks goes through `block_dot_products()`
+    and the results are accumulated in order with `float.Add` in the
+    `gen_accum` format. The output is computed in `tile x tile` pieces to
+    bound the memory.
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    assert(a.ndim == 2 and b.ndim == 2 and a.shape[1] == b.shape[0])
+    bs = gen_bfp.block_size
+    a_exponents, a_mantissas = quantize(a, gen_bfp, gen_fp, negative_zero_saturates)
+    b_exponents, b_mantissas = quantize(b.T, gen_bfp, gen_fp, negative_zero_saturates)
+    n_blocks = a_exponents.shape[1]
+
+    c = np.empty((a.shape[0], b.shape[1]))
+    for i in range(0, a.shape[0], tile):
+        for j in range(0, b.shape[1], tile):
+            shape = (min(tile, a.shape[0] - i), min(tile, b.shape[1] - j))
+            accum = tuple(np.zeros(shape, dtype=np.int64) for _ in range(3))
+            for k in range(n_blocks):
+                partial = block_dot_products(
+                    a_exponents[i:i + tile, k], a_mantissas[i:i + tile, k * bs:(k + 1) * bs],
+                    b_exponents[j:j + tile, k], b_mantissas[j:j + tile, k * bs:(k + 1) * bs],
+                    gen_bfp, gen_accum, tree_width, wrap_exponent)
+                accum = floating_point_add(accum, partial, gen_accum)
+            c[i:i + tile, j:j + tile] = decode_floating_point(*accum, gen_accum)
+    return c
+
+
+def gemm_error(a: np.ndarray, b: np.ndarray, **kwargs) -> Dict[str, float]:
+    """
+    Compares `bfp_gemm(a, b, **kwargs)` against the float64 product.
+    """
+    exact = np.asarray(a, dtype=np.float64) @ np.asarray(b, dtype=np.float64)
+    error = bfp_gemm(a, b, **kwargs) - exact
+    return {
+        "relative_frobenius": float(np.linalg.norm(error) / np.linalg.norm(exact)),
+        "max_abs": float(np.abs(error).max()),
+        "mean_abs": float(np.abs(error).mean())
+    }
+
+
+def error_sweep(
+        a: np.ndarray,
+        b: np.ndarray,
+        block_sizes: List[int],
+        mantissa_widths: List[int],
+        exponent_width: int = 10,
+        metric: str = "relative_frobenius",
+        **kwargs) -> np.ndarray:
+    """
+    Returns the GEMM error for every (block size, mantissa width) pair, with
+    the shape `(len(block_sizes), len(mantissa_widths))`.
+    """
+    result = np.empty((len(block_sizes), len(mantissa_widths)))
+    for i, block_size in enumerate(block_sizes):
+        for j, mantissa_width in enumerate(mantissa_widths):
+            gen_bfp = BlockFloatingPoint(block_size, exponent_width, mantissa_width)
+            result[i, j] = gemm_error(a, b, gen_bfp=gen_bfp, **kwargs)[metric]
+    return result
+
+
+def main() -> None:
+    import time
+    rng = np.random.default_rng(0)
+    w = rng.normal(0, 0.02, (4096, 4096))
+    for mantissa_width in [8, 6, 4]:
+        gen_bfp = BlockFloatingPoint(16, 10, mantissa_width)
+        for negative_zero_saturates in [True, False]:
+            start = time.time()
+            e, m = quantize(w, gen_bfp, negative_zero_saturates=negative_zero_saturates)
+            q = dequantize(e, m, gen_bfp, w.shape[-1])
+            duration = time.time() - start
+            error = np.linalg.norm(q - w) / np.linalg.norm(w)
+            print(f"{gen_bfp} ({negative_zero_saturates=}): relative error = {error:.4f} "
+                  f"({duration:.2f} s for {w.size} elements)")
+
+    # accuracy next to area for the same design points
+    from main import cost_hbfp
+    from data_types import FixedPointWithExponent
+    a = rng.normal(0, 1, (256, 512))
+    b = rng.normal(0, 0.02, (512, 256))
+    block_sizes = [4, 16, 64]
+    mantissa_widths = [4, 6, 8]
+    errors = error_sweep(
+        a, b, block_sizes, mantissa_widths, gen_accum=FloatingPoint.ieee_fp32, negative_zero_saturates=False)
+    for i, block_size in enumerate(block_sizes):
+        for j, mantissa_width in enumerate(mantissa_widths):
+            area = float(cost_hbfp(FixedPointWithExponent(10, mantissa_width), FloatingPoint.bfloat16)(block_size))
+            print(f"block size = {block_size:3} mantissa = {mantissa_width}: "
+                  f"area = {area:10.1f} um^2, GEMM error = {errors[i, j]:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
 from dataclasses import fields, is_dataclass
-from typing import Pattern, Type
+import re
+from typing import Match, Pattern, Type
+
+_regex_fmt_optional = re.compile(r"\[([^\]]*)\]")
+_regex_fmt_field = re.compile(r"{([^}]+)}")
 
 def from_string(r: Pattern):
     """
@@ -15,6 +19,9 @@ def from_string(r: Pattern):
             m = m.groupdict()
             d = {}
             for field in fields(t):
+                if m[field.name] is None:
+                    # optional group did not match, keep the default value
+                    continue
                 if hasattr(field.type, "from_string"):
                     d[field.name] = field.type.from_string(m[field.name])
                 else:
@@ -23,3 +30,35 @@ def from_string(r: Pattern):
         t.from_string = _from_string
         return t
     return wrap
+
+
+def to_string(fmt: str):
+    """
+    Adds a `to_string()` method to dataclass, the inverse of `from_string()`.
+    The fields are substituted into `fmt` by their `repr()`. A segment of
+    `fmt` in square brackets is optional, it is dropped if one of its fields
+    is None (like an optional group in the `from_string()` regex).
+
+    The string is computed once and stored on the instance.
+    """
+    def wrap(t: Type) -> None:
+        assert(is_dataclass(t))
+        def _to_string(self) -> str:
+            s = self.__dict__.get("_string")
+            if s is None:
+                values = {field.name: getattr(self, field.name) for field in fields(t)}
+
+                def segment(m: Match) -> str:
+                    names = _regex_fmt_field.findall(m[1])
+                    if any(values[name] is None for name in names):
+                        return ""
+                    return m[1]
+
+                s = _regex_fmt_optional.sub(segment, fmt).format(
+                    **{name: repr(value) for name, value in values.items()})
+                # frozen dataclasses do not allow regular assignment
+                object.__setattr__(self, "_string", s)
+            return s
+        t.to_string = _to_string
+        return t
+    return wrap
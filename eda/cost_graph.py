@@ -0,0 +1,140 @@
+"""
+Costs as a lazily evaluated expression graph over `Module` leaves.
+
+The nodes are hash-consed: building the same leaf, sum or product twice
+returns the same node, so the cost functions of a sweep share their common
+terms (`Accumulator(bfloat16)`, `RELU(bfloat16)`, ...) and every node is
+evaluated once. The graph listens to the database: when `add()` lands a new
+result, only the nodes depending on the changed modules are evaluated again.
+"""
+
+from typing import Callable, Dict, List, Set, Tuple, Union
+from area_db import AreaDatabase
+from data_types import BlockFloatingPoint, FixedPointWithExponent, FloatingPoint, FloatingPointVec, SInt
+from modules import (Accumulator, Add, DotProduct, FixedPointWithExponentToFloatingPoint,
+                     FloatingPointToBlockFloatingPoint, Module, Multiply, RELU)
+
+
+class Node:
+    """
+    A leaf (`module`), a sum of `children` or a `scale` times one child.
+    """
+
+    def __init__(self, key: tuple, children: Tuple["Node", ...], module: Module = None, scale: float = 1) -> None:
+        self.key = key
+        self.children = children
+        self.module = module
+        self.scale = scale
+        self.parents: List[Node] = []
+        self.value: Union[float, None] = None
+
+
+class CostGraph:
+    def __init__(self, db: AreaDatabase) -> None:
+        self._db = db
+        self._nodes: Dict[tuple, Node] = {}
+        self._leaves: Dict[Module, Node] = {}
+        # the number of node evaluations so far
+        self.evaluations = 0
+        db.add_on_update(self.invalidate)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def _intern(self, key: tuple, children: Tuple[Node, ...], **kwargs) -> Node:
+        node = self._nodes.get(key, None)
+        if node is None:
+            node = Node(key, children, **kwargs)
+            for child in children:
+                child.parents.append(node)
+            self._nodes[key] = node
+        return node
+
+    def leaf(self, m: Module) -> Node:
+        node = self._intern(("leaf", m), (), module=m)
+        self._leaves[m] = node
+        return node
+
+    def sum(self, *terms: Node) -> Node:
+        return self._intern(("sum",) + tuple(id(t) for t in terms), terms)
+
+    def scale(self, k: float, node: Node) -> Node:
+        return self._intern(("scale", k, id(node)), (node,), scale=k)
+
+    def value(self, node: Node) -> float:
+        if node.value is None:
+            if node.module is not None:
+                node.value = self._db(node.module)
+            elif node.key[0] == "scale":
+                node.value = node.scale * self.value(node.children[0])
+            else:
+                node.value = sum(self.value(child) for child in node.children)
+            self.evaluations = self.evaluations + 1
+        return node.value
+
+    def invalidate(self, modules: Set[Module]) -> None:
+        """
+        Marks the leaves of the modules and everything above them for
+        re-evaluation.
+        """
+        stack = [self._leaves[m] for m in modules if m in self._leaves]
+        while stack:
+            node = stack.pop()
+            if node.value is None:
+                # never evaluated, or already invalidated with its parents
+                continue
+            node.value = None
+            stack.extend(node.parents)
+
+
+def graph_hbfp(
+        graph: CostGraph,
+        gen_fxe: FixedPointWithExponent,
+        gen_fp: FloatingPoint) -> Callable[[int], Node]:
+    """
+    `cost_hbfp()` as graph nodes: the children of the total are the terms of
+    `HbfpAreaCost`, in order.
+    """
+    def cost(block_size: int) -> Node:
+        gen_bfp = BlockFloatingPoint(
+            block_size, gen_fxe.exponent_width, gen_fxe.mantissa_width)
+        gen_accum = SInt(2 * gen_fxe.mantissa_width)
+        gen_fxe_output = FixedPointWithExponent(
+            gen_fxe.exponent_width, 2 * gen_fxe.mantissa_width)
+        return graph.sum(
+            graph.leaf(DotProduct(gen_bfp, gen_accum)),
+            graph.leaf(FixedPointWithExponentToFloatingPoint(gen_fxe_output, gen_fp)),
+            graph.leaf(Accumulator(gen_fp)),
+            graph.leaf(RELU(gen_fp)),
+            graph.leaf(FloatingPointToBlockFloatingPoint(gen_fp, gen_bfp)))
+    return cost
+
+
+def graph_fpvec(graph: CostGraph, gen_fp: FloatingPoint) -> Callable[[int], Node]:
+    """
+    `cost_fpvec()` as graph nodes, with the terms of `FloatingPointVecAreaCost`.
+    """
+    def cost(block_size: int) -> Node:
+        vec_type = FloatingPointVec(
+            block_size, gen_fp.exponent_width, gen_fp.mantissa_width)
+        return graph.sum(
+            graph.leaf(DotProduct(vec_type)),
+            graph.leaf(Accumulator(gen_fp)),
+            graph.leaf(RELU(gen_fp)))
+    return cost
+
+
+def graph_int(graph: CostGraph, width: int, gen_fp: FloatingPoint) -> Callable[[int], Node]:
+    """
+    `cost_int()` as graph nodes: the dot product, the accumulator and the
+    activation (the conversions are not modeled).
+    """
+    def cost(block_size: int) -> Node:
+        dot_product = graph.sum(
+            graph.scale(block_size, graph.leaf(Multiply(SInt(width)))),
+            graph.scale(block_size - 1, graph.leaf(Add(SInt(width * 2)))))
+        return graph.sum(
+            dot_product,
+            graph.leaf(Accumulator(gen_fp)),
+            graph.leaf(RELU(gen_fp)))
+    return cost
@@ -1,6 +1,5 @@
 from dataclasses import dataclass
 import re
-from turtle import width
 from typing import Type
 from common import from_string
 
@@ -115,7 +114,7 @@ class UInt(Data):
         return f"u{self.width}"
     
     def bits(self) -> int:
-        return width
+        return self.width
 
 
 @register_dataype
@@ -128,4 +127,4 @@ class SInt(Data):
         return f"s{self.width}"
     
     def bits(self) -> int:
-        return width
+        return self.width
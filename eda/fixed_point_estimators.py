@@ -1,4 +1,4 @@
-from typing import Callable, List, Union
+from typing import Callable, Dict, List, Tuple, Type, Union
 from area_db import AreaDatabase
 from modules import Add, Module, Multiply
 from data_types import Data, SInt, UInt
@@ -12,11 +12,21 @@ class PolynomialEstimator:
     """
 
     def __init__(self, deg: int, x: List[float], y: List[float]) -> None:
-        self._f = np.poly1d(np.polyfit(np.array(x), np.array(y), deg))
+        x, y = np.array(x), np.array(y)
+        self._f = np.poly1d(np.polyfit(x, y, deg))
+        # the standard deviation of the fit residuals (0 for an exact fit)
+        dof = len(x) - (deg + 1)
+        self.residual_std = float(np.sqrt(np.sum((y - self._f(x)) ** 2) / dof)) if dof > 0 else 0.0
 
     def __call__(self, x: float) -> float:
         return self._f(x)
 
+    def coefficients(self) -> np.ndarray:
+        """
+        Returns the polynomial coefficients, highest degree first.
+        """
+        return self._f.coeffs
+
 
 class EstimatedHandler(ABC):
     def __init__(self, estimator: Callable[[object], float]) -> None:
@@ -59,8 +69,52 @@ class FixedPointEstimators(EstimatedHandler):
         def estimate(m: Module):
             return d[(type(m), type(m.gen))](m.gen.width)
 
+        self._estimators = d
         super().__init__(estimator=estimate)
 
+    def estimator(self, hwgen: Type[Module], datagen: Type[Data]) -> PolynomialEstimator:
+        """
+        Returns the fitted polynomial of the area against the width, which
+        also accepts arrays of widths.
+        """
+        return self._estimators[(hwgen, datagen)]
+
+    @staticmethod
+    def _key(hwgen: Type[Module], datagen: Type[Data]) -> str:
+        return f"{hwgen.__name__}/{datagen.__name__}"
+
+    @staticmethod
+    def coefficient_key(m: Module) -> Union[Tuple[str, int], None]:
+        """
+        Returns the key of the exported polynomial for the module, and the
+        value to evaluate it at.
+        """
+        if not (isinstance(m, Multiply) or isinstance(m, Add)):
+            return None
+
+        if not (isinstance(m.gen, SInt) or isinstance(m.gen, UInt)):
+            return None
+
+        return (FixedPointEstimators._key(type(m), type(m.gen)), m.gen.width)
+
+    def export_coefficients(self) -> Tuple[Callable[[Module], Union[Tuple[str, int], None]], Dict[str, np.ndarray]]:
+        """
+        Returns the key function and the coefficients of the fitted polynomials.
+        """
+        return (FixedPointEstimators.coefficient_key, {
+            FixedPointEstimators._key(hwgen, datagen): estimator.coefficients()
+            for (hwgen, datagen), estimator in self._estimators.items()
+        })
+
+    def residual_std(self, m: Module) -> Union[float, None]:
+        """
+        Returns the residual standard deviation of the fit estimating the
+        module, or None if it is not estimated by this handler.
+        """
+        if self.check_module(m) is None:
+            return None
+        return self._estimators[(type(m), type(m.gen))].residual_std
+
     def check_module(self, m: Module) -> Union[Module, None]:
         if not (isinstance(m, Multiply) or isinstance(m, Add)):
             return None
@@ -1,11 +1,13 @@
 from dataclasses import fields
 from typing import Callable
 from area_db import AreaDatabase
+from power_db import PowerDatabase
+from render import Axes, Figure, Series, render
+from result_cache import ResultCache
 from data_types import *
 from area_handlers import *
 from modules import *
 import numpy as np
-from matplotlib import pyplot as plt
 import os
 
 DATA_DIR = os.path.dirname(os.path.abspath(__file__)) + "/output"
@@ -13,24 +15,41 @@ DATA_DIR = os.path.dirname(os.path.abspath(__file__)) + "/output"
 area = AreaDatabase(DATA_DIR)
 
 
-def assign_handlers():
+def assign_handlers(db: AreaDatabase = area):
     """
     Enables the estimation of the dot products and fp2bfp converters.
     """
 
-    area.add_on_miss(DotProductAreaHandler(area))
+    # the BFP dot products as an adder tree, the floating-point ones as a
+    # chain of adders
+    db.add_on_miss(AdderTreeAreaHandler(db))
+    db.add_on_miss(DotProductAreaHandler(db))
 
-    fp2bfp_area_handler = FloatingPointToBlockFloatingPointAreaHandler(area)
+    fp2bfp_area_handler = FloatingPointToBlockFloatingPointAreaHandler(db)
     for mantissa_width in [2, 3, 4, 5, 6, 7, 8]:
         fp2bfp_area_handler.add_estimator(
             FloatingPoint.bfloat16, FixedPointWithExponent(10, mantissa_width),
             [2, 4, 6, 32])
 
-    area.add_on_miss(fp2bfp_area_handler)
+    db.add_on_miss(fp2bfp_area_handler)
 
 
 assign_handlers()
 
+_power: PowerDatabase = None
+
+
+def power() -> PowerDatabase:
+    """
+    Returns the power database (mW at the synthesis clock), loaded on first
+    use so that area-only runs do not need the power reports.
+    """
+    global _power
+    if _power is None:
+        _power = PowerDatabase(DATA_DIR)
+        assign_handlers(_power)
+    return _power
+
 
 @dataclass(frozen=True)
 class HbfpAreaCost:
@@ -69,32 +88,41 @@ class FloatingPointVecAreaCost:
 def cost_hbfp(
         gen_fxe: FixedPointWithExponent,
         gen_fp: FloatingPoint,
-        breakdown: bool = False) -> Callable[[int], float]:
+        breakdown: bool = False,
+        db: AreaDatabase = None) -> Callable[[int], float]:
+    """
+    The costs are looked up in `db`, the area database by default (pass
+    `power()` for the power).
+    """
+    db = area if db is None else db
+
     def cost(block_size: int) -> HbfpAreaCost:
         gen_bfp = BlockFloatingPoint(
             block_size, gen_fxe.exponent_width, gen_fxe.mantissa_width)
         gen_accum = SInt(2 * gen_fxe.mantissa_width)
         gen_fxe_output = FixedPointWithExponent(
             gen_fxe.exponent_width, 2 * gen_fxe.mantissa_width)
-        dot_product = area(DotProduct(gen_bfp, gen_accum))
-        fxe_to_fp = area(FixedPointWithExponentToFloatingPoint(
+        dot_product = db(DotProduct(gen_bfp, gen_accum))
+        fxe_to_fp = db(FixedPointWithExponentToFloatingPoint(
             gen_fxe_output, gen_fp))
-        accumulator = area(Accumulator(gen_fp))
-        activation = area(RELU(gen_fp))
-        fp_to_bfp = area(FloatingPointToBlockFloatingPoint(gen_fp, gen_bfp))
+        accumulator = db(Accumulator(gen_fp))
+        activation = db(RELU(gen_fp))
+        fp_to_bfp = db(FloatingPointToBlockFloatingPoint(gen_fp, gen_bfp))
         return HbfpAreaCost(dot_product, fxe_to_fp, accumulator, activation, fp_to_bfp)
     if breakdown:
         return cost
     return np.vectorize(lambda x: cost(x).total())
 
 
-def cost_fpvec(gen_fp: FloatingPoint, breakdown: bool = False) -> Callable[[int], float]:
+def cost_fpvec(gen_fp: FloatingPoint, breakdown: bool = False, db: AreaDatabase = None) -> Callable[[int], float]:
+    db = area if db is None else db
+
     def cost(block_size: int) -> FloatingPointVecAreaCost:
         vec_type = FloatingPointVec(
             block_size, gen_fp.exponent_width, gen_fp.mantissa_width)
-        dot_product = area(DotProduct(vec_type))
-        accumulator = area(Accumulator(gen_fp))
-        activation = area(RELU(gen_fp))
+        dot_product = db(DotProduct(vec_type))
+        accumulator = db(Accumulator(gen_fp))
+        activation = db(RELU(gen_fp))
         return FloatingPointVecAreaCost(dot_product, accumulator, activation)
     if breakdown:
         return cost
@@ -104,13 +132,16 @@ def cost_fpvec(gen_fp: FloatingPoint, breakdown: bool = False) -> Callable[[int]
 def cost_int(
         width: int,
         gen_fp: FloatingPoint,
-        breakdown: bool = False) -> Callable[[int], float]:
+        breakdown: bool = False,
+        db: AreaDatabase = None) -> Callable[[int], float]:
+    db = area if db is None else db
+
     def cost(block_size: int) -> HbfpAreaCost:
         gen_int1 = SInt(width)
         gen_int2 = SInt(width * 2)
-        dot_product = area(Multiply(gen_int1)) * block_size + area(Add(gen_int2)) * (block_size - 1)
-        accumulator = area(Accumulator(gen_fp))
-        activation = area(RELU(gen_fp))
+        dot_product = db(Multiply(gen_int1)) * block_size + db(Add(gen_int2)) * (block_size - 1)
+        accumulator = db(Accumulator(gen_fp))
+        activation = db(RELU(gen_fp))
         # TODO properly consider fx to fp. Unfortunately, we do not have that module. Create an estimator.
         # TODO Same goes for fp to fx.
         fx_to_fp = 0
@@ -120,8 +151,31 @@ def cost_int(
         return cost
     return np.vectorize(lambda x: cost(x).total())
 
+
+# the sweeps of the figures, cached on disk until the area database or the
+# cost model changes; bump the version to drop them after other changes
+# (e.g., to an installed package)
+RESULTS_VERSION = "1"
+results = ResultCache(os.path.dirname(os.path.abspath(__file__)) + "/result_cache", [area], version=RESULTS_VERSION)
+
+
+@results
+def sweep_hbfp(gen_fxe: FixedPointWithExponent, gen_fp: FloatingPoint, block_sizes: np.ndarray) -> np.ndarray:
+    return cost_hbfp(gen_fxe, gen_fp)(block_sizes)
+
+
+@results
+def sweep_fpvec(gen_fp: FloatingPoint, block_sizes: np.ndarray) -> np.ndarray:
+    return cost_fpvec(gen_fp)(block_sizes)
+
+
+@results
+def sweep_int(width: int, gen_fp: FloatingPoint, block_sizes: np.ndarray) -> np.ndarray:
+    return cost_int(width, gen_fp)(block_sizes)
+
 def main():
     if False:
+        from matplotlib import pyplot as plt
         plt.figure()
         n = [2, 4, 6, 32]
 
@@ -148,54 +202,37 @@ def main():
         print(area(Add(SInt(16))))
         print(area(Multiply(SInt(8))))
 
-    def compare_against_fp(gen_fp: FloatingPoint, fp_name):
+    def compare_against_fp(gen_fp: FloatingPoint, fp_name) -> Figure:
         block_sizes = np.arange(1, 50)
-        fp_cost = cost_fpvec(gen_fp)(block_sizes)
-
-        plt.figure()
-
-        plt.title(f"{fp_name} vs. HBFP$n$ Area Comparison")
-        plt.xlabel("Block Size")
-        plt.ylabel("Area Ratio")
+        fp_cost = sweep_fpvec(gen_fp, block_sizes)
 
+        series = []
         for n in [8, 7, 6, 5, 4, 3, 2]:
-            hbfp_cost = cost_hbfp(FixedPointWithExponent(
-                10, n), FloatingPoint.bfloat16)(block_sizes)
-            plt.plot(block_sizes, fp_cost / hbfp_cost,
-                     label=f"{fp_name}/HBFP{n}")
+            hbfp_cost = sweep_hbfp(FixedPointWithExponent(
+                10, n), FloatingPoint.bfloat16, block_sizes)
+            series.append(Series(block_sizes, fp_cost / hbfp_cost,
+                                 label=f"{fp_name}/HBFP{n}"))
 
-        plt.grid()
-        plt.legend()
+        return Figure(
+            [f"{fp_name}_hbfp_comparison.png".lower(), f"{fp_name}_hbfp_comparison.svg".lower()],
+            [Axes(series, title=f"{fp_name} vs. HBFP$n$ Area Comparison",
+                  xlabel="Block Size", ylabel="Area Ratio", grid=True, legend={})])
 
-        plt.savefig(f"{fp_name}_hbfp_comparison.png".lower())
-        plt.savefig(f"{fp_name}_hbfp_comparison.svg".lower())
-
-    compare_against_fp(FloatingPoint.ieee_fp32, "FP32")
-    compare_against_fp(FloatingPoint.bfloat16, "bfloat16")
-
-    def hbfp_cost():
+    def hbfp_cost() -> Figure:
         block_sizes = np.arange(1, 50)
 
-        plt.figure()
-
-        plt.title("HBFP$n$ Area Cost")
-        plt.xlabel("Block Size")
-        plt.ylabel("Area Cost [$\mu m^2$]")
-
+        series = []
         for n in [8, 7, 6, 5, 4, 3, 2]:
-            hbfp_cost = cost_hbfp(FixedPointWithExponent(
-                10, n), FloatingPoint.bfloat16)(block_sizes)
-            plt.plot(block_sizes, hbfp_cost, label=f"HBFP{n}")
-
-        plt.grid()
-        plt.legend()
+            hbfp_cost = sweep_hbfp(FixedPointWithExponent(
+                10, n), FloatingPoint.bfloat16, block_sizes)
+            series.append(Series(block_sizes, hbfp_cost, label=f"HBFP{n}"))
 
-        plt.savefig(f"hbfp_cost.png")
-        plt.savefig(f"hbfp_cost.svg")
+        return Figure(
+            ["hbfp_cost.png", "hbfp_cost.svg"],
+            [Axes(series, title="HBFP$n$ Area Cost",
+                  xlabel="Block Size", ylabel="Area Cost [$\\mu m^2$]", grid=True, legend={})])
 
-    hbfp_cost()
-
-    def hbfp_cost_breakdown():
+    def hbfp_cost_breakdown() -> Figure:
         mantissa_widths = [2, 3, 4, 5, 6, 7, 8]
         block_size = 32
 
@@ -212,67 +249,58 @@ def main():
             for field in fields(HbfpAreaCost):
                 costs[field.name].append(getattr(breakdown, field.name))
 
-        plt.figure()
-
-        for field in fields(HbfpAreaCost):
-            plt.plot(mantissa_widths,
-                     costs[field.name], label=field.name, marker="o", linestyle="--")
-
-        plt.legend()
-
-        plt.title(f"HBFP$n$ Area Cost Breakdown\n(block size = {block_size})")
-
-        plt.xlabel("Mantissa Width ($n$)")
-        plt.ylabel("Area Cost [$\mu m^2$]")
+        series = [
+            Series(mantissa_widths, costs[field.name], label=field.name, style={"marker": "o", "linestyle": "--"})
+            for field in fields(HbfpAreaCost)
+        ]
 
-        plt.savefig("hbfp_cost_breakdown.png")
-        plt.savefig("hbfp_cost_breakdown.svg")
+        return Figure(
+            ["hbfp_cost_breakdown.png", "hbfp_cost_breakdown.svg"],
+            [Axes(series, title=f"HBFP$n$ Area Cost Breakdown\n(block size = {block_size})",
+                  xlabel="Mantissa Width ($n$)", ylabel="Area Cost [$\\mu m^2$]", legend={})])
 
-    hbfp_cost_breakdown()
+    render([
+        compare_against_fp(FloatingPoint.ieee_fp32, "FP32"),
+        compare_against_fp(FloatingPoint.bfloat16, "bfloat16"),
+        hbfp_cost(),
+        hbfp_cost_breakdown(),
+    ])
 
 def cs471_plots():
     # plt.style.use('seaborn-colorblind')
-    plt.rcParams.update({"axes.prop_cycle": "cycler('color', ['0e679f', 'd15c11', '258b2d', '2f2f3b', '7f52af'])"})
+    rc = {"axes.prop_cycle": "cycler('color', ['0e679f', 'd15c11', '258b2d', '2f2f3b', '7f52af'])"}
 
-    def do_plot_1(gen_fp: FloatingPoint = FloatingPoint.ieee_fp32, fp_name = "FP32"):
+    def do_plot_1(gen_fp: FloatingPoint = FloatingPoint.ieee_fp32, fp_name = "FP32") -> Figure:
         xtick_sqrts = [ 1, 4, 8, 16, 24, 32 ]
         block_sizes = np.arange(1, xtick_sqrts[-1] ** 2 * 1.05 )
         # hardware cost comparison
 
-        fp_cost = cost_fpvec(gen_fp)(block_sizes)
-
-        fig, ax = plt.subplots(1, 1, figsize = (6, 4))
-
-        # ax.set_title(f"{fp_name} vs. HBFP$n$ Area Comparison")
-        ax.set_xlabel("Block Size")
-        ax.set_ylabel("Hardware Cost (Area) Ratio")
+        fp_cost = sweep_fpvec(gen_fp, block_sizes)
 
+        series = []
         for n in [8, 6, 4]:
-            hbfp_cost = cost_hbfp(FixedPointWithExponent(
-                10, n), FloatingPoint.bfloat16)(block_sizes)
-            ax.plot(block_sizes ** (1 / 2), fp_cost / hbfp_cost,
-                    label=f"{fp_name}/HBFP${n}$")
-        
-        int8_cost = cost_int(8, FloatingPoint.bfloat16)(block_sizes)
-        ax.plot(block_sizes ** (1 / 2), fp_cost / int8_cost,
-                label=f"{fp_name}/INT$8$")
-        
-        int6_cost = cost_int(6, FloatingPoint.bfloat16)(block_sizes)
-        ax.plot(block_sizes ** (1 / 2), fp_cost / int6_cost,
-                label=f"{fp_name}/INT$6$")
+            hbfp_cost = sweep_hbfp(FixedPointWithExponent(
+                10, n), FloatingPoint.bfloat16, block_sizes)
+            series.append(Series(block_sizes ** (1 / 2), fp_cost / hbfp_cost,
+                                 label=f"{fp_name}/HBFP${n}$"))
         
-        ax.set_xticks(xtick_sqrts)
-        ax.set_xticklabels([ f"${a}\\times{a}$" for a in xtick_sqrts ])
+        int8_cost = sweep_int(8, FloatingPoint.bfloat16, block_sizes)
+        series.append(Series(block_sizes ** (1 / 2), fp_cost / int8_cost,
+                             label=f"{fp_name}/INT$8$"))
         
-        ax.grid()
-        ax.legend(loc="lower right")
-
-        plt.tight_layout()
-
-        plt.savefig(f"cs471_hwcost.png".lower())
-        plt.savefig(f"cs471_hwcost.pdf".lower())
+        int6_cost = sweep_int(6, FloatingPoint.bfloat16, block_sizes)
+        series.append(Series(block_sizes ** (1 / 2), fp_cost / int6_cost,
+                             label=f"{fp_name}/INT$6$"))
+
+        # title: f"{fp_name} vs. HBFP$n$ Area Comparison"
+        return Figure(
+            ["cs471_hwcost.png", "cs471_hwcost.pdf"],
+            [Axes(series, xlabel="Block Size", ylabel="Hardware Cost (Area) Ratio",
+                  xticks=xtick_sqrts, xticklabels=[ f"${a}\\times{a}$" for a in xtick_sqrts ],
+                  grid=True, legend={"loc": "lower right"})],
+            figsize=(6, 4), tight_layout=True, rc=rc)
     
-    def do_plot_2():
+    def do_plot_2() -> Figure:
         xtick_sqrts = [ 1, 4, 8 ]
         block_sizes = np.arange(1, xtick_sqrts[-1] ** 2 * 1.05 )
         # storage requirements comparison
@@ -303,32 +331,19 @@ def cs471_plots():
             ("INT8", storage_int_(8))
         ]
 
-        fig, ax = plt.subplots(1, 1, figsize = (6, 4))
-
-        # ax.set_yscale("log")
-
-        # ax.set_title(f"FP32 vs. HBFP$n$ vs. INT$n$ Area Comparison")
-        ax.set_xlabel("Block Size")
-        ax.set_ylabel("Storage Requirement [bits]")
-
-        for x in draw_list:
-            lbl, f = x
-            ax.plot(block_sizes ** (1 / 2), f(block_sizes), label=lbl)
-        
-        ax.set_xticks(xtick_sqrts)
-        ax.set_xticklabels([ f"${a}\\times{a}$" for a in xtick_sqrts ])
-        
-        ax.grid()
-        ax.legend(loc="lower right")
-
-        plt.tight_layout()
+        # yscale: log
+        # title: f"FP32 vs. HBFP$n$ vs. INT$n$ Area Comparison"
+        series = [Series(block_sizes ** (1 / 2), f(block_sizes), label=lbl) for lbl, f in draw_list]
 
-        plt.savefig(f"cs471_storage.png".lower())
-        plt.savefig(f"cs471_storage.pdf".lower())
+        return Figure(
+            ["cs471_storage.png", "cs471_storage.pdf"],
+            [Axes(series, xlabel="Block Size", ylabel="Storage Requirement [bits]",
+                  xticks=xtick_sqrts, xticklabels=[ f"${a}\\times{a}$" for a in xtick_sqrts ],
+                  grid=True, legend={"loc": "lower right"})],
+            figsize=(6, 4), tight_layout=True, rc=rc)
 
 
-    do_plot_1()
-    do_plot_2()
+    render([do_plot_1(), do_plot_2()])
 
 if __name__ == "__main__":
     # main()
@@ -2,12 +2,13 @@ from dataclasses import dataclass
 import re
 from typing import Type
 from data_types import *
-from common import from_string
+from common import from_string, to_string
 
 _regex_mult = re.compile(r"^op_(?P<gen>[^_]+)_mult$")
 _regex_add = re.compile(r"^op_(?P<gen>[^_]+)_add$")
 _regex_act = re.compile(r"^op_(?P<gen>[^_]+)_act$")
-_regex_dot = re.compile(r"^op_(?P<gen>[^_]+)_dot$")
+_regex_dot = re.compile(
+    r"^op_(?P<gen_vec>[^_]+)(?:_(?P<gen_accum>[^_]+))?_dot$")
 _regex_fxe2fp = re.compile(r"^fxe2fp_(?P<gen_fxe>[^_]+)_(?P<gen_fp>[^_]+)$")
 _regex_fp2bfp = re.compile(r"^fp2bfp_(?P<gen_fp>[^_]+)_(?P<gen_bfp>[^_]+)$")
 _regex_accum = re.compile(r"^accum_(?P<gen_fp>[^_]+)$")
@@ -25,6 +26,13 @@ class Module:
                 continue
         raise ValueError("unrecognized module!")
 
+    def design_name(self) -> str:
+        """
+        Returns the name of the top-level Verilog design, which is also the
+        name of the report directory under `RPT/`.
+        """
+        return type(self).__name__
+
 
 def register_module(t: Type) -> Type:
     _registered_modules.append(t)
@@ -33,6 +41,7 @@ def register_module(t: Type) -> Type:
 
 @register_module
 @from_string(_regex_mult)
+@to_string("op_{gen}_mult")
 @dataclass(frozen=True)
 class Multiply(Module):
     gen: Data
@@ -40,6 +49,7 @@ class Multiply(Module):
 
 @register_module
 @from_string(_regex_add)
+@to_string("op_{gen}_add")
 @dataclass(frozen=True)
 class Add(Module):
     gen: Data
@@ -47,6 +57,7 @@ class Add(Module):
 
 @register_module
 @from_string(_regex_act)
+@to_string("op_{gen}_act")
 @dataclass(frozen=True)
 class RELU(Module):
     gen: Data
@@ -54,6 +65,7 @@ class RELU(Module):
 
 @register_module
 @from_string(_regex_dot)
+@to_string("op_{gen_vec}[_{gen_accum}]_dot")
 @dataclass(frozen=True)
 class DotProduct(Module):
     gen_vec: Data
@@ -62,6 +74,7 @@ class DotProduct(Module):
 
 @register_module
 @from_string(_regex_fxe2fp)
+@to_string("fxe2fp_{gen_fxe}_{gen_fp}")
 @dataclass(frozen=True)
 class FixedPointWithExponentToFloatingPoint(Module):
     gen_fxe: FixedPointWithExponent
@@ -70,6 +83,7 @@ class FixedPointWithExponentToFloatingPoint(Module):
 
 @register_module
 @from_string(_regex_fp2bfp)
+@to_string("fp2bfp_{gen_fp}_{gen_bfp}")
 @dataclass(frozen=True)
 class FloatingPointToBlockFloatingPoint(Module):
     gen_fp: FloatingPoint
@@ -78,6 +92,7 @@ class FloatingPointToBlockFloatingPoint(Module):
 
 @register_module
 @from_string(_regex_accum)
+@to_string("accum_{gen_fp}")
 @dataclass(frozen=True)
 class Accumulator(Module):
     gen_fp: FloatingPoint
@@ -0,0 +1,43 @@
+from typing import TextIO
+from analyze_reports import read_power_data
+from area_db import AreaDatabase
+from modules import Module
+
+# syn.tcl constrains every design with a 20 ns clock
+SYNTHESIS_CLOCK_FREQUENCY = 50e6
+# report_power prints the hierarchy in mW
+POWER_UNIT = 1e-3
+
+
+class PowerDatabase(AreaDatabase):
+    """
+    Maps modules to a power figure of their `power.log` report (in mW, at the
+    synthesis clock), with the same caching, journaling and on-miss handlers
+    as the area database. The area handlers only compose costs, so they
+    estimate power as well when registered on a `PowerDatabase`.
+
+    `metric` is `"total_power"`, `"dynamic_power"` (switching and internal)
+    or `"leak_power"`; every metric is cached in its own file.
+    """
+
+    REPORT = "power.log"
+
+    def __init__(self, dirpath: str = None, metric: str = "total_power", **kwargs) -> None:
+        assert(metric in ["total_power", "dynamic_power", "leak_power"])
+        self.metric = metric
+        self.CACHE_NAME = f"power_{metric}"
+        super().__init__(dirpath, **kwargs)
+
+    def read_report(self, f: TextIO, m: Module) -> float:
+        power = read_power_data(f)[m.design_name()]
+        if self.metric == "dynamic_power":
+            return power["switch_power"] + power["int_power"]
+        return power[self.metric]
+
+
+def power_at(dynamic_power: float, leak_power: float, clock_frequency: float) -> float:
+    """
+    Returns the power in W at the given clock frequency, the dynamic part
+    scaling linearly with it.
+    """
+    return (dynamic_power * clock_frequency / SYNTHESIS_CLOCK_FREQUENCY + leak_power) * POWER_UNIT
@@ -0,0 +1,108 @@
+"""
+Renders figures from their data. The scripts compute a `Figure` (the plotted
+arrays and the labels) and `render()` draws the figures in a pool of worker
+processes, so drawing is bounded by the core count. The saved figures are
+drawn on an Agg canvas without pyplot: they need no display and leave the
+pyplot backend of the caller alone.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import os
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+
+@dataclass
+class Series:
+    x: np.ndarray
+    y: np.ndarray
+    label: Optional[str] = None
+    # keyword arguments of `plot()`, e.g. color, marker or linestyle
+    style: Dict[str, object] = field(default_factory=dict)
+
+
+@dataclass
+class Axes:
+    series: List[Series] = field(default_factory=list)
+    title: str = ""
+    xlabel: str = ""
+    ylabel: str = ""
+    xlim: Optional[Tuple[float, float]] = None
+    ylim: Optional[Tuple[float, float]] = None
+    xticks: Optional[List[float]] = None
+    xticklabels: Optional[List[str]] = None
+    grid: bool = False
+    # keyword arguments of `legend()`, None for no legend
+    legend: Optional[Dict[str, object]] = None
+
+
+@dataclass
+class Figure:
+    """
+    A figure of subplots stacked vertically, saved to every path.
+    """
+    paths: List[str]
+    axes: List[Axes]
+    figsize: Optional[Tuple[float, float]] = None
+    tight_layout: bool = False
+    # matplotlib rcParams for this figure
+    rc: Dict[str, object] = field(default_factory=dict)
+
+
+def draw(figure: Figure, close: bool = True) -> List[str]:
+    """
+    Draws and saves a figure, returns its paths. With `close=False`, the
+    figure stays open for `plt.show()`.
+    """
+    import matplotlib
+
+    with matplotlib.rc_context(figure.rc):
+        if close:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure as MplFigure
+
+            fig = MplFigure(figsize=figure.figsize)
+            FigureCanvasAgg(fig)
+        else:
+            import matplotlib.pyplot as plt
+
+            fig = plt.figure(figsize=figure.figsize)
+        for i, spec in enumerate(figure.axes):
+            ax = fig.add_subplot(len(figure.axes), 1, i + 1)
+            for s in spec.series:
+                ax.plot(s.x, s.y, label=s.label, **s.style)
+            ax.set_title(spec.title)
+            ax.set_xlabel(spec.xlabel)
+            ax.set_ylabel(spec.ylabel)
+            if spec.xlim is not None:
+                ax.set_xlim(spec.xlim)
+            if spec.ylim is not None:
+                ax.set_ylim(spec.ylim)
+            if spec.xticks is not None:
+                ax.set_xticks(spec.xticks)
+            if spec.xticklabels is not None:
+                ax.set_xticklabels(spec.xticklabels)
+            if spec.grid:
+                ax.grid()
+            if spec.legend is not None:
+                ax.legend(**spec.legend)
+        if figure.tight_layout:
+            fig.tight_layout()
+        for path in figure.paths:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            fig.savefig(path)
+    return figure.paths
+
+
+def render(figures: List[Figure], processes: Optional[int] = None) -> List[str]:
+    """
+    Draws the figures, `processes` at a time (the core count by default, 1
+    draws them in this process). Returns the written paths.
+    """
+    if processes == 1 or len(figures) <= 1:
+        return [path for figure in figures for path in draw(figure)]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return [path for paths in pool.map(draw, figures) for path in paths]
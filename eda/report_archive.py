@@ -0,0 +1,103 @@
+"""
+Ingests archived synthesis results: `.tar` (optionally compressed) and
+`.zip` bundles of `output/<module>/RPT/<design>/<report>` trees. The members
+are read in a stream and parsed straight from the archive, nothing is
+extracted to disk. Several bundles merge into the same databases, a later
+bundle overriding the reports of an earlier one.
+"""
+
+import io
+import sys
+import tarfile
+import zipfile
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+from modules import Module
+
+
+def iter_members(fpath: str) -> Iterator[Tuple[str, BinaryIO]]:
+    """
+    Yields the name and a stream of every regular file in the archive, in
+    archive order. A stream is valid until the next member is yielded.
+    """
+    if zipfile.is_zipfile(fpath):
+        with zipfile.ZipFile(fpath) as z:
+            for info in z.infolist():
+                if not info.is_dir():
+                    with z.open(info) as f:
+                        yield info.filename, f
+        return
+    # "r|*" reads the tar sequentially, with any compression, without seeking
+    with tarfile.open(fpath, mode="r|*") as tar:
+        for member in tar:
+            if member.isfile():
+                yield member.name, tar.extractfile(member)
+
+
+def report_member(name: str) -> Optional[Tuple[Module, str]]:
+    """
+    Returns the module and the report file name of a `<module>/RPT/<design>/<report>`
+    member, or None for other members.
+    """
+    parts = name.strip("/").split("/")
+    if len(parts) < 4 or parts[-3] != "RPT":
+        return None
+    try:
+        m = Module.from_string(parts[-4])
+    except ValueError:
+        print(f"Skipping unrecognized directory: {parts[-4]}")
+        return None
+    if parts[-2] != m.design_name():
+        return None
+    return (m, parts[-1])
+
+
+def ingest(fpaths: List[str], dbs: list) -> int:
+    """
+    Parses the reports of the bundles into the databases whose `REPORT` they
+    are, in one pass over every bundle. Returns the number of reports read.
+    """
+    count = 0
+    for fpath in fpaths:
+        print(f"Reading {fpath}")
+        for name, stream in iter_members(fpath):
+            member = report_member(name)
+            if member is None:
+                continue
+            m, report = member
+            readers = [db for db in dbs if db.REPORT == report]
+            if len(readers) == 0:
+                continue
+            # one report at a time in memory, shared by the readers (e.g., the
+            # power metrics); the tar streams cannot be wrapped in a TextIOWrapper
+            text = stream.read().decode("utf-8")
+            for db in readers:
+                db.ingest_report(m, io.StringIO(text))
+            count = count + 1
+    return count
+
+
+def main() -> None:
+    import os
+    from area_db import AreaDatabase
+    from power_db import PowerDatabase
+    from timing_db import TimingDatabase
+
+    if len(sys.argv) < 2:
+        print(f"usage: {sys.argv[0]} <bundle>... (merged into the eda/output databases)")
+        sys.exit(1)
+    DATA_DIR = os.path.dirname(os.path.abspath(__file__)) + "/output"
+    os.makedirs(DATA_DIR, exist_ok=True)
+    dbs = [
+        AreaDatabase(DATA_DIR),
+        *(PowerDatabase(DATA_DIR, metric) for metric in ["total_power", "dynamic_power", "leak_power"]),
+        TimingDatabase(DATA_DIR),
+    ]
+    count = ingest(sys.argv[1:], dbs)
+    for db in dbs:
+        db.save()
+        db.close()
+    print(f"Ingested {count} reports")
+
+
+if __name__ == "__main__":
+    main()
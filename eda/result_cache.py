@@ -0,0 +1,265 @@
+"""
+An on-disk cache of sweep results, addressed by their content: the key of a
+call hashes the decorated function, its arguments and the fingerprint of the
+databases it reads (the measured entries, the on-miss handlers and the
+coefficients of the fitted estimators). The function is hashed with the code
+of the functions and classes it reaches through its globals and closures
+(e.g., `cost_hbfp()` and the area cost classes) and the source files of their
+modules; the handlers are hashed with the code and the source file of their
+class. A new synthesis result, a refitted estimator or an edit of the model
+changes the keys.
+
+The call path is followed through the global names and the closures only:
+code reached otherwise (e.g., a function stored in an attribute) and the
+installed packages are not hashed. Bump the `version` of the cache, or
+`clear()` it, after changing such code.
+
+The results are arrays, or tuples and dictionaries of arrays, stored as one
+NPZ per call. Once the cache grows beyond `max_bytes`, the least recently
+used results are evicted.
+"""
+
+import dataclasses
+import functools
+import hashlib
+import inspect
+import os
+import sys
+import sysconfig
+import types
+from typing import Callable, Dict, List, Set
+import weakref
+import numpy as np
+from area_db import AreaDatabase
+
+
+def _hash_code(h, code) -> None:
+    h.update(code.co_code)
+    h.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        # nested functions: their repr has an address, hash the code instead
+        if hasattr(const, "co_code"):
+            _hash_code(h, const)
+        else:
+            h.update(repr(const).encode())
+
+
+# the installed packages and the standard library, their code is not followed
+_INSTALLED = tuple(os.path.abspath(p) + os.sep for p in {
+    sysconfig.get_paths()[name] for name in ["stdlib", "platstdlib", "purelib", "platlib"]})
+
+
+def _is_local(x) -> bool:
+    module = sys.modules.get(getattr(x, "__module__", None), None)
+    fpath = getattr(module, "__file__", None)
+    return fpath is not None and not os.path.abspath(fpath).startswith(_INSTALLED)
+
+
+def _hash_object(h, x, seen: Set[object], modules: Set[str]) -> None:
+    # a function or a class: its code (the methods of a class) and,
+    # recursively, the local functions and classes it refers to
+    seen.add(x)
+    modules.add(x.__module__)
+    h.update(f"{x.__module__}.{x.__qualname__}".encode())
+    if isinstance(x, types.FunctionType):
+        functions = [x]
+    else:
+        functions = []
+        for _, attr in sorted(vars(x).items()):
+            # static and class methods, properties
+            attr = getattr(attr, "__func__", getattr(attr, "fget", attr))
+            if isinstance(attr, types.FunctionType):
+                functions.append(attr)
+    for f in functions:
+        _hash_code(h, f.__code__)
+        _hash_callees(h, f.__code__, f.__globals__, seen, modules)
+        # the functions and classes of the enclosing scopes
+        for cell in f.__closure__ or ():
+            try:
+                y = cell.cell_contents
+            except ValueError:
+                continue
+            if isinstance(y, (types.FunctionType, type)) and y not in seen and _is_local(y):
+                _hash_object(h, y, seen, modules)
+        # e.g., a function decorated by a `ResultCache`
+        wrapped = getattr(f, "__wrapped__", None)
+        if isinstance(wrapped, types.FunctionType) and wrapped not in seen:
+            _hash_object(h, wrapped, seen, modules)
+
+
+def _hash_callees(h, code, namespace: dict, seen: Set[object], modules: Set[str]) -> None:
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            _hash_callees(h, const, namespace, seen, modules)
+    for name in code.co_names:
+        x = namespace.get(name, None)
+        if isinstance(x, (types.FunctionType, type)) and x not in seen and _is_local(x):
+            _hash_object(h, x, seen, modules)
+
+
+def hash_code_path(h, x) -> None:
+    """
+    Hashes a function or a class with the functions and classes it reaches
+    through its globals and closures and the source files of their modules.
+    """
+    modules: Set[str] = set()
+    _hash_object(h, x, set(), modules)
+    for name in sorted(modules):
+        try:
+            fpath = inspect.getsourcefile(sys.modules[name])
+        except (KeyError, TypeError):
+            continue
+        if fpath is not None and os.path.exists(fpath):
+            with open(fpath, "rb") as f:
+                h.update(hashlib.sha256(f.read()).digest())
+
+
+def _hash_value(h, x) -> None:
+    if isinstance(x, np.ndarray):
+        h.update(f"ndarray{x.dtype.str}{x.shape}".encode())
+        h.update(np.ascontiguousarray(x).tobytes())
+    elif isinstance(x, (list, tuple)):
+        h.update(f"{type(x).__name__}{len(x)}".encode())
+        for y in x:
+            _hash_value(h, y)
+    elif isinstance(x, dict):
+        h.update(f"dict{len(x)}".encode())
+        for k in sorted(x, key=repr):
+            _hash_value(h, k)
+            _hash_value(h, x[k])
+    elif dataclasses.is_dataclass(x):
+        # the data types and modules: their type and fields
+        h.update(type(x).__qualname__.encode())
+        _hash_value(h, [getattr(x, f.name) for f in dataclasses.fields(x)])
+    else:
+        h.update(f"{type(x).__qualname__}:{x!r}".encode())
+
+
+_fingerprints: "weakref.WeakKeyDictionary[AreaDatabase, str]" = weakref.WeakKeyDictionary()
+_listening: "weakref.WeakSet[AreaDatabase]" = weakref.WeakSet()
+
+
+def fingerprint(db: AreaDatabase) -> str:
+    """
+    Returns a hash of the measured entries of the database, its on-miss
+    handlers (their code) and the coefficients of the ones exporting them.
+    It is computed once per database and again after an `add()`.
+    """
+    if db not in _fingerprints:
+        h = hashlib.sha256()
+        for name, value in sorted((m.to_string(), value) for m, value in db.measured().items()):
+            h.update(name.encode())
+            h.update(np.float64(value).tobytes())
+        for handler in db.on_miss_handlers():
+            hash_code_path(h, handler if isinstance(handler, types.FunctionType) else type(handler))
+            if hasattr(handler, "export_coefficients"):
+                _, polynomials = handler.export_coefficients()
+                _hash_value(h, {k: np.asarray(c, dtype=np.float64) for k, c in polynomials.items()})
+        if db not in _listening:
+            db.add_on_update(lambda changed: _fingerprints.pop(db, None))
+            _listening.add(db)
+        _fingerprints[db] = h.hexdigest()
+    return _fingerprints[db]
+
+
+def _to_arrays(result) -> Dict[str, np.ndarray]:
+    if isinstance(result, tuple):
+        arrays = {"kind": np.array("tuple"), **{f"item_{i}": np.asarray(x) for i, x in enumerate(result)}}
+    elif isinstance(result, dict):
+        arrays = {"kind": np.array("dict"), **{f"key_{k}": np.asarray(x) for k, x in result.items()}}
+    else:
+        arrays = {"kind": np.array("array"), "value": np.asarray(result)}
+    for name, a in arrays.items():
+        if a.dtype == object:
+            raise TypeError(f"Cannot cache {name} of the result, it is not a numeric or string array")
+    return arrays
+
+
+def _from_arrays(f) -> object:
+    kind = str(f["kind"])
+    if kind == "tuple":
+        return tuple(f[f"item_{i}"] for i in range(len(f.files) - 1))
+    if kind == "dict":
+        return {name[4:]: f[name] for name in f.files if name != "kind"}
+    return f["value"]
+
+
+class ResultCache:
+    """
+    Decorates sweep functions: `@cache` looks the results up in `dirpath`
+    before calling the function. A new `version` drops the results cached
+    before it.
+    """
+
+    def __init__(self, dirpath: str, dbs: List[AreaDatabase] = [], max_bytes: int = 1 << 30,
+                 version: str = "") -> None:
+        self._dirpath = dirpath
+        self._dbs = dbs
+        self._max_bytes = max_bytes
+        self._version = version
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, fn: Callable, args: tuple, kwargs: dict) -> str:
+        h = hashlib.sha256()
+        h.update(self._version.encode())
+        hash_code_path(h, fn)
+        _hash_value(h, list(args))
+        _hash_value(h, kwargs)
+        for db in self._dbs:
+            h.update(fingerprint(db).encode())
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return f"{self._dirpath}/{key}.npz"
+
+    def __call__(self, fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def cached(*args, **kwargs):
+            fpath = self._path(self.key(fn, args, kwargs))
+            if os.path.exists(fpath):
+                try:
+                    with np.load(fpath) as f:
+                        result = _from_arrays(f)
+                    # the access time is unreliable (noatime mounts), keep the use in the mtime
+                    os.utime(fpath)
+                    self.hits = self.hits + 1
+                    return result
+                except (OSError, ValueError, KeyError):
+                    # evicted or truncated meanwhile, compute it again
+                    pass
+            self.misses = self.misses + 1
+            result = fn(*args, **kwargs)
+            self._store(fpath, result)
+            return result
+        return cached
+
+    def _store(self, fpath: str, result) -> None:
+        os.makedirs(self._dirpath, exist_ok=True)
+        with open(f"{fpath}.tmp", "wb") as f:
+            np.savez(f, **_to_arrays(result))
+        os.replace(f"{fpath}.tmp", fpath)
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used results until the cache fits in
+        `max_bytes`.
+        """
+        entries = []
+        for entry in os.scandir(self._dirpath):
+            if entry.name.endswith(".npz"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, fpath in sorted(entries):
+            if total <= self._max_bytes:
+                break
+            os.remove(fpath)
+            total = total - size
+
+    def clear(self) -> None:
+        if os.path.isdir(self._dirpath):
+            for entry in os.scandir(self._dirpath):
+                if entry.name.endswith(".npz"):
+                    os.remove(entry.path)
@@ -0,0 +1,164 @@
+"""
+Orders the synthesis jobs longest-predicted-first.
+
+`syn.tcl` prints the `compile_ultra` runtime to the `dc_shell.log` of every
+design. A `RuntimeModel` fits these runtimes as a power law of the data bits
+of the module, one per module kind (a multiplier grows about quadratically
+with its width, an adder about linearly), and predicts the jobs of a batch.
+`xargs --max-procs` starts the jobs in input order whenever a process is
+free, so feeding it the longest jobs first keeps a large multiplier from
+starting last and stretching the whole batch.
+"""
+
+import contextlib
+import dataclasses
+import heapq
+import os
+import shlex
+import sys
+from typing import Callable, Dict, List, Tuple, Union
+import numpy as np
+from analyze_reports import read_synthesis_duration
+from data_types import Data
+from modules import Module
+from synthesis_index import SynthesisIndex
+
+# the prediction without any measured runtime, seconds
+DEFAULT_DURATION = 600.0
+
+
+def module_bits(m: Module) -> int:
+    """
+    Returns the total width of the data types of the module.
+    """
+    widths = [getattr(m, f.name) for f in dataclasses.fields(m)]
+    return max(sum(gen.bits() for gen in widths if isinstance(gen, Data)), 1)
+
+
+def read_durations(index: SynthesisIndex) -> Dict[Module, float]:
+    """
+    Returns the synthesis runtime, in seconds, of every synthesized module
+    whose `dc_shell.log` has one.
+    """
+    durations: Dict[Module, float] = {}
+    for m in index.modules():
+        fpath = f"{index.directory(m)}/dc_shell.log"
+        if not os.path.exists(fpath):
+            continue
+        with open(fpath) as f:
+            duration = read_synthesis_duration(f)
+        if duration is not None:
+            durations[m] = duration
+    return durations
+
+
+def _fit(bits: np.ndarray, seconds: np.ndarray) -> np.ndarray:
+    # log(seconds) = slope * log(bits) + intercept, the runtime does not
+    # shrink with the width
+    x, y = np.log(bits), np.log(seconds)
+    if len(np.unique(x)) >= 2:
+        slope, intercept = np.polyfit(x, y, 1)
+        if slope >= 0:
+            return np.array([slope, intercept])
+    return np.array([0.0, np.mean(y)])
+
+
+class RuntimeModel:
+    def __init__(self, durations: Dict[Module, float], default: float = DEFAULT_DURATION) -> None:
+        self._fits: Dict[str, np.ndarray] = {}
+        points: Dict[str, List[Tuple[int, float]]] = {}
+        for m, seconds in durations.items():
+            # a run under a second is printed as 0 sec
+            points.setdefault(type(m).__name__, []).append((module_bits(m), max(seconds, 1.0)))
+        for kind, xy in points.items():
+            bits, seconds = np.array(xy, dtype=np.float64).T
+            self._fits[kind] = _fit(bits, seconds)
+        # unseen kinds: all the runtimes together
+        everything = [p for xy in points.values() for p in xy]
+        self._overall: Union[np.ndarray, None] = None
+        self._median = default
+        if len(everything) > 0:
+            bits, seconds = np.array(everything, dtype=np.float64).T
+            self._overall = _fit(bits, seconds)
+            self._median = float(np.median(seconds))
+
+    def __call__(self, m: Union[Module, None]) -> float:
+        """
+        Returns the predicted runtime of the module in seconds; None stands
+        for a directory that is not a module.
+        """
+        if m is None or self._overall is None:
+            return self._median
+        slope, intercept = self._fits.get(type(m).__name__, self._overall)
+        return float(np.exp(intercept + slope * np.log(module_bits(m))))
+
+
+def job_module(command: str) -> Union[Module, None]:
+    """
+    Returns the module of a `synthesize.bash` invocation, None if its
+    directory is not a module.
+    """
+    args = shlex.split(command)
+    if len(args) < 3:
+        return None
+    try:
+        return Module.from_string(args[2])
+    except ValueError:
+        return None
+
+
+def longest_first(commands: List[str], predict: Callable[[Union[Module, None]], float]) -> List[Tuple[str, float]]:
+    """
+    Returns the commands with their predicted runtimes, longest first. The
+    sort is stable: the commands of equal runtime keep their order.
+    """
+    jobs = [(command, predict(job_module(command))) for command in commands]
+    return sorted(jobs, key=lambda job: -job[1])
+
+
+def makespan(durations: List[float], processes: int) -> float:
+    """
+    Returns the wall-clock time of the jobs started in the given order, each
+    on the first free of the processes.
+    """
+    free = [0.0] * processes
+    for duration in durations:
+        heapq.heappush(free, heapq.heappop(free) + duration)
+    return max(free)
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}h {seconds // 60 % 60:02d}m {seconds % 60:02d}s"
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Reorders synthesize.bash invocations (one per line on stdin) longest-predicted-first.")
+    parser.add_argument("--processes", type=int, default=16, help="the parallel synthesis jobs")
+    parser.add_argument(
+        "--output", default=os.path.dirname(os.path.abspath(__file__)) + "/output",
+        help="the output tree with the dc_shell.log of the past runs")
+    args = parser.parse_args()
+
+    commands = [line.strip() for line in sys.stdin if line.strip()]
+    # stdout is piped to xargs, the index reports skipped directories on stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        durations = read_durations(SynthesisIndex(args.output))
+    model = RuntimeModel(durations)
+    jobs = longest_first(commands, model)
+
+    # the plan on stderr, the commands on stdout
+    listed = makespan([model(job_module(command)) for command in commands], args.processes)
+    planned = makespan([duration for _, duration in jobs], args.processes)
+    print(f"{len(jobs)} jobs on {args.processes} processes, model fitted on {len(durations)} runs", file=sys.stderr)
+    print(f"Predicted wall-clock time: {_format_duration(planned)} "
+          f"(listing order: {_format_duration(listed)})", file=sys.stderr)
+    for command, _ in jobs:
+        print(command)
+
+
+if __name__ == "__main__":
+    main()
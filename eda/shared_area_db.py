@@ -0,0 +1,235 @@
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from area_db import AreaDatabase
+from modules import Module
+import importlib
+import numpy as np
+
+_MAGIC = 0x48424650_41524541  # "HBFPAREA"
+_VERSION = 2
+_HEADER_LEN = 10
+
+# maps a module to (coefficient key, polynomial argument)
+KeyFunction = Callable[[Module], Union[Tuple[str, int], None]]
+
+
+def _key_function_name(f: KeyFunction) -> bytes:
+    return f"{f.__module__}:{f.__qualname__}".encode()
+
+
+def _resolve_key_function(name: bytes) -> KeyFunction:
+    module_name, qualname = name.decode().split(":")
+    f = importlib.import_module(module_name)
+    for attr in qualname.split("."):
+        f = getattr(f, attr)
+    return f
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _layout(
+        n_entries: int,
+        key_len: int,
+        n_coeffs: int,
+        coeff_key_len: int,
+        n_terms: int,
+        n_key_fns: int,
+        key_fn_len: int) -> Dict[str, Tuple[int, int]]:
+    """
+    Returns the (offset, size) of every array in the segment.
+    """
+    sizes = [
+        ("header", _HEADER_LEN * 8),
+        ("key_fns", n_key_fns * key_fn_len),
+        ("keys", n_entries * key_len),
+        ("values", n_entries * 8),
+        ("coeff_keys", n_coeffs * coeff_key_len),
+        ("coeffs", n_coeffs * n_terms * 8)
+    ]
+    layout = {}
+    offset = 0
+    for name, size in sizes:
+        layout[name] = (offset, size)
+        offset = _align(offset + size)
+    layout["total"] = (0, max(offset, 8))
+    return layout
+
+
+class SharedAreaSnapshot:
+    """
+    A read-only snapshot of an area database, together with the coefficients
+    of its fitted estimators, placed in a shared memory segment. Worker
+    processes attach to the segment by name and query it without copying.
+
+    Estimators export their coefficients with `export_coefficients()`, which
+    returns a key function and the polynomials by key. The key function maps a
+    module to its polynomial key and argument, it is stored by its qualified
+    name and imported again in the attaching process.
+
+    Attach only from processes started by the exporting process (e.g., a
+    `multiprocessing.Pool`). They share the resource tracker of the exporter,
+    which unlinks the segment if the exporter dies without calling `unlink()`.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool) -> None:
+        self._shm = shm
+        self._owner = owner
+
+        header = np.ndarray((_HEADER_LEN,), dtype=np.int64, buffer=shm.buf)
+        if header[0] != _MAGIC or header[1] != _VERSION:
+            raise ValueError(f"{shm.name} is not an area database snapshot")
+        dims = [int(x) for x in header[2:9]]
+        n_entries, key_len, n_coeffs, coeff_key_len, n_terms, n_key_fns, key_fn_len = dims
+        layout = _layout(*dims)
+
+        def view(name: str, dtype, shape) -> np.ndarray:
+            offset, _ = layout[name]
+            a = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            a.flags.writeable = False
+            return a
+
+        self._keys = view("keys", f"S{key_len}", (n_entries,))
+        self._values = view("values", np.float64, (n_entries,))
+        self._coeff_keys = view("coeff_keys", f"S{coeff_key_len}", (n_coeffs,))
+        self._coeffs = view("coeffs", np.float64, (n_coeffs, n_terms))
+        self._key_fns = [
+            _resolve_key_function(name)
+            for name in view("key_fns", f"S{key_fn_len}", (n_key_fns,))
+        ]
+
+    @staticmethod
+    def export(area_db: AreaDatabase, name: Optional[str] = None) -> "SharedAreaSnapshot":
+        """
+        Copies the entries of the database and the coefficients of its
+        estimators into a new shared memory segment.
+        """
+        entries = sorted((m.to_string().encode(), area) for m, area in area_db.data().items())
+        coeffs: Dict[bytes, np.ndarray] = {}
+        key_fns: List[bytes] = []
+        for handler in area_db.on_miss_handlers():
+            if hasattr(handler, "export_coefficients"):
+                key_fn, polynomials = handler.export_coefficients()
+                if _key_function_name(key_fn) not in key_fns:
+                    key_fns.append(_key_function_name(key_fn))
+                for key, c in polynomials.items():
+                    coeffs[key.encode()] = np.asarray(c, dtype=np.float64)
+        coeffs = sorted(coeffs.items())
+
+        dims = [
+            len(entries),
+            max([len(k) for k, _ in entries], default=1),
+            len(coeffs),
+            max([len(k) for k, _ in coeffs], default=1),
+            max([len(c) for _, c in coeffs], default=1),
+            len(key_fns),
+            max([len(k) for k in key_fns], default=1)
+        ]
+        _, key_len, _, coeff_key_len, n_terms, _, key_fn_len = dims
+        layout = _layout(*dims)
+
+        shm = shared_memory.SharedMemory(name=name, create=True, size=layout["total"][1])
+        header = np.ndarray((_HEADER_LEN,), dtype=np.int64, buffer=shm.buf)
+        header[:] = [_MAGIC, _VERSION] + dims + [0]
+
+        def fill(name: str, dtype, values: List) -> None:
+            offset, _ = layout[name]
+            a = np.ndarray((len(values),), dtype=dtype, buffer=shm.buf, offset=offset)
+            a[:] = values
+
+        fill("key_fns", f"S{key_fn_len}", key_fns)
+        fill("keys", f"S{key_len}", [k for k, _ in entries])
+        fill("values", np.float64, [v for _, v in entries])
+        fill("coeff_keys", f"S{coeff_key_len}", [k for k, _ in coeffs])
+        offset, _ = layout["coeffs"]
+        a = np.ndarray((len(coeffs), n_terms), dtype=np.float64, buffer=shm.buf, offset=offset)
+        for i, (_, c) in enumerate(coeffs):
+            # pad with leading zeros, so that every row evaluates with np.polyval
+            a[i, :n_terms - len(c)] = 0
+            a[i, n_terms - len(c):] = c
+
+        return SharedAreaSnapshot(shm, owner=True)
+
+    @staticmethod
+    def attach(name: str) -> "SharedAreaSnapshot":
+        """
+        Attaches to a snapshot exported by another process.
+        """
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # before Python 3.13 attaching registers the segment again, which
+            # is a no-op in the resource tracker shared with the exporter
+            shm = shared_memory.SharedMemory(name=name)
+        return SharedAreaSnapshot(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def _find(self, keys: np.ndarray, key: bytes) -> Union[int, None]:
+        i = int(np.searchsorted(keys, key))
+        if i < keys.shape[0] and keys[i] == key:
+            return i
+        return None
+
+    def lookup(self, m: Module) -> Union[float, None]:
+        """
+        Returns the stored area of the module, or None.
+        """
+        i = self._find(self._keys, m.to_string().encode())
+        return None if i is None else float(self._values[i])
+
+    def estimate(self, m: Module) -> Union[float, None]:
+        """
+        Evaluates the exported estimator polynomial for the module, or returns
+        None if no estimator covers it.
+        """
+        for key_fn in self._key_fns:
+            r = key_fn(m)
+            if r is None:
+                continue
+            key, x = r
+            i = self._find(self._coeff_keys, key.encode())
+            if i is not None:
+                return float(np.polyval(self._coeffs[i], x))
+        return None
+
+    def database(self) -> "SharedAreaDatabase":
+        """
+        Returns an area database backed by this snapshot.
+        """
+        return SharedAreaDatabase(self)
+
+    def close(self) -> None:
+        # drop the views before releasing the buffer
+        self._keys = self._values = self._coeff_keys = self._coeffs = None
+        self._key_fns = []
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """
+        Destroys the segment, only the exporting process should call this.
+        """
+        assert(self._owner and "only the exporting process owns the segment")
+        self._shm.unlink()
+
+
+class SharedAreaDatabase(AreaDatabase):
+    """
+    An area database that reads the shared snapshot first, then uses the
+    exported estimators, and only then the locally registered handlers (e.g.,
+    `DotProductAreaHandler`). Derived values are cached locally.
+    """
+
+    def __init__(self, snapshot: SharedAreaSnapshot) -> None:
+        super().__init__()
+        self._snapshot = snapshot
+        self.add_on_miss(snapshot.estimate)
+
+    def __call__(self, m: Module) -> float:
+        r = self._snapshot.lookup(m)
+        if r is not None:
+            return r
+        return super().__call__(m)
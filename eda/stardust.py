@@ -1,22 +1,85 @@
 import math
-from typing import Callable, Tuple
+from typing import Callable, List, Optional, Tuple
 from area_db import AreaDatabase
-from modules import Add, Multiply
-from data_types import FloatingPoint, SInt
+from modules import Add, DotProduct, Module, Multiply
+from data_types import BlockFloatingPoint, FloatingPoint, SInt
 import dataclasses
 import os
+import numpy as np
 from abc import ABC, abstractmethod
+from area_handlers import AdderTreeAreaHandler
 from fixed_point_estimators import register_fixed_point_estimators
+from power_db import PowerDatabase, power_at
+from timing_db import TimingDatabase, register_timing_estimators
 
 DATA_DIR = os.path.dirname(os.path.abspath(__file__)) + "/output"
+
+
+def register_handlers(db: AreaDatabase) -> None:
+    """
+    Registers the estimators of the modules of the execution unit: the
+    fixed-point adders and multipliers and the BFP dot products built of them.
+    """
+    register_fixed_point_estimators(db)
+    db.add_on_miss(AdderTreeAreaHandler(db))
+
+
 area = AreaDatabase(DATA_DIR)
 
-register_fixed_point_estimators(area)
+register_handlers(area)
 
 # AREA_SRAM = 0.244803  # from Ahmet's paper, um^2/bit
 AREA_SRAM = 1.041666  # from Mario's analysis
 
+_power: Tuple[PowerDatabase, PowerDatabase] = None
+# the error of the first load, raised again instead of scanning the reports
+_power_error: Exception = None
+
+
+def power() -> Tuple[PowerDatabase, PowerDatabase]:
+    """
+    Returns the dynamic and the leakage power databases, loaded on first use.
+    """
+    global _power, _power_error
+    if _power_error is not None:
+        raise _power_error
+    if _power is None:
+        try:
+            dbs = (PowerDatabase(DATA_DIR, "dynamic_power"), PowerDatabase(DATA_DIR, "leak_power"))
+            for db in dbs:
+                register_handlers(db)
+        except Exception as e:
+            _power_error = e
+            raise
+        _power = dbs
+    return _power
+
+
+_timing: TimingDatabase = None
+_timing_error: Exception = None
+
+
+def timing() -> TimingDatabase:
+    """
+    Returns the critical path database, loaded on first use.
+    """
+    global _timing, _timing_error
+    if _timing_error is not None:
+        raise _timing_error
+    if _timing is None:
+        try:
+            db = TimingDatabase(DATA_DIR)
+            register_timing_estimators(db)
+        except Exception as e:
+            _timing_error = e
+            raise
+        _timing = db
+    return _timing
+
+
 SAVE_FIGS = True
+# use the clock frequency the execution unit closes timing at instead of the given one
+DERIVE_CLOCK_FREQUENCY = False
 FIGS_PATH = "fig_output2/"
 
 
@@ -48,11 +111,37 @@ class StardustConfig(ABC):
         """
         return self.area_exec_unit() + self.area_mem_onchip() + self.area_simd_unit()
 
-    @abstractmethod
     def area_exec_unit(self) -> float:
         """
         Returns the execution unit area in terms of um^2.
         """
+        return self.cost_exec_unit(area)
+
+    @abstractmethod
+    def cost_exec_unit(self, db: AreaDatabase) -> float:
+        """
+        Returns the execution unit cost with the module costs taken from `db`.
+        """
+
+    @abstractmethod
+    def critical_path(self, db: AreaDatabase) -> float:
+        """
+        Returns the longest execution unit path in ns with the module delays
+        taken from `db`.
+        """
+
+    def max_clock_frequency(self) -> float:
+        """
+        Returns the highest clock frequency the execution unit closes timing at.
+        """
+        return 1e9 / self.critical_path(timing())
+
+    def power_exec_unit(self) -> float:
+        """
+        Returns the execution unit power at the clock frequency in terms of W.
+        """
+        dynamic, leak = power()
+        return power_at(self.cost_exec_unit(dynamic), self.cost_exec_unit(leak), self.clock_frequency)
 
     @abstractmethod
     def area_simd_unit(self) -> float:
@@ -84,6 +173,76 @@ class StardustConfig(ABC):
         """
         return s.throughput() * min(1, memory_bandwidth / s.bandwidth_offchip()) / (s.area_exec_unit() / 1e6)
 
+    def performance_per_watt(s, memory_bandwidth: float) -> float:
+        """
+        Returns the energy efficiency [TOps/W] of the execution unit.
+        """
+        return s.throughput() * min(1, memory_bandwidth / s.bandwidth_offchip()) / s.power_exec_unit()
+
+    def energy_per_op(s) -> float:
+        """
+        Returns the execution unit energy per operation in terms of pJ.
+        """
+        return s.power_exec_unit() / s.throughput()
+
+    def with_dim_array(s, dim_array: int) -> "StardustConfig":
+        """
+        Returns a copy with another array size.
+        """
+        return dataclasses.replace(s, dim_array=dim_array)
+
+    def _fit(s, dim_array: int, area_envelope: float, reuse: bool) -> Optional["StardustConfig"]:
+        cfg = s.with_dim_array(dim_array)
+        if reuse:
+            return cfg if cfg.maximize_onchip_area(area_envelope) else None
+        cfg.reuse = (1, 1)
+        return cfg if cfg.area() <= area_envelope else None
+
+    def solve_dim_array(
+            s,
+            area_envelope: float,
+            memory_bandwidth: Optional[float] = None,
+            reuse: bool = True,
+            max_dim_array: int = 1 << 16) -> Optional["StardustConfig"]:
+        """
+        Returns the configuration with the largest array size that fits the
+        area envelope (after `maximize_onchip_area()`, or with a reuse of 1
+        if `reuse` is False) and needs less off-chip bandwidth than
+        `memory_bandwidth` (if given), or None.
+
+        The area grows and the reuse shrinks with the array size, so both
+        conditions hold up to a crossing point, which is found by bisection
+        in `log2(max_dim_array)` evaluations.
+        """
+        # the conditions hold at lo (or lo = 0) and fail at hi
+        lo, hi = 0, max_dim_array + 1
+        best = None
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            cfg = s._fit(mid, area_envelope, reuse)
+            if cfg is not None and (memory_bandwidth is None or cfg.bandwidth_offchip() < memory_bandwidth):
+                lo, best = mid, cfg
+            else:
+                hi = mid
+        return best
+
+    def crossings(
+            s,
+            area_envelope: float,
+            memory_bandwidth: float,
+            reuse: bool = True,
+            max_dim_array: int = 1 << 16) -> Tuple[int, int]:
+        """
+        Returns the largest array sizes that fit the area envelope, and that
+        also stay below the memory bandwidth (0 if there is none).
+        """
+        return tuple(
+            0 if cfg is None else cfg.dim_array
+            for cfg in [
+                s.solve_dim_array(area_envelope, None, reuse, max_dim_array),
+                s.solve_dim_array(area_envelope, memory_bandwidth, reuse, max_dim_array),
+            ])
+
 
 @dataclasses.dataclass(frozen=False, unsafe_hash=True)
 class StardustConfigHBFP(StardustConfig):
@@ -106,15 +265,22 @@ class StardustConfigHBFP(StardustConfig):
     def throughput(s) -> float:
         return s.dim_array ** 2 * s.clock_frequency / 1e12
 
-    def area_exec_unit(s) -> float:
-        area_sint_multiply = area(Multiply(SInt(s.len_mantissa)))
-        area_sint_add = area(Add(SInt(2 * s.len_mantissa + math.ceil(math.log2(s.dim_block)) + 1)))
-        area_exp = area(Add(SInt(s.len_exponent)))
-        area_float_add = area(Add(s.floating_point))
-        return s.dim_array ** 2 * (area_sint_add + area_sint_multiply) + \
-            (s.dim_array ** 2 / s.dim_block) * (area_float_add) + \
+    def cost_exec_unit(s, db: AreaDatabase) -> float:
+        # a dot product of a block: the multipliers, the adder tree and one
+        # exponent adder; the exponent adders are shared by a block of rows
+        area_dot_product = db(DotProduct(BlockFloatingPoint(s.dim_block, s.len_exponent, s.len_mantissa)))
+        area_exp = db(Add(SInt(s.len_exponent)))
+        area_float_add = db(Add(s.floating_point))
+        return (s.dim_array ** 2 / s.dim_block) * (area_dot_product - area_exp + area_float_add) + \
             (s.dim_array / s.dim_block) ** 2 * (area_exp)
 
+    def critical_path(s, db: AreaDatabase) -> float:
+        # a processing element multiplies and accumulates in a cycle, the
+        # block results are added in floating point
+        pe = db(Multiply(SInt(s.len_mantissa))) + \
+            db(Add(SInt(2 * s.len_mantissa + math.ceil(math.log2(s.dim_block)) + 1)))
+        return max(pe, db(Add(s.floating_point)), db(Add(SInt(s.len_exponent))))
+
     def area_simd_unit(s) -> float:
         return AREA_SRAM * 2 * (s.dim_array ** 2) * s.floating_point.bits()
 
@@ -166,11 +332,17 @@ class StardustConfigFloatingPoint(StardustConfig):
     def throughput(s) -> float:
         return s.dim_array ** 2 * s.clock_frequency / 1e12
 
-    def area_exec_unit(s) -> float:
-        area_float_add = area(Add(s.floating_point))
-        area_float_multiply = area(Multiply(s.floating_point))
+    def cost_exec_unit(s, db: AreaDatabase) -> float:
+        area_float_add = db(Add(s.floating_point))
+        area_float_multiply = db(Multiply(s.floating_point))
         return s.dim_array ** 2 * (area_float_add + area_float_multiply)
 
+    def critical_path(s, db: AreaDatabase) -> float:
+        # the multiplier is combinational, the adder a pipeline whose report
+        # is its slowest stage: the multiplier also feeds the first stage,
+        # whose delay alone is not reported, so this is a lower bound
+        return max(db(Multiply(s.floating_point)), db(Add(s.floating_point)))
+
     def area_simd_unit(s) -> float:
         return AREA_SRAM * 2 * (s.dim_array ** 2) * s.floating_point.bits()
 
@@ -205,10 +377,309 @@ class StardustConfigFloatingPoint(StardustConfig):
         return (x + w) * s.dim_array / (x * w) * s.floating_point.bits() * s.clock_frequency / (8e9)
 
 
+class _Column:
+    """
+    A field of a configuration view, read from and written to a column of
+    its batch.
+    """
+
+    def __init__(self, *names: str, make=None, split=None) -> None:
+        self._names = names
+        self._make = make
+        self._split = split
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        values = [view._batch.columns[name][view._row].item() for name in self._names]
+        return self._make(*values) if self._make is not None else values[0]
+
+    def __set__(self, view, value) -> None:
+        values = self._split(value) if self._split is not None else (value,)
+        for name, x in zip(self._names, values):
+            view._batch.columns[name][view._row] = x
+
+
+class _View:
+    def __init__(self, batch: "StardustConfigBatch", row: int) -> None:
+        object.__setattr__(self, "_batch", batch)
+        object.__setattr__(self, "_row", row)
+
+    def to_config(self) -> StardustConfig:
+        """
+        Returns a copy that is independent of the batch.
+        """
+        config_type = type(self).__mro__[2]
+        return config_type(**{f.name: getattr(self, f.name) for f in dataclasses.fields(config_type)})
+
+    def with_dim_array(self, dim_array: int) -> StardustConfig:
+        return dataclasses.replace(self.to_config(), dim_array=dim_array)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, _View):
+            other = other.to_config()
+        return self.to_config() == other
+
+    def __hash__(self) -> int:
+        return hash(self.to_config())
+
+
+_floating_point_column = _Column(
+    "fp_exponent", "fp_mantissa", make=FloatingPoint, split=lambda fp: (fp.exponent_width, fp.mantissa_width))
+_reuse_column = _Column("reuse_x", "reuse_w", make=lambda x, w: (x, w), split=tuple)
+
+
+class StardustConfigHBFPView(_View, StardustConfigHBFP):
+    """
+    A `StardustConfigHBFP` backed by a row of a `StardustConfigBatch`.
+    """
+    clock_frequency = _Column("clock_frequency")
+    dim_array = _Column("dim_array")
+    dim_block = _Column("dim_block")
+    len_mantissa = _Column("len_mantissa")
+    len_exponent = _Column("len_exponent")
+    floating_point = _floating_point_column
+    reuse = _reuse_column
+
+
+class StardustConfigFloatingPointView(_View, StardustConfigFloatingPoint):
+    """
+    A `StardustConfigFloatingPoint` backed by a row of a `StardustConfigBatch`.
+    """
+    clock_frequency = _Column("clock_frequency")
+    dim_array = _Column("dim_array")
+    floating_point = _floating_point_column
+    reuse = _reuse_column
+
+
+class StardustConfigBatch:
+    """
+    Many HBFP and floating-point configurations as columns, with the metrics
+    of `StardustConfig` computed for all of them at once. The module costs
+    are looked up once per distinct module. `batch[i]` is a
+    `StardustConfigHBFP` or `StardustConfigFloatingPoint` view of a row,
+    writes to it go to the columns.
+
+    The columns of the floating-point rows that only apply to HBFP
+    (`dim_block`, `len_mantissa`, `len_exponent`) are unused.
+
+    A database may return an array of samples per module (see
+    `uncertainty.py`), every row then takes the costs of its `sample`.
+    """
+
+    COLUMNS = {
+        "is_hbfp": np.bool_,
+        "clock_frequency": np.float64,
+        "dim_array": np.int64,
+        "dim_block": np.int64,
+        "len_mantissa": np.int64,
+        "len_exponent": np.int64,
+        "fp_exponent": np.int64,
+        "fp_mantissa": np.int64,
+        "reuse_x": np.int64,
+        "reuse_w": np.int64,
+        # um^2/bit
+        "area_sram": np.float64,
+        "sample": np.int64,
+    }
+
+    def __init__(self, **columns: np.ndarray) -> None:
+        assert(set(columns) == set(StardustConfigBatch.COLUMNS))
+        arrays = np.broadcast_arrays(*(np.asarray(columns[name]) for name in StardustConfigBatch.COLUMNS))
+        self.columns = {
+            name: np.array(a, dtype=dtype).reshape(-1)
+            for (name, dtype), a in zip(StardustConfigBatch.COLUMNS.items(), arrays)
+        }
+
+    @staticmethod
+    def hbfp(
+            clock_frequency=800e6,
+            dim_array=512,
+            dim_block=16,
+            len_mantissa=4,
+            len_exponent=10,
+            floating_point: FloatingPoint = FloatingPoint.bfloat16,
+            reuse=(12, 12),
+            area_sram=None,
+            sample=0) -> "StardustConfigBatch":
+        """
+        Broadcasts the parameters (same defaults as `StardustConfigHBFP`).
+        """
+        return StardustConfigBatch(
+            is_hbfp=True, clock_frequency=clock_frequency, dim_array=dim_array, dim_block=dim_block,
+            len_mantissa=len_mantissa, len_exponent=len_exponent,
+            fp_exponent=floating_point.exponent_width, fp_mantissa=floating_point.mantissa_width,
+            reuse_x=reuse[0], reuse_w=reuse[1], area_sram=AREA_SRAM if area_sram is None else area_sram,
+            sample=sample)
+
+    @staticmethod
+    def floating_point(
+            clock_frequency=800e6,
+            dim_array=512,
+            floating_point: FloatingPoint = FloatingPoint.bfloat16,
+            reuse=(12, 12),
+            area_sram=None,
+            sample=0) -> "StardustConfigBatch":
+        """
+        Broadcasts the parameters (same defaults as `StardustConfigFloatingPoint`).
+        """
+        return StardustConfigBatch(
+            is_hbfp=False, clock_frequency=clock_frequency, dim_array=dim_array, dim_block=1,
+            len_mantissa=0, len_exponent=0,
+            fp_exponent=floating_point.exponent_width, fp_mantissa=floating_point.mantissa_width,
+            reuse_x=reuse[0], reuse_w=reuse[1], area_sram=AREA_SRAM if area_sram is None else area_sram,
+            sample=sample)
+
+    @staticmethod
+    def from_configs(configs: List[StardustConfig]) -> "StardustConfigBatch":
+        return StardustConfigBatch.concatenate([
+            StardustConfigBatch.hbfp(
+                cfg.clock_frequency, cfg.dim_array, cfg.dim_block, cfg.len_mantissa, cfg.len_exponent,
+                cfg.floating_point, cfg.reuse)
+            if isinstance(cfg, StardustConfigHBFP) else
+            StardustConfigBatch.floating_point(cfg.clock_frequency, cfg.dim_array, cfg.floating_point, cfg.reuse)
+            for cfg in configs
+        ])
+
+    @staticmethod
+    def concatenate(batches: List["StardustConfigBatch"]) -> "StardustConfigBatch":
+        return StardustConfigBatch(**{
+            name: np.concatenate([b.columns[name] for b in batches]) for name in StardustConfigBatch.COLUMNS
+        })
+
+    def __len__(self) -> int:
+        return len(self.columns["dim_array"])
+
+    def __getitem__(self, i: int) -> StardustConfig:
+        i = range(len(self))[i]
+        if self.columns["is_hbfp"][i]:
+            return StardustConfigHBFPView(self, i)
+        return StardustConfigFloatingPointView(self, i)
+
+    def select(self, mask: np.ndarray) -> "StardustConfigBatch":
+        """
+        Returns a new batch with the selected rows (mask or indices).
+        """
+        return StardustConfigBatch(**{name: c[mask] for name, c in self.columns.items()})
+
+    def _lookup(self, db: AreaDatabase, module: Callable[..., Module], mask: np.ndarray, *columns: np.ndarray) -> np.ndarray:
+        """
+        Returns `db(module(*row))` for the rows in `mask` (0 elsewhere), with a
+        single lookup per distinct row. Sampled costs are indexed by `sample`.
+        """
+        result = np.zeros(len(self))
+        if not mask.any():
+            return result
+        # the parameters are small non-negative integers: pack them in one key
+        # and look the costs up in a dense table, without sorting
+        columns = [c[mask] for c in columns]
+        dims = [int(c.max()) + 1 for c in columns]
+        keys = np.ravel_multi_index(columns, dims)
+        unique = np.flatnonzero(np.bincount(keys, minlength=math.prod(dims)))
+        rows = np.unravel_index(unique, dims)
+        costs = [np.atleast_1d(db(module(*(int(x[i]) for x in rows)))) for i in range(len(unique))]
+        samples = max(len(c) for c in costs)
+        table = np.zeros((math.prod(dims), samples))
+        table[unique] = np.stack([np.broadcast_to(c, samples) for c in costs])
+        result[mask] = table[keys, self.columns["sample"][mask] if samples > 1 else 0]
+        return result
+
+    def fp_bits(self) -> np.ndarray:
+        return self.columns["fp_exponent"] + self.columns["fp_mantissa"] + 1
+
+    def bits_per_elem(self) -> np.ndarray:
+        """
+        `bfp_bits_per_elem()` for the HBFP rows, the float width otherwise.
+        """
+        c = self.columns
+        hbfp = (c["len_mantissa"] * c["dim_block"] ** 2 + c["len_exponent"]) / c["dim_block"] ** 2
+        return np.where(c["is_hbfp"], hbfp, self.fp_bits())
+
+    def memsz_onchip(self) -> np.ndarray:
+        c = self.columns
+        x, w, d2 = c["reuse_x"], c["reuse_w"], c["dim_array"].astype(np.float64) ** 2
+        return 2 * (x + w) * d2 * self.bits_per_elem() + x * w * d2 * self.fp_bits()
+
+    def throughput(self) -> np.ndarray:
+        return self.columns["dim_array"].astype(np.float64) ** 2 * self.columns["clock_frequency"] / 1e12
+
+    def cost_exec_unit(self, db: AreaDatabase) -> np.ndarray:
+        c = self.columns
+        hbfp = c["is_hbfp"]
+        fp = ~hbfp
+        d2 = c["dim_array"].astype(np.float64) ** 2
+        m, b = c["len_mantissa"], c["dim_block"]
+        float_add = self._lookup(
+            db, lambda e, m: Add(FloatingPoint(e, m)), np.ones(len(self), dtype=bool), c["fp_exponent"], c["fp_mantissa"])
+        float_multiply = self._lookup(
+            db, lambda e, m: Multiply(FloatingPoint(e, m)), fp, c["fp_exponent"], c["fp_mantissa"])
+        dot_product = self._lookup(
+            db, lambda b, e, m: DotProduct(BlockFloatingPoint(b, e, m)), hbfp, b, c["len_exponent"], m)
+        exp = self._lookup(db, lambda w: Add(SInt(w)), hbfp, c["len_exponent"])
+        return np.where(
+            hbfp,
+            d2 / b * (dot_product - exp + float_add) + d2 / b ** 2 * exp,
+            d2 * (float_add + float_multiply))
+
+    def area_exec_unit(self, db: AreaDatabase = None) -> np.ndarray:
+        return self.cost_exec_unit(area if db is None else db)
+
+    def area_simd_unit(self) -> np.ndarray:
+        return self.columns["area_sram"] * 2 * self.columns["dim_array"].astype(np.float64) ** 2 * self.fp_bits()
+
+    def area_mem_onchip(self) -> np.ndarray:
+        return self.columns["area_sram"] * self.memsz_onchip()
+
+    def area(self, db: AreaDatabase = None) -> np.ndarray:
+        return self.area_exec_unit(db) + self.area_mem_onchip() + self.area_simd_unit()
+
+    def bandwidth_offchip(self) -> np.ndarray:
+        c = self.columns
+        x, w = c["reuse_x"], c["reuse_w"]
+        return (x + w) * c["dim_array"] / (x * w) * self.bits_per_elem() * c["clock_frequency"] / 8e9
+
+    def performance_density(self, memory_bandwidth: float, db: AreaDatabase = None) -> np.ndarray:
+        return self.throughput() * np.minimum(1, memory_bandwidth / self.bandwidth_offchip()) / \
+            (self.area_exec_unit(db) / 1e6)
+
+    def power_exec_unit(self, dynamic: AreaDatabase = None, leak: AreaDatabase = None) -> np.ndarray:
+        """
+        `power_exec_unit()` of every row, in W, from the dynamic and leakage
+        power databases (`power()` by default).
+        """
+        if dynamic is None or leak is None:
+            dynamic, leak = power()
+        return power_at(self.cost_exec_unit(dynamic), self.cost_exec_unit(leak), self.columns["clock_frequency"])
+
+    def performance_per_watt(self, memory_bandwidth: float, dynamic: AreaDatabase = None,
+                             leak: AreaDatabase = None) -> np.ndarray:
+        return self.throughput() * np.minimum(1, memory_bandwidth / self.bandwidth_offchip()) / \
+            self.power_exec_unit(dynamic, leak)
+
+    def energy_per_op(self, dynamic: AreaDatabase = None, leak: AreaDatabase = None) -> np.ndarray:
+        return self.power_exec_unit(dynamic, leak) / self.throughput()
+
+    def maximize_onchip_area(self, area_envelope, db: AreaDatabase = None) -> np.ndarray:
+        """
+        `maximize_onchip_area()` of every row, `area_envelope` broadcasts.
+        Sets the reuse of the feasible rows and returns them as a mask.
+        """
+        c = self.columns
+        d2 = c["dim_array"].astype(np.float64) ** 2
+        remaining = area_envelope - (self.area_exec_unit(db) + self.area_simd_unit())
+        a = d2 * self.fp_bits()
+        b = 4 * d2 * self.bits_per_elem()
+        discr = b ** 2 + 4 * a * np.maximum(remaining, 0) / c["area_sram"]
+        reuse = np.floor((-b + np.sqrt(discr)) / (2 * a)).astype(np.int64)
+        feasible = (remaining >= 0) & (reuse > 0)
+        c["reuse_x"] = np.where(feasible, reuse, c["reuse_x"])
+        c["reuse_w"] = np.where(feasible, reuse, c["reuse_w"])
+        return feasible
+
+
 def main() -> None:
     import numpy as np
-    import matplotlib.axes
-    import matplotlib.pyplot as plt
+    from render import Axes, Figure, Series, draw, render
 
     reticle_size = 830e6
     critical_bw = 1000
@@ -234,9 +705,9 @@ def main() -> None:
 
     n = np.arange(1, 3300)
 
-    def plot_max_bw(subplot: matplotlib.axes.Axes, x: np.ndarray) -> None:
-        subplot.plot(x, x * 0.0 + critical_bw,
-                     label="HBM2 Bandwidth", linestyle="--", color="#663300")
+    def plot_max_bw(subplot: Axes, x: np.ndarray) -> None:
+        subplot.series.append(Series(x, x * 0.0 + critical_bw,
+                                     label="HBM2 Bandwidth", style={"linestyle": "--", "color": "#663300"}))
 
     def print_statistics(cfg: StardustConfig, area_envelope: float):
         # autopep8: off
@@ -256,28 +727,45 @@ def main() -> None:
         print(f"xput/area/sec   [     ] = { cfg.throughput() / cfg.clock_frequency / cfg.area_exec_unit() * 1e15 }")
         print(f"Reuse           [     ] = { cfg.reuse }")
         print(f"Perf. density   [     ] = { cfg.performance_density(critical_bw) }")
+        try:
+            print(f"Exec power      [    W] = { cfg.power_exec_unit() }")
+            print(f"Perf. per watt  [TOp/W] = { cfg.performance_per_watt(critical_bw) }")
+            print(f"Energy per op   [   pJ] = { cfg.energy_per_op() }")
+        except KeyError:
+            print(f"Power           [     ] = n/a (missing power reports)")
+        try:
+            print(f"Max clock freq  [  MHz] = { cfg.max_clock_frequency() / 1e6 }")
+        except KeyError:
+            print(f"Max clock freq  [  MHz] = n/a (missing timing reports)")
         # autopep8: on
 
     def plot_for(
         title: str,
         area_envelope: float,
         gen: Callable[[int], StardustConfig]
-    ) -> None:
-        fig = plt.figure(figsize=(4, 8))  # , dpi=300)
-
-        bw_vs_xput = fig.add_subplot(2, 1, 1)
-        bw_vs_xput.set_title(f"Memory BW vs. Throughput\nfor {title}")
-        bw_vs_xput.set_ylabel("Off-chip Memory Bandwidth [GB/s]")
-        bw_vs_xput.set_xlabel("Arithmetic Throughput [TOps/s]")
-
-        pd_vs_xput = fig.add_subplot(2, 1, 2)
-        pd_vs_xput.set_title(f"Perf Density vs. Throughput\nfor {title}")
-        pd_vs_xput.set_ylabel("Performance Density [TOps/mm²]")
-        pd_vs_xput.set_xlabel("Arithmetic Throughput [TOps/s]")
+    ) -> Figure:
+        if DERIVE_CLOCK_FREQUENCY:
+            fixed_clock_gen = gen
+
+            def gen(n: int) -> StardustConfig:
+                cfg = fixed_clock_gen(n)
+                cfg.clock_frequency = cfg.max_clock_frequency()
+                return cfg
+
+        bw_vs_xput = Axes(
+            title=f"Memory BW vs. Throughput\nfor {title}",
+            ylabel="Off-chip Memory Bandwidth [GB/s]",
+            xlabel="Arithmetic Throughput [TOps/s]",
+            legend={})
+
+        pd_vs_xput = Axes(
+            title=f"Perf Density vs. Throughput\nfor {title}",
+            ylabel="Performance Density [TOps/mm²]",
+            xlabel="Arithmetic Throughput [TOps/s]",
+            legend={})
 
         def without_reuse() -> None:
             lim = [False, 0]
-            cfgs = [None] * n.shape[0]
 
             @np.vectorize
             def calculate(n) -> Tuple[float, float]:
@@ -288,26 +776,21 @@ def main() -> None:
                         lim[0] = True
                         lim[1] = n - 1
                     return (cfg.throughput(), 0, 0)
-                cfgs[n] = cfg
                 return (cfg.throughput(), cfg.bandwidth_offchip(), cfg.performance_density(critical_bw))
             xput, bw, pd = calculate(n)
             plot_max_bw(bw_vs_xput, xput)
 
-            bw_vs_xput.plot(xput[0:lim[1]], bw[0:lim[1]],
-                         label="without data reuse", color="#B85450")
-            bw_vs_xput.legend()
+            bw_vs_xput.series.append(Series(xput[0:lim[1]], bw[0:lim[1]],
+                                            label="without data reuse", style={"color": "#B85450"}))
 
-            pd_vs_xput.plot(xput[500:lim[1]], pd[500:lim[1]],
-                         label="without data reuse", color="#B85450")
-            pd_vs_xput.legend()
+            pd_vs_xput.series.append(Series(xput[500:lim[1]], pd[500:lim[1]],
+                                            label="without data reuse", style={"color": "#B85450"}))
 
             print(">> without reuse: <<")
-            print_statistics(
-                cfgs[n[np.argwhere(bw[0:lim[1]] < critical_bw)[-1]][0]], area_envelope)
+            print_statistics(gen(1).solve_dim_array(area_envelope, critical_bw, reuse=False), area_envelope)
 
         def with_reuse() -> None:
             lim = [False, 0]
-            cfgs = [None] * n.shape[0]
 
             @np.vectorize
             def calculate(n) -> Tuple[float, float]:
@@ -317,41 +800,39 @@ def main() -> None:
                         lim[0] = True
                         lim[1] = n - 1
                     return (cfg.throughput(), 0, 0)
-                cfgs[n] = cfg
                 return (cfg.throughput(), cfg.bandwidth_offchip(), cfg.performance_density(critical_bw))
             xput, bw, pd= calculate(n)
 
-            bw_vs_xput.plot(xput[0:lim[1]], bw[0:lim[1]],
-                         label="with data reuse", color="#6C8EBF")
-            bw_vs_xput.legend()
+            bw_vs_xput.series.append(Series(xput[0:lim[1]], bw[0:lim[1]],
+                                            label="with data reuse", style={"color": "#6C8EBF"}))
 
-            pd_vs_xput.plot(xput[500:lim[1]], pd[500:lim[1]],
-                         label="with data reuse", color="#6C8EBF")
-            pd_vs_xput.legend()
+            pd_vs_xput.series.append(Series(xput[500:lim[1]], pd[500:lim[1]],
+                                            label="with data reuse", style={"color": "#6C8EBF"}))
 
             print(">> with data reuse: <<")
-            print_statistics(
-                cfgs[n[np.argwhere(bw[0:lim[1]] < critical_bw)[-1]][0]], area_envelope)
+            print_statistics(gen(1).solve_dim_array(area_envelope, critical_bw), area_envelope)
 
         print(f"=== DATA FOR {title.upper()} ===")
         without_reuse()
         with_reuse()
 
-        bw_vs_xput.set_ylim([0, 4020])
-        bw_vs_xput.set_xlim([0, 6500])
+        bw_vs_xput.ylim = (0, 4020)
+        bw_vs_xput.xlim = (0, 6500)
 
-        # pd_vs_xput.set_ylim([0, 10])
-        # pd_vs_xput.set_xlim([0, 6500])
+        # pd_vs_xput.ylim = (0, 10)
+        # pd_vs_xput.xlim = (0, 6500)
 
-        if SAVE_FIGS:
-            fig.tight_layout()
-            fig.savefig(f"{ FIGS_PATH }/{ title }-bw.svg")
-            fig.savefig(f"{ FIGS_PATH }/{ title }-bw.png")
+        return Figure(
+            [f"{ FIGS_PATH }/{ title }-bw.svg", f"{ FIGS_PATH }/{ title }-bw.png"],
+            [bw_vs_xput, pd_vs_xput],
+            figsize=(4, 8),  # dpi=300
+            tight_layout=True)
 
     efficiency = 0.85  # mario's reference
+    figures = []
 
     for w in [2, 3, 4, 5, 6, 8, 16, 32]:
-        plot_for(
+        figures.append(plot_for(
             f"hbfp{w}",
             reticle_size * efficiency,
             lambda n: StardustConfigHBFP(
@@ -360,25 +841,30 @@ def main() -> None:
                 dim_block=16,
                 len_exponent=10,
                 len_mantissa=w,
-                floating_point=FloatingPoint.bfloat16))
+                floating_point=FloatingPoint.bfloat16)))
 
-    plot_for(
+    figures.append(plot_for(
         "bfloat16",
         reticle_size * efficiency,
         lambda n: StardustConfigFloatingPoint(
             clock_frequency=clock_frequency,
             dim_array=n,
-            floating_point=FloatingPoint.bfloat16))
+            floating_point=FloatingPoint.bfloat16)))
 
-    plot_for(
+    figures.append(plot_for(
         "fp32",
         reticle_size * efficiency,
         lambda n: StardustConfigFloatingPoint(
             clock_frequency=clock_frequency,
             dim_array=n,
-            floating_point=FloatingPoint.ieee_fp32))
-
-    if not SAVE_FIGS:
+            floating_point=FloatingPoint.ieee_fp32)))
+
+    if SAVE_FIGS:
+        render(figures)
+    else:
+        import matplotlib.pyplot as plt
+        for figure in figures:
+            draw(dataclasses.replace(figure, paths=[]), close=False)
         plt.show()
 
 
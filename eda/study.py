@@ -0,0 +1,222 @@
+"""
+Sensitivity studies over the global assumptions of `stardust.py`.
+
+`run_study()` evaluates every combination of the number formats, the SRAM
+density, the reticle size, the area efficiency, the off-chip bandwidth, the
+clock frequency and the array size, and stores every metric as an N-D array
+(`<metric>.npy`, one dimension per axis) next to `axes.json`. `Cube` memory
+maps them back and selects or reduces along the labeled axes.
+"""
+
+import json
+import math
+import os
+import re
+from typing import Dict, List, Union
+import numpy as np
+from data_types import FloatingPoint
+from stardust import AREA_SRAM, StardustConfigBatch
+
+METRICS = {
+    "feasible": np.bool_,
+    "within_bandwidth": np.bool_,
+    "reuse": np.int64,
+    "throughput": np.float64,
+    "area": np.float64,
+    "area_exec_unit": np.float64,
+    "bandwidth_offchip": np.float64,
+    "performance_density": np.float64,
+}
+
+_regex_hbfp = re.compile(r"^hbfp(?P<m>\d+)(?:n(?P<n>\d+))?$")
+_floating_point_formats = {
+    "bfloat16": FloatingPoint.bfloat16,
+    "fp16": FloatingPoint.ieee_fp16,
+    "fp32": FloatingPoint.ieee_fp32,
+}
+
+
+def format_batch(label: str, **columns: np.ndarray) -> StardustConfigBatch:
+    """
+    Builds the configurations of a format label: `hbfp<m>` (block size 16),
+    `hbfp<m>n<block size>`, `bfloat16`, `fp16` or `fp32`.
+    """
+    m = _regex_hbfp.match(label)
+    if m is not None:
+        return StardustConfigBatch.hbfp(
+            len_mantissa=int(m["m"]), dim_block=int(m["n"] or 16), **columns)
+    if label in _floating_point_formats:
+        return StardustConfigBatch.floating_point(floating_point=_floating_point_formats[label], **columns)
+    raise ValueError(f"Unknown format {label}")
+
+
+class Cube:
+    """
+    Metrics over labeled axes. Selecting with a single value drops the axis,
+    with a list keeps it.
+    """
+
+    def __init__(self, axes: Dict[str, np.ndarray], data: Dict[str, np.ndarray]) -> None:
+        self.axes = axes
+        self.data = data
+
+    @staticmethod
+    def open(dirpath: str) -> "Cube":
+        """
+        Memory maps a stored study.
+        """
+        with open(f"{dirpath}/axes.json") as f:
+            axes = {name: np.array(values) for name, values in json.load(f).items()}
+        data = {
+            fname[:-4]: np.load(f"{dirpath}/{fname}", mmap_mode="r")
+            for fname in sorted(os.listdir(dirpath)) if fname.endswith(".npy")
+        }
+        return Cube(axes, data)
+
+    @property
+    def shape(self) -> tuple:
+        return tuple(len(values) for values in self.axes.values())
+
+    def __getitem__(self, metric: str) -> np.ndarray:
+        return self.data[metric]
+
+    def index(self, axis: str, value) -> int:
+        values = self.axes[axis]
+        if values.dtype.kind in "fc":
+            hits = np.flatnonzero(np.isclose(values, value))
+        else:
+            hits = np.flatnonzero(values == value)
+        if len(hits) == 0:
+            raise KeyError(f"{value} is not on the {axis} axis")
+        return int(hits[0])
+
+    def sel(self, **coords) -> "Cube":
+        axes = dict(self.axes)
+        data = dict(self.data)
+        for axis, value in coords.items():
+            position = list(axes).index(axis)
+            if isinstance(value, (list, tuple, np.ndarray)):
+                index = [self.index(axis, v) for v in value]
+                axes[axis] = axes[axis][index]
+            else:
+                index = self.index(axis, value)
+                del axes[axis]
+            data = {name: np.take(d, index, axis=position) for name, d in data.items()}
+        return Cube(axes, data)
+
+    def best(self, objective: str, over: str = "dim_array", where: Union[str, List[str]] = "feasible",
+             maximize: bool = True) -> "Cube":
+        """
+        Reduces the `over` axis to the point with the best objective among
+        those where all `where` metrics hold. The result has the metrics at
+        that point and `over` as a metric (NaN objective and coordinate where
+        no point qualifies).
+        """
+        position = list(self.axes).index(over)
+        mask = np.ones(self.shape, dtype=bool)
+        for name in ([where] if isinstance(where, str) else where or []):
+            mask &= self.data[name]
+        sign = 1 if maximize else -1
+        score = np.where(mask, sign * np.asarray(self.data[objective], dtype=np.float64), -np.inf)
+        arg = np.expand_dims(np.argmax(score, axis=position), position)
+        found = np.take_along_axis(mask, arg, axis=position).squeeze(position)
+
+        data = {
+            name: np.take_along_axis(np.asarray(d), arg, axis=position).squeeze(position)
+            for name, d in self.data.items()
+        }
+        data[objective] = np.where(found, data[objective], np.nan)
+        data[over] = np.where(found, self.axes[over][arg.squeeze(position)], np.nan)
+        axes = {name: values for name, values in self.axes.items() if name != over}
+        return Cube(axes, data)
+
+
+def run_study(
+        dirpath: str,
+        formats: List[str],
+        dim_array: np.ndarray,
+        area_sram: List[float] = [AREA_SRAM],
+        reticle_size: List[float] = [830e6],
+        efficiency: List[float] = [0.85],
+        critical_bw: List[float] = [1000],
+        clock_frequency: List[float] = [800e6],
+        chunk_size: int = 1 << 20) -> Cube:
+    """
+    Evaluates every combination of the parameters, `chunk_size` points at a
+    time, into memory-mapped arrays in `dirpath`. The area envelope is
+    `reticle_size * efficiency` and `critical_bw` is the available off-chip
+    bandwidth in GB/s.
+    """
+    axes = {
+        "format": np.array(formats),
+        "area_sram": np.asarray(area_sram, dtype=np.float64),
+        "reticle_size": np.asarray(reticle_size, dtype=np.float64),
+        "efficiency": np.asarray(efficiency, dtype=np.float64),
+        "critical_bw": np.asarray(critical_bw, dtype=np.float64),
+        "clock_frequency": np.asarray(clock_frequency, dtype=np.float64),
+        "dim_array": np.asarray(dim_array, dtype=np.int64),
+    }
+    shape = tuple(len(values) for values in axes.values())
+    os.makedirs(dirpath, exist_ok=True)
+    out = {
+        name: np.lib.format.open_memmap(f"{dirpath}/{name}.npy", mode="w+", dtype=dtype, shape=shape)
+        for name, dtype in METRICS.items()
+    }
+
+    rest = shape[1:]
+    size = math.prod(rest)
+    for i, label in enumerate(formats):
+        for start in range(0, size, chunk_size):
+            stop = min(start + chunk_size, size)
+            index = np.unravel_index(np.arange(start, stop), rest)
+            p = {name: values[j] for (name, values), j in zip(list(axes.items())[1:], index)}
+            batch = format_batch(
+                label, clock_frequency=p["clock_frequency"], dim_array=p["dim_array"], area_sram=p["area_sram"])
+            feasible = batch.maximize_onchip_area(p["reticle_size"] * p["efficiency"])
+            bandwidth = batch.bandwidth_offchip()
+            metrics = {
+                "feasible": feasible,
+                "within_bandwidth": bandwidth < p["critical_bw"],
+                "reuse": batch.columns["reuse_x"],
+                "throughput": batch.throughput(),
+                "area": batch.area(),
+                "area_exec_unit": batch.area_exec_unit(),
+                "bandwidth_offchip": bandwidth,
+                "performance_density": batch.performance_density(p["critical_bw"]),
+            }
+            for name, values in metrics.items():
+                out[name][i].reshape(-1)[start:stop] = values
+
+    for array in out.values():
+        array.flush()
+    with open(f"{dirpath}/axes.json", "w") as f:
+        json.dump({name: values.tolist() for name, values in axes.items()}, f)
+    return Cube.open(dirpath)
+
+
+def main() -> None:
+    import time
+
+    dirpath = os.path.dirname(os.path.abspath(__file__)) + "/study_output"
+    start = time.time()
+    cube = run_study(
+        dirpath,
+        formats=["hbfp2", "hbfp4", "hbfp6", "hbfp8", "bfloat16", "fp32"],
+        dim_array=np.arange(1, 3300),
+        area_sram=[0.244803, 0.5, 1.041666],
+        efficiency=[0.75, 0.85],
+        critical_bw=[500, 1000, 2000],
+        clock_frequency=[600e6, 800e6, 1000e6])
+    print(f"Evaluated {math.prod(cube.shape)} points in {time.time() - start:.2f} s, stored in {dirpath}")
+
+    # how the best HBFP4 configuration moves as the SRAM density varies
+    best = cube.sel(format="hbfp4", reticle_size=830e6, efficiency=0.85, critical_bw=1000, clock_frequency=800e6) \
+        .best("throughput", where=["feasible", "within_bandwidth"])
+    for i, area_sram in enumerate(best.axes["area_sram"]):
+        print(f"AREA_SRAM = {area_sram:.4f} um^2/bit: dim_array = {best['dim_array'][i]:.0f}, "
+              f"throughput = {best['throughput'][i]:.1f} TOps/s, reuse = {best['reuse'][i]}, "
+              f"bandwidth = {best['bandwidth_offchip'][i]:.1f} GB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Streaming design-space sweeps: the grid is generated in chunks, every chunk
+is evaluated at once and fed to online reducers, which are the only state
+kept. The memory is bounded by the chunk size and the reducer results,
+however large the grid is.
+"""
+
+from abc import ABC, abstractmethod
+import math
+from typing import Callable, Dict, Iterable, Iterator, List
+import numpy as np
+from stardust import StardustConfigBatch
+
+Columns = Dict[str, np.ndarray]
+
+
+def grid_chunks(axes: Dict[str, Iterable], chunk_size: int = 1 << 18) -> Iterator[Columns]:
+    """
+    Yields the cartesian product of the axes, `chunk_size` points at a time,
+    as one column per axis.
+    """
+    axes = {name: np.asarray(values) for name, values in axes.items()}
+    shape = [len(values) for values in axes.values()]
+    size = math.prod(shape)
+    for start in range(0, size, chunk_size):
+        index = np.unravel_index(np.arange(start, min(start + chunk_size, size)), shape)
+        yield {name: values[i] for (name, values), i in zip(axes.items(), index)}
+
+
+def stardust_evaluator(
+        area_envelope: float,
+        memory_bandwidth: float,
+        hbfp: bool = True) -> Callable[[Columns], Columns]:
+    """
+    Returns an evaluation of the Stardust configurations of a chunk (the
+    axes are `StardustConfigBatch.hbfp()` or `.floating_point()` parameters)
+    after maximizing their on-chip memory within the area envelope.
+    """
+    def evaluate(params: Columns) -> Columns:
+        batch = (StardustConfigBatch.hbfp if hbfp else StardustConfigBatch.floating_point)(**params)
+        feasible = batch.maximize_onchip_area(area_envelope)
+        return {
+            "feasible": feasible,
+            "reuse": batch.columns["reuse_x"],
+            "throughput": batch.throughput(),
+            "area": batch.area(),
+            "bandwidth_offchip": batch.bandwidth_offchip(),
+            "performance_density": batch.performance_density(memory_bandwidth),
+        }
+    return evaluate
+
+
+class Reducer(ABC):
+    """
+    Folds the evaluated chunks into a result. `where` optionally restricts
+    the points considered (a mask computed from the metrics).
+    """
+
+    def __init__(self, where: Callable[[Columns], np.ndarray] = None) -> None:
+        self._where = where
+
+    def _select(self, params: Columns, metrics: Columns) -> Columns:
+        rows = {**params, **metrics}
+        if self._where is None:
+            return rows
+        mask = self._where(metrics)
+        return {name: values[mask] for name, values in rows.items()}
+
+    @abstractmethod
+    def update(self, params: Columns, metrics: Columns) -> None:
+        """
+        Folds an evaluated chunk in.
+        """
+
+    @abstractmethod
+    def result(self):
+        """
+        Returns the reduction of the chunks so far.
+        """
+
+
+def _concatenate(a: Columns, b: Columns) -> Columns:
+    if a is None:
+        return b
+    return {name: np.concatenate([a[name], b[name]]) for name in a}
+
+
+def _take(rows: Columns, index: np.ndarray) -> Columns:
+    return {name: values[index] for name, values in rows.items()}
+
+
+class BestUnderConstraint(Reducer):
+    """
+    Keeps the point with the best `objective` among those satisfying `where`.
+    """
+
+    def __init__(self, objective: str, where: Callable[[Columns], np.ndarray] = None, maximize: bool = True) -> None:
+        super().__init__(where)
+        self._objective = objective
+        self._sign = 1 if maximize else -1
+        self._best: Columns = None
+
+    def update(self, params: Columns, metrics: Columns) -> None:
+        rows = self._select(params, metrics)
+        if len(rows[self._objective]) == 0:
+            return
+        candidates = _concatenate(self._best, _take(rows, [np.argmax(self._sign * rows[self._objective])]))
+        self._best = _take(candidates, [np.argmax(self._sign * candidates[self._objective])])
+
+    def result(self) -> Dict[str, object]:
+        """
+        Returns the parameters and metrics of the best point, or None.
+        """
+        if self._best is None:
+            return None
+        return {name: values[0].item() for name, values in self._best.items()}
+
+
+def pareto_mask(values: np.ndarray) -> np.ndarray:
+    """
+    Returns the non-dominated rows of `values` (points x objectives), all
+    objectives maximized. Of identical points, one is kept.
+    """
+    n, k = values.shape
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+    # by the first objective descending, ties by the others descending
+    order = np.lexsort(tuple(-values[:, j] for j in reversed(range(k))))
+    keep = np.zeros(n, dtype=bool)
+    if k == 2:
+        # a point survives if its second objective beats every point before it
+        second = values[order, 1]
+        best_before = np.maximum.accumulate(np.concatenate([[-np.inf], second[:-1]]))
+        keep[order[second > best_before]] = True
+        return keep
+    kept = np.empty((0, k))
+    for i in order:
+        if not np.any(np.all(kept >= values[i], axis=1)):
+            kept = np.vstack([kept, values[i]])
+            keep[i] = True
+    return keep
+
+
+class ParetoFrontier(Reducer):
+    """
+    Keeps the Pareto frontier of the given objectives.
+    """
+
+    def __init__(
+            self,
+            objectives: List[str],
+            maximize: List[bool] = None,
+            where: Callable[[Columns], np.ndarray] = None) -> None:
+        super().__init__(where)
+        self._objectives = objectives
+        self._signs = np.array([1 if m else -1 for m in (maximize or [True] * len(objectives))])
+        self._frontier: Columns = None
+
+    def update(self, params: Columns, metrics: Columns) -> None:
+        rows = _concatenate(self._frontier, self._select(params, metrics))
+        values = np.stack([rows[name] for name in self._objectives], axis=-1) * self._signs
+        self._frontier = _take(rows, np.flatnonzero(pareto_mask(values)))
+
+    def result(self) -> Columns:
+        """
+        Returns the frontier points, sorted by the first objective.
+        """
+        if self._frontier is None:
+            return {}
+        return _take(self._frontier, np.argsort(self._frontier[self._objectives[0]], kind="stable"))
+
+
+class Histogram(Reducer):
+    """
+    Counts the values of a metric (or a parameter) in fixed bins.
+    """
+
+    def __init__(self, name: str, bins: np.ndarray, where: Callable[[Columns], np.ndarray] = None) -> None:
+        super().__init__(where)
+        self._name = name
+        self.bins = np.asarray(bins)
+        self.counts = np.zeros(len(self.bins) - 1, dtype=np.int64)
+
+    def update(self, params: Columns, metrics: Columns) -> None:
+        self.counts += np.histogram(self._select(params, metrics)[self._name], self.bins)[0]
+
+    def result(self) -> np.ndarray:
+        return self.counts
+
+
+class TopK(Reducer):
+    """
+    Keeps the `k` points with the largest (or smallest) value of a metric.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            k: int,
+            largest: bool = True,
+            where: Callable[[Columns], np.ndarray] = None) -> None:
+        super().__init__(where)
+        self._name = name
+        self._k = k
+        self._sign = 1 if largest else -1
+        self._top: Columns = None
+
+    def update(self, params: Columns, metrics: Columns) -> None:
+        rows = _concatenate(self._top, self._select(params, metrics))
+        key = -self._sign * rows[self._name]
+        if len(key) > self._k:
+            rows = _take(rows, np.argpartition(key, self._k - 1)[:self._k])
+        self._top = rows
+
+    def result(self) -> Columns:
+        """
+        Returns the points, best first.
+        """
+        if self._top is None:
+            return {}
+        return _take(self._top, np.argsort(-self._sign * self._top[self._name], kind="stable"))
+
+
+def run_sweep(
+        chunks: Iterable[Columns],
+        evaluate: Callable[[Columns], Columns],
+        reducers: List[Reducer]) -> List[Reducer]:
+    for params in chunks:
+        metrics = evaluate(params)
+        for reducer in reducers:
+            reducer.update(params, metrics)
+    return reducers
+
+
+def main() -> None:
+    import time
+
+    area_envelope = 830e6 * 0.85
+    critical_bw = 1000
+    axes = {
+        "dim_array": np.arange(1, 3300),
+        "dim_block": [4, 8, 16, 32],
+        "len_mantissa": np.arange(2, 9),
+        "clock_frequency": [600e6, 800e6, 1000e6],
+        "area_sram": [0.244803, 1.041666],
+    }
+
+    def feasible_in_bandwidth(metrics: Columns) -> np.ndarray:
+        return metrics["feasible"] & (metrics["bandwidth_offchip"] < critical_bw)
+
+    best = BestUnderConstraint("throughput", where=feasible_in_bandwidth)
+    frontier = ParetoFrontier(["throughput", "performance_density"], where=feasible_in_bandwidth)
+    density = Histogram("performance_density", np.linspace(0, 40, 21), where=lambda m: m["feasible"])
+    top = TopK("performance_density", 5, where=feasible_in_bandwidth)
+
+    start = time.time()
+    run_sweep(grid_chunks(axes), stardust_evaluator(area_envelope, critical_bw), [best, frontier, density, top])
+    print(f"Swept {math.prod(len(v) for v in axes.values())} HBFP configurations in {time.time() - start:.2f} s")
+    print(f"Highest throughput within {critical_bw} GB/s: {best.result()}")
+    print(f"Pareto frontier (throughput, performance density): {len(frontier.result()['throughput'])} points")
+    print(f"Performance density histogram: {density.result()}")
+    for i in range(len(top.result()["performance_density"])):
+        print({name: values[i].item() for name, values in top.result().items()})
+
+
+if __name__ == "__main__":
+    main()
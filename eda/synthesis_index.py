@@ -0,0 +1,74 @@
+import os
+from typing import Dict, Iterable, List, Optional
+from modules import Module
+
+
+class SynthesisIndex:
+    """
+    Maps modules to their synthesis directories in the output tree. The tree
+    is listed once, after that the lookups do not touch the file system.
+    """
+
+    def __init__(self, dirpath: str) -> None:
+        self._dirpath = dirpath
+        self._entries: Dict[Module, str] = {}
+        self.rescan()
+
+    def rescan(self) -> None:
+        """
+        Lists the output tree again, e.g., after new designs are synthesized.
+        """
+        self._entries.clear()
+        if not os.path.isdir(self._dirpath):
+            return
+        for entry in os.listdir(self._dirpath):
+            if not os.path.isdir(f"{self._dirpath}/{entry}"):
+                continue
+            try:
+                module = Module.from_string(entry)
+            except ValueError:
+                print(f"Skipping unrecognized directory: {entry}")
+                continue
+            self._entries[module] = entry
+
+    def __contains__(self, m: Module) -> bool:
+        return m in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def modules(self) -> List[Module]:
+        return list(self._entries.keys())
+
+    def directory(self, m: Module) -> str:
+        """
+        Returns the synthesis directory of the module. For modules which are
+        not synthesized yet, returns the directory they would be placed in.
+        """
+        return f"{self._dirpath}/{self._entries.get(m) or m.to_string()}"
+
+    def report_path(self, m: Module, report: str = "area.log") -> Optional[str]:
+        """
+        Returns the path of the given report file of a synthesized module, or
+        None if the module is not synthesized.
+        """
+        if m not in self._entries:
+            return None
+        return f"{self.directory(m)}/RPT/{m.design_name()}/{report}"
+
+    def missing(self, modules: Iterable[Module]) -> List[Module]:
+        """
+        Returns the modules that are not synthesized yet.
+        """
+        return [m for m in modules if m not in self._entries]
+
+    @staticmethod
+    def job_commands(modules: Iterable[Module]) -> List[str]:
+        """
+        Returns the `synthesize.bash` invocations for the given modules, in
+        the same format that `synthesize_all.bash` generates.
+        """
+        return [
+            f"bash ./synthesize.bash \"{m.to_string()}\" \"{m.design_name()}\""
+            for m in modules
+        ]
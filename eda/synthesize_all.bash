@@ -27,4 +27,7 @@ function list_all() {
     popd
 }
 
-list_all | xargs --max-procs=16 -I CMD bash -c CMD
+PROCESSES=16
+
+# longest predicted runtime first, from the dc_shell.log of the past runs
+list_all | python3 schedule_synthesis.py --processes $PROCESSES | xargs --max-procs=$PROCESSES -I CMD bash -c CMD
@@ -0,0 +1,261 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import time
+import pytest
+from area_db import AreaDatabase
+from data_types import *
+from modules import *
+
+EDA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SlowHandler:
+    def __init__(self) -> None:
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, m: Module):
+        if not isinstance(m, Add) or not isinstance(m.gen, SInt):
+            return None
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.05)
+        return float(m.gen.width)
+
+
+def test_hits_and_misses():
+    area = AreaDatabase()
+    area.add(Add(SInt(8)), 16.0)
+    area.add_on_miss(SlowHandler())
+    assert area(Add(SInt(8))) == 16.0
+    assert area(Add(SInt(40))) == 40.0
+    with pytest.raises(KeyError):
+        area(Multiply(SInt(8)))
+
+
+def test_single_flight_misses():
+    area = AreaDatabase(thread_safe=True)
+    handler = SlowHandler()
+    area.add_on_miss(handler)
+
+    with ThreadPoolExecutor(16) as pool:
+        results = list(pool.map(lambda _: area(Add(SInt(40))), range(64)))
+
+    assert results == [40.0] * 64
+    assert handler.calls == 1
+
+
+def test_single_flight_propagates_errors():
+    area = AreaDatabase(thread_safe=True)
+    area.add_on_miss(SlowHandler())
+
+    def query(_):
+        try:
+            area(Multiply(SInt(8)))
+        except KeyError:
+            return True
+        return False
+
+    with ThreadPoolExecutor(8) as pool:
+        assert all(pool.map(query, range(16)))
+    # nothing is left in flight, a later query tries again
+    with pytest.raises(KeyError):
+        area(Multiply(SInt(8)))
+
+
+def test_writes_while_reading(tmp_path):
+    area = AreaDatabase(thread_safe=True)
+    area.pickle_load(f"{EDA_DIR}/output/cache.pickle")
+    modules = list(area.data().keys())
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            for m in modules:
+                area(m)
+
+    def write():
+        for i in range(200):
+            area.add(Add(SInt(100 + i)), float(i))
+            if i % 20 == 0:
+                area.pickle_save(str(tmp_path / "cache.pickle"))
+        done.set()
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(read) for _ in range(3)] + [pool.submit(write)]
+        for f in futures:
+            f.result()
+
+    saved = AreaDatabase()
+    saved.pickle_load(str(tmp_path / "cache.pickle"))
+    assert saved(Multiply(SInt(8))) == area(Multiply(SInt(8)))
+    assert area(Add(SInt(299))) == 199.0
+
+
+@pytest.fixture
+def output_dir(tmp_path):
+    with open(f"{EDA_DIR}/output/cache.pickle", "rb") as src:
+        (tmp_path / "cache.pickle").write_bytes(src.read())
+    return tmp_path
+
+
+def test_journal_replay(output_dir):
+    snapshot = (output_dir / "cache.pickle").read_bytes()
+    area = AreaDatabase(str(output_dir))
+    area.add(Add(SInt(40)), 80.0)
+    area.add(Multiply(SInt(8)), 1.0)
+    area.close()
+
+    # the snapshot is not rewritten by add()
+    assert (output_dir / "cache.pickle").read_bytes() == snapshot
+
+    area = AreaDatabase(str(output_dir))
+    assert area(Add(SInt(40))) == 80.0
+    assert area(Multiply(SInt(8))) == 1.0
+
+
+def test_journal_skips_estimates(output_dir):
+    area = AreaDatabase(str(output_dir))
+    area.add_on_miss(SlowHandler())
+    area(Add(SInt(40)))
+    area.close()
+    assert not (output_dir / "cache.journal").exists()
+
+
+def test_journal_torn_record(output_dir):
+    area = AreaDatabase(str(output_dir))
+    area.add(Add(SInt(40)), 80.0)
+    area.add(Add(SInt(41)), 82.0)
+    area.close()
+
+    journal = output_dir / "cache.journal"
+    journal.write_bytes(journal.read_bytes()[:-3])
+
+    area = AreaDatabase(str(output_dir))
+    assert area(Add(SInt(40))) == 80.0
+    with pytest.raises(KeyError):
+        area(Add(SInt(41)))
+    # the damaged tail is cut, new records follow the last good one
+    area.add(Add(SInt(42)), 84.0)
+    area.close()
+    area = AreaDatabase(str(output_dir))
+    assert area(Add(SInt(42))) == 84.0
+
+
+def test_compact(output_dir):
+    area = AreaDatabase(str(output_dir))
+    area.add_on_miss(SlowHandler())
+    area(Add(SInt(50)))
+    area.add(Add(SInt(40)), 80.0)
+    area.compact()
+    assert not (output_dir / "cache.journal").exists()
+    assert not (output_dir / "cache.pickle.tmp").exists()
+
+    area = AreaDatabase(str(output_dir))
+    assert area(Add(SInt(40))) == 80.0
+    # estimates are not folded into the snapshot
+    with pytest.raises(KeyError):
+        area(Add(SInt(50)))
+
+
+def test_compact_on_load(output_dir):
+    area = AreaDatabase(str(output_dir), journal_batch=4)
+    for i in range(10):
+        area.add(Add(SInt(100 + i)), float(i))
+    area.close()
+    assert (output_dir / "cache.journal").exists()
+
+    area = AreaDatabase(str(output_dir), compact_threshold=10)
+    assert not (output_dir / "cache.journal").exists()
+    assert area(Add(SInt(109))) == 9.0
+
+
+AREA_LOG = """\
+Hierarchical area distribution
+------------------------------
+
+                                  Global cell area          Local cell area
+                                  ------------------  ---------------------------
+Hierarchical cell                 Absolute   Percent  Combi-    Noncombi-  Black-
+                                  Total      Total    national  national   boxes   Design
+--------------------------------  ---------  -------  --------  ---------  ------  ---------
+{design}  {area}  100.0  {area}  0.0  0.0  {design}
+--------------------------------  ---------  -------  --------  ---------  ------  ---------
+"""
+
+
+class CountingAreaDatabase(AreaDatabase):
+    def __init__(self, *args, **kwargs) -> None:
+        self.parsed = []
+        super().__init__(*args, **kwargs)
+
+    def read_report(self, f, m):
+        self.parsed.append(m)
+        return super().read_report(f, m)
+
+
+@pytest.fixture
+def report_tree(tmp_path):
+    modules = {Add(SInt(w)): 10.0 * w for w in range(8, 14)}
+    for m, area in modules.items():
+        rpt = tmp_path / m.to_string() / "RPT" / m.design_name()
+        os.makedirs(rpt)
+        (rpt / "area.log").write_text(AREA_LOG.format(design=m.design_name(), area=area))
+    return tmp_path, modules
+
+
+def test_lazy_parses_on_lookup(report_tree):
+    tmp_path, modules = report_tree
+    area = CountingAreaDatabase(str(tmp_path), lazy=True)
+    assert area.parsed == []
+    assert area(Add(SInt(9))) == 90.0
+    assert area.parsed == [Add(SInt(9))]
+    assert area(Add(SInt(9))) == 90.0
+    assert len(area.parsed) == 1
+    # the snapshot is only written once complete
+    assert not os.path.exists(tmp_path / "cache.pickle")
+
+    assert area.data() == modules
+    assert sorted(area.parsed, key=str) == sorted(modules, key=str)
+    assert os.path.exists(tmp_path / "cache.pickle")
+    reloaded = CountingAreaDatabase(str(tmp_path), lazy=True)
+    assert reloaded.data() == modules and reloaded.parsed == []
+
+
+def test_lazy_prefetch(report_tree):
+    tmp_path, modules = report_tree
+    area = CountingAreaDatabase(str(tmp_path), lazy=True, prefetch=True, thread_safe=True)
+    assert area(Add(SInt(12))) == 120.0
+    deadline = time.time() + 10
+    while not os.path.exists(tmp_path / "cache.pickle") and time.time() < deadline:
+        time.sleep(0.01)
+    area.close()
+    assert sorted(area.parsed, key=str) == sorted(modules, key=str)
+
+
+def test_lazy_journal_wins_over_report(report_tree):
+    tmp_path, modules = report_tree
+    area = AreaDatabase(str(tmp_path), lazy=True)
+    area.add(Add(SInt(8)), 1.0)
+    area.close()
+    assert not os.path.exists(tmp_path / "cache.pickle")
+
+    area = CountingAreaDatabase(str(tmp_path), lazy=True)
+    assert area(Add(SInt(8))) == 1.0
+    assert area.parsed == []
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_force_rebuild_drops_the_journal(report_tree, lazy):
+    tmp_path, modules = report_tree
+    area = AreaDatabase(str(tmp_path))
+    area.add(Add(SInt(9)), 1.0)
+    area.close()
+    assert AreaDatabase(str(tmp_path))(Add(SInt(9))) == 1.0
+
+    # the reports win over the journal of the previous snapshot
+    area = AreaDatabase(str(tmp_path), force_rebuild=True, lazy=lazy)
+    assert area(Add(SInt(9))) == 90.0
+    area.close()
+    assert not (tmp_path / "cache.journal").exists()
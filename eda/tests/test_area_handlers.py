@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from area_db import AreaDatabase
+from area_handlers import AdderTreeAreaHandler
+from data_types import *
+from fixed_point_estimators import FixedPointEstimators
+from modules import *
+
+
+def synthetic(m: Module):
+    if isinstance(m, Add):
+        return 10.0 * m.gen.width + 3
+    if isinstance(m, Multiply):
+        return 2.0 * m.gen.width ** 2
+    return None
+
+
+@pytest.fixture
+def handler():
+    area = AreaDatabase()
+    area.add_on_miss(synthetic)
+    return AdderTreeAreaHandler(area)
+
+
+def reference(block_size, mantissa_width, exponent_width, accum_width=None):
+    area = block_size * synthetic(Multiply(SInt(mantissa_width))) + synthetic(Add(SInt(exponent_width)))
+    operands, width = block_size, 2 * mantissa_width
+    while operands > 1:
+        area += (operands // 2) * synthetic(Add(SInt(accum_width or width)))
+        operands, width = (operands + 1) // 2, width + 1
+    return area
+
+
+def test_matches_scalar_tree(handler):
+    block_sizes = np.array([1, 2, 3, 4, 7, 16, 33, 64, 100])
+    mantissa_widths = np.array([2, 4, 8])
+    areas = handler.area(block_sizes[:, None], mantissa_widths[None, :], 10)
+    for i, n in enumerate(block_sizes):
+        for j, m in enumerate(mantissa_widths):
+            assert areas[i, j] == pytest.approx(reference(n, m, 10))
+
+
+def test_dot_product_modules(handler):
+    gen = BlockFloatingPoint(32, 10, 6)
+    assert handler(DotProduct(gen)) == pytest.approx(reference(32, 6, 10))
+    assert handler(DotProduct(gen, SInt(12))) == pytest.approx(reference(32, 6, 10, 12))
+    assert handler(DotProduct(FloatingPointVec(4, 8, 7))) is None
+    assert handler(Add(SInt(8))) is None
+
+
+def test_measured_modules_and_clamp():
+    # quadratic multipliers fitted on 8..16 bits: the fit is negative at 2 bits
+    area = AreaDatabase()
+    for w in range(8, 17):
+        for gen in [SInt, UInt]:
+            area.add(Add(gen(w)), 10.0 * w + 3)
+            area.add(Multiply(gen(w)), 2.0 * w ** 2 + 20 * w - 100)
+    estimators = FixedPointEstimators(area, np.arange(8, 17))
+    assert estimators.estimator(Multiply, SInt)(2) < 0
+    area.add_on_miss(estimators)
+    handler = AdderTreeAreaHandler(area)
+    gen = BlockFloatingPoint(4, 10, 2)
+    tree = 2 * (10.0 * 4 + 3) + 10.0 * 5 + 3
+    assert handler(DotProduct(gen)) == pytest.approx(10.0 * 10 + 3 + tree)
+    assert handler.area(4, 2, 10) == pytest.approx(10.0 * 10 + 3 + tree)
+
+    # a measured multiplier is taken over the fit
+    area.add(Multiply(SInt(2)), 3.0)
+    assert handler(DotProduct(gen)) == pytest.approx(4 * 3.0 + 10.0 * 10 + 3 + tree)
+    assert handler.area(4, 2, 10) == pytest.approx(4 * 3.0 + 10.0 * 10 + 3 + tree)
@@ -0,0 +1,146 @@
+import io
+import os
+import numpy as np
+import pytest
+from area_db import AreaDatabase
+from area_hierarchy import AreaHierarchy
+from data_types import *
+from modules import *
+
+AREA_LOG = """\
+****************************************
+Report : area
+****************************************
+
+Hierarchical area distribution
+------------------------------
+
+                                  Global cell area          Local cell area
+                                  ------------------  ---------------------------
+Hierarchical cell                 Absolute   Percent  Combi-    Noncombi-  Black-
+                                  Total      Total    national  national   boxes   Design
+--------------------------------  ---------  -------  --------  ---------  ------  ---------
+{rows}--------------------------------  ---------  -------  --------  ---------  ------  ---------
+Total                                                  0.0       0.0        0.0
+"""
+
+
+def area_log(rows):
+    total = rows[0][1]
+    return AREA_LOG.format(rows="".join(
+        f"{path}  {area}  {100 * area / total:.1f}  {comb}  0.0  0.0  {design}\n"
+        for path, area, comb, design in rows))
+
+
+def dot_product_rows(m: DotProduct, mult: float, add: float):
+    n = m.gen_vec.block_size
+    top = m.design_name()
+    rows = [(top, n * mult + (n - 1) * add + 10, 10, top)]
+    rows += [(f"{top}/mult_{i}", mult, mult, f"Multiply_DW_{i}") for i in range(n)]
+    # a nested adder inside the tree, counted once
+    rows += [(f"{top}/tree", (n - 1) * add, 0, "AdderTree")]
+    rows += [(f"{top}/tree/add_{i}", add, add, f"Add_DW_{i}") for i in range(n - 1)]
+    return rows
+
+
+@pytest.fixture
+def synthesized(tmp_path):
+    modules = {
+        DotProduct(BlockFloatingPoint(4, 10, 4), SInt(8)): (20.0, 8.0),
+        DotProduct(BlockFloatingPoint(8, 10, 4), SInt(8)): (20.0, 8.0),
+        DotProduct(BlockFloatingPoint(4, 10, 8), SInt(16)): (70.0, 16.0),
+    }
+    for m, (mult, add) in modules.items():
+        rpt = tmp_path / m.to_string() / "RPT" / m.design_name()
+        os.makedirs(rpt)
+        (rpt / "area.log").write_text(area_log(dot_product_rows(m, mult, add)))
+    return tmp_path, modules
+
+
+def test_build_from_keeps_hierarchy(synthesized):
+    tmp_path, modules = synthesized
+    area = AreaDatabase(str(tmp_path))
+    assert len(area.hierarchy) == 3
+    assert os.path.exists(tmp_path / "cache_hierarchy.npz")
+
+    m = next(iter(modules))
+    cells = area.hierarchy.cells(m)
+    assert cells["DotProduct"]["global/absolute"] == area(m)
+    assert cells["DotProduct/tree/add_2"]["design"] == "Add_DW_2"
+
+    # reloaded from the snapshot
+    reloaded = AreaDatabase(str(tmp_path))
+    assert reloaded.hierarchy.cells(m) == cells
+
+
+def test_share(synthesized):
+    tmp_path, modules = synthesized
+    hierarchy = AreaDatabase(str(tmp_path)).hierarchy
+    queried = list(modules) + [Add(SInt(8))]
+
+    mult = hierarchy.absolute(queried, design="Multiply_DW", prefix=True)
+    assert np.allclose(mult[:3], [80, 160, 280])
+    assert np.isnan(mult[3])
+
+    adders = hierarchy.absolute(queried, design="Add_DW", prefix=True)
+    tree = hierarchy.absolute(queried, cell="tree")
+    assert np.allclose(adders[:3], tree[:3])
+    # the adders are inside the tree, they are not counted twice
+    assert np.allclose(hierarchy.absolute(queried, design="A", prefix=True)[:3], tree[:3])
+
+    share = hierarchy.share(queried, design="Multiply_DW", prefix=True)
+    assert share[0] == pytest.approx(80 / (80 + 24 + 10))
+    assert np.isnan(share[3])
+
+
+def test_replace_and_save(tmp_path):
+    h = AreaHierarchy()
+    a, b = Multiply(SInt(8)), Add(SInt(8))
+    h.add(a, {"Multiply": {"global/absolute": 5.0, "local/combinational": 5.0, "local/noncombinational": 0.0,
+                           "local/blackboxes": 0.0, "design": "Multiply"}})
+    h.add(b, {"Add": {"global/absolute": 3.0, "local/combinational": 1.0, "local/noncombinational": 0.0,
+                      "local/blackboxes": 0.0, "design": "Add"},
+              "Add/x": {"global/absolute": 2.0, "local/combinational": 2.0, "local/noncombinational": 0.0,
+                        "local/blackboxes": 0.0, "design": "X"}})
+    h.add(a, {"Multiply": {"global/absolute": 6.0, "local/combinational": 6.0, "local/noncombinational": 0.0,
+                           "local/blackboxes": 0.0, "design": "Multiply"}})
+    assert h.modules == [b, a]
+    assert h.absolute([a, b], cell="x")[1] == 2.0
+    h.save(str(tmp_path / "h.npz"))
+    loaded = AreaHierarchy.load(str(tmp_path / "h.npz"))
+    assert loaded.cells(a) == h.cells(a) and loaded.cells(b) == h.cells(b)
+    assert list(loaded.share([a, b], design="X")) == [0.0, 2.0 / 3.0]
+
+
+def test_hierarchy_follows_every_store(synthesized):
+    tmp_path, modules = synthesized
+    m, other, third = modules
+
+    # lazy loads parse the reports with their hierarchy
+    lazy = AreaDatabase(str(tmp_path), lazy=True)
+    assert len(lazy.hierarchy) == 0
+    lazy(m)
+    assert m in lazy.hierarchy and other not in lazy.hierarchy
+    lazy.load_all()
+    assert len(lazy.hierarchy) == 3
+    lazy.close()
+
+    # a value without a report drops the stale hierarchy, also on compact
+    area = AreaDatabase(str(tmp_path))
+    area.add(m, 1.0)
+    assert m not in area.hierarchy
+    area.close()
+    replayed = AreaDatabase(str(tmp_path))
+    assert m not in replayed.hierarchy and other in replayed.hierarchy
+    replayed.compact()
+    replayed.close()
+    assert m not in AreaDatabase(str(tmp_path)).hierarchy
+    assert m not in AreaHierarchy.load(str(tmp_path / "cache_hierarchy.npz"))
+
+    # an ingested report brings it back
+    mult, add = modules[m]
+    area = AreaDatabase(str(tmp_path))
+    area.ingest_report(m, io.StringIO(area_log(dot_product_rows(m, mult, add))))
+    assert area.hierarchy.cells(m)["DotProduct"]["global/absolute"] == area(m)
+    area.save()
+    assert m in AreaHierarchy.load(str(tmp_path / "cache_hierarchy.npz"))
@@ -0,0 +1,97 @@
+import multiprocessing
+import os
+import pytest
+from area_db import AreaDatabase
+from area_sqlite import SqliteAreaStore
+from data_types import *
+from modules import *
+
+EDA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    area = AreaDatabase()
+    area.pickle_load(f"{EDA_DIR}/output/cache.pickle")
+    path = str(tmp_path / "cache.sqlite")
+    store = SqliteAreaStore(path)
+    store.import_database(area)
+    store.close()
+    return path
+
+
+def _reference():
+    area = AreaDatabase()
+    area.pickle_load(f"{EDA_DIR}/output/cache.pickle")
+    return area
+
+
+def test_range_query(store_path):
+    store = SqliteAreaStore(store_path, read_only=True)
+    area = _reference()
+    r = store.select(kind=Add, gen=SInt, width=(8, 16))
+    assert r.modules == [Add(SInt(w)) for w in range(8, 17)]
+    assert list(r.param("width")) == list(range(8, 17))
+    assert list(r.area) == [area(Add(SInt(w))) for w in range(8, 17)]
+
+
+def test_qualified_query(store_path):
+    store = SqliteAreaStore(store_path, read_only=True)
+    r = store.select(
+        kind=FloatingPointToBlockFloatingPoint,
+        gen_fp=FloatingPoint.bfloat16,
+        gen_bfp__exponent_width=10,
+        gen_bfp__mantissa_width=4,
+        block_size=(1, 64))
+    assert r.modules == [
+        FloatingPointToBlockFloatingPoint(FloatingPoint.bfloat16, BlockFloatingPoint(n, 10, 4))
+        for n in [2, 4, 6, 32]
+    ]
+
+
+def test_exact_data_query(store_path):
+    store = SqliteAreaStore(store_path, read_only=True)
+    r = store.select(gen=FloatingPoint.bfloat16)
+    assert {type(m) for m in r.modules} == {Add, Multiply, RELU}
+    assert len(store.select(kind="Accumulator").modules) == 5
+
+
+def test_round_trip(store_path):
+    store = SqliteAreaStore(store_path)
+    store.add(Add(SInt(40)), 1.0)
+    store.add(Add(SInt(40)), 2.0)
+    area = AreaDatabase()
+    store.load_into(area)
+    reference = _reference()
+    assert len(area.data()) == len(reference.data()) + 1
+    assert area(Add(SInt(40))) == 2.0
+    assert area(Multiply(SInt(8))) == reference(Multiply(SInt(8)))
+
+
+def test_load_into_journals_and_notifies(store_path, tmp_path):
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    with open(f"{EDA_DIR}/output/cache.pickle", "rb") as src:
+        (output_dir / "cache.pickle").write_bytes(src.read())
+    store = SqliteAreaStore(store_path)
+    store.add(Add(SInt(40)), 2.0)
+    area = AreaDatabase(str(output_dir))
+    updates = []
+    area.add_on_update(updates.append)
+    store.load_into(area)
+    area.close()
+    # one notification for the whole load
+    assert len(updates) == 1 and Add(SInt(40)) in updates[0]
+
+    # the journal keeps the entries across a reload
+    assert AreaDatabase(str(output_dir))(Add(SInt(40))) == 2.0
+
+
+def _count(path):
+    store = SqliteAreaStore(path, read_only=True)
+    return len(store.select(kind=Multiply, gen=UInt).modules)
+
+
+def test_concurrent_readers(store_path):
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        assert pool.map(_count, [store_path] * 8) == [16] * 8
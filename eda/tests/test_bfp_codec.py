@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from bfp_codec import *
+from bfp_emulator import quantize, dequantize
+from data_types import *
+
+
+@pytest.mark.parametrize("gen_bfp", [BlockFloatingPoint(4, 10, 3), BlockFloatingPoint(16, 8, 8), BlockFloatingPoint(5, 7, 5)])
+def test_pack_round_trip(gen_bfp):
+    rng = np.random.default_rng(0)
+    n = 37
+    exponents = rng.integers(-(1 << (gen_bfp.exponent_width - 1)), 1 << (gen_bfp.exponent_width - 1), n)
+    mantissas = rng.integers(-(1 << (gen_bfp.mantissa_width - 1)), 1 << (gen_bfp.mantissa_width - 1), (n, gen_bfp.block_size))
+    for bit_offset in [0, 3]:
+        packed = pack_blocks(exponents, mantissas, gen_bfp, bit_offset)
+        assert packed.size == -(-(bit_offset + n * gen_bfp.bits()) // 8)
+        e, m = unpack_blocks(packed, n, gen_bfp, bit_offset)
+        assert np.array_equal(e, exponents) and np.array_equal(m, mantissas)
+
+
+@pytest.mark.parametrize("shape", [(3, 5, 19), (1000,), (64, 32), (3, 700)])
+def test_encode_matches_quantize(tmp_path, shape):
+    rng = np.random.default_rng(1)
+    x = rng.normal(0, 1, shape)
+    gen_bfp = BlockFloatingPoint(6, 10, 7)
+    # small chunks to exercise the streaming
+    f = encode(x, str(tmp_path / "x.hbfp"), gen_bfp, chunk_bytes=512)
+    assert f.shape == shape
+    expected = dequantize(*quantize(x, gen_bfp), gen_bfp, shape[-1])
+    assert np.array_equal(f.read(), expected)
+    assert os.path.getsize(tmp_path / "x.hbfp") == packed_size(shape, gen_bfp)
+
+    # block ranges at every bit offset
+    exponents, mantissas = quantize(x.reshape(-1, shape[-1]), gen_bfp)
+    exponents, mantissas = exponents.reshape(-1), mantissas.reshape(-1, gen_bfp.block_size)
+    for start in range(0, 11):
+        e, m = f.blocks(start, start + 5)
+        assert np.array_equal(e, exponents[start:start + 5])
+        assert np.array_equal(m, mantissas[start:start + 5])
+    f.close()
+
+
+def test_memmap_input_and_bytes_per_element(tmp_path):
+    rng = np.random.default_rng(2)
+    np.save(tmp_path / "w.npy", rng.normal(0, 1, (256, 512)).astype(np.float32))
+    x = np.load(tmp_path / "w.npy", mmap_mode="r")
+    gen_bfp = BlockFloatingPoint(16, 10, 8)
+    f = encode(x, str(tmp_path / "w.hbfp"), gen_bfp, chunk_bytes=1 << 16)
+    assert f.bytes_per_element() * 8 == pytest.approx(gen_bfp.bits() / gen_bfp.block_size, rel=1e-3)
+    assert np.array_equal(f.rows(10, 12), f.read()[10:12])
+    f.close()
+
+
+def test_bad_magic(tmp_path):
+    (tmp_path / "x.hbfp").write_bytes(b"NOPE" + bytes(60))
+    with pytest.raises(ValueError):
+        BfpFile(str(tmp_path / "x.hbfp"))
@@ -0,0 +1,219 @@
+import numpy as np
+import pytest
+from bfp_emulator import *
+from data_types import *
+
+"""
+The reference below follows the Scala sources statement by statement, one
+element at a time with Python integers.
+"""
+
+
+def ref_to_fixed_point(sign, exponent, mantissa, gen_fp, width):
+    offset = (1 << (gen_fp.exponent_width - 1)) - 1
+    M = gen_fp.mantissa_width
+    breakpt = offset + width - 1
+    if width > M:
+        a = (1 << (width - 1)) | (mantissa << (width - M - 1))
+    else:
+        a = (1 << (width - 1)) | (mantissa >> (M - (width - 1)))
+    if exponent == 0:
+        u = 0
+    elif exponent > breakpt:
+        u = (1 << width) - 1
+    else:
+        u = a >> (breakpt - exponent)
+    msb = 1 << (width - 1)
+    if not sign:
+        return msb - 1 if u & msb else u
+    a_neg = (-u) & ((1 << width) - 1)
+    if not (a_neg & msb):
+        return -msb
+    return a_neg - (1 << width)
+
+
+def ref_fp2bfp(block, gen_fp, gen_bfp):
+    offset = (1 << (gen_fp.exponent_width - 1)) - 1
+    max_exponent = max(e for _, e, _ in block)
+    k = offset + gen_bfp.mantissa_width - 2
+    d = max_exponent - k
+    d &= (1 << gen_bfp.exponent_width) - 1
+    if d >= 1 << (gen_bfp.exponent_width - 1):
+        d -= 1 << gen_bfp.exponent_width
+    mantissas = []
+    for s, e, m in block:
+        a = e + offset + gen_bfp.mantissa_width
+        b = 2 + max_exponent
+        shifted = 0 if e == 0 else (a - b if a > b else 0)
+        mantissas.append(ref_to_fixed_point(s, shifted, m, gen_fp, gen_bfp.mantissa_width))
+    return d, mantissas
+
+
+@pytest.mark.parametrize("gen_fp", [FloatingPoint.bfloat16, FloatingPoint.fp18, FloatingPoint.ieee_fp16])
+@pytest.mark.parametrize("gen_bfp", [BlockFloatingPoint(4, 10, 4), BlockFloatingPoint(8, 10, 8), BlockFloatingPoint(16, 8, 12)])
+def test_bit_exact(gen_fp, gen_bfp):
+    rng = np.random.default_rng(1)
+    n_blocks = 200
+    shape = (n_blocks, gen_bfp.block_size)
+    sign = rng.integers(0, 2, shape)
+    # concentrate exponents to exercise the in-block shifts, with some zeros
+    exponent = rng.integers(0, 1 << gen_fp.exponent_width, (n_blocks, 1)) - rng.integers(0, 12, shape)
+    exponent = np.clip(exponent, 0, (1 << gen_fp.exponent_width) - 1)
+    exponent[rng.random(shape) < 0.1] = 0
+    mantissa = rng.integers(0, 1 << gen_fp.mantissa_width, shape)
+
+    exponents, mantissas = floating_point_to_block_floating_point(
+        sign.ravel(), exponent.ravel(), mantissa.ravel(), gen_fp, gen_bfp)
+    for b in range(n_blocks):
+        block = list(zip(sign[b].tolist(), exponent[b].tolist(), mantissa[b].tolist()))
+        d, ms = ref_fp2bfp(block, gen_fp, gen_bfp)
+        assert exponents[b] == d
+        assert mantissas[b * gen_bfp.block_size:(b + 1) * gen_bfp.block_size].tolist() == ms
+
+
+def test_encode_matches_from_double():
+    gen_fp = FloatingPoint.bfloat16
+    x = np.array([1.0, -2.5, 3.0e-40, 1e39, 0.0, -0.0, 65504.0])
+    sign, exponent, mantissa = encode_floating_point(x, gen_fp)
+    assert sign.tolist() == [0, 1, 0, 0, 0, 0, 0]
+    assert exponent.tolist() == [127, 128, 0, 255, 0, 0, 142]
+    assert mantissa.tolist() == [0, 0x20, 0, 0x7f, 0, 0, 0x7f]
+    assert decode_floating_point(sign, exponent, mantissa, gen_fp)[:2].tolist() == [1.0, -2.5]
+
+
+def test_quantize_round_trip():
+    rng = np.random.default_rng(2)
+    w = rng.normal(0, 0.02, (8, 100))
+    gen_bfp = BlockFloatingPoint(16, 10, 12)
+    exponents, mantissas = quantize(w, gen_bfp, negative_zero_saturates=False)
+    assert exponents.shape == (8, 7) and mantissas.shape == (8, 112)
+    q = dequantize(exponents, mantissas, gen_bfp, 100)
+    # truncation to bfloat16, then to 10 magnitude bits below the block maximum
+    block_max = np.repeat(np.abs(np.pad(w, ((0, 0), (0, 12)))).reshape(8, 7, 16).max(-1), 16, -1)[:, :100]
+    assert np.all(np.abs(q - w) <= np.abs(w) * 2.0 ** -7 + block_max * 2.0 ** -9)
+
+
+def test_negative_zero_quirk():
+    gen_fp = FloatingPoint.bfloat16
+    gen_bfp = BlockFloatingPoint(2, 10, 4)
+    x = np.array([1.0, -1e-3])
+    _, mantissas = quantize(x, gen_bfp)
+    assert mantissas.tolist() == [4, -8]
+    _, mantissas = quantize(x, gen_bfp, negative_zero_saturates=False)
+    assert mantissas.tolist() == [4, 0]
+
+
+def ref_float_add(a, b, gen_fp):
+    M = gen_fp.mantissa_width
+    if a[1] > b[1] or (a[1] == b[1] and a[2] > b[2]):
+        big, small = a, b
+    else:
+        big, small = b, a
+    diff = big[1] - small[1]
+    s_ext = 0 if diff >= M else ((int(small[1] != 0) << M) | small[2]) >> diff
+    b_ext = (int(big[1] != 0) << M) | big[2]
+    r = b_ext + s_ext if small[0] == big[0] else b_ext - s_ext
+    if r == 0:
+        return 0, 0, 0
+    shift = M + 2 - r.bit_length()
+    mask = (1 << M) - 1
+    if shift > big[1] + 1:
+        sw = (M + 1).bit_length()
+        return big[0], 0, ((r << (big[1] & ((1 << sw) - 1))) >> 1) & mask
+    return big[0], (big[1] - shift + 1) & ((1 << gen_fp.exponent_width) - 1), ((r << shift) >> 1) & mask
+
+
+@pytest.mark.parametrize("gen_fp", [FloatingPoint.bfloat16, FloatingPoint.ieee_fp16])
+def test_floating_point_add_bit_exact(gen_fp):
+    rng = np.random.default_rng(3)
+    n = 5000
+    fields = []
+    for _ in range(2):
+        exponent = rng.integers(0, 1 << gen_fp.exponent_width, n)
+        exponent[rng.random(n) < 0.05] = 0
+        fields.append((rng.integers(0, 2, n), exponent, rng.integers(0, 1 << gen_fp.mantissa_width, n)))
+    # operands with close exponents, including cancellations
+    fields[1][1][:n // 2] = np.clip(fields[0][1][:n // 2] + rng.integers(-2, 3, n // 2), 0, None)
+    fields[1][2][:n // 10] = fields[0][2][:n // 10]
+    result = floating_point_add(fields[0], fields[1], gen_fp)
+    for i in range(n):
+        a = tuple(int(x[i]) for x in fields[0])
+        b = tuple(int(x[i]) for x in fields[1])
+        assert tuple(int(x[i]) for x in result) == ref_float_add(a, b, gen_fp), (a, b)
+
+
+def test_floating_point_add_exact_values():
+    gen_fp = FloatingPoint.ieee_fp32
+    x = np.array([1.5, -3.0, 0.25, 1024.0, 7.0])
+    y = np.array([2.25, 1.0, -0.25, 0.5, -7.0])
+    s = floating_point_add(encode_floating_point(x, gen_fp), encode_floating_point(y, gen_fp), gen_fp)
+    assert np.array_equal(decode_floating_point(*s, gen_fp), x + y)
+
+
+def test_bfp_gemm_accuracy():
+    rng = np.random.default_rng(4)
+    a = rng.normal(0, 1, (40, 96))
+    b = rng.normal(0, 1, (96, 30))
+    errors = error_sweep(
+        a, b, [8], [4, 8, 12], gen_accum=FloatingPoint.ieee_fp32, negative_zero_saturates=False, tile=16)
+    assert errors[0, 0] > errors[0, 1] > errors[0, 2]
+    assert errors[0, 2] < 0.01
+    # tiling does not change the result
+    gen_bfp = BlockFloatingPoint(8, 10, 8)
+    assert np.array_equal(bfp_gemm(a, b, gen_bfp, tile=7), bfp_gemm(a, b, gen_bfp, tile=64))
+
+
+def test_bfp_gemm_tree_overflow():
+    rng = np.random.default_rng(5)
+    a = np.abs(rng.normal(0, 1, (8, 64)))
+    b = np.abs(rng.normal(0, 1, (64, 8)))
+    gen_bfp = BlockFloatingPoint(32, 10, 6)
+    wide = gemm_error(a, b, gen_bfp=gen_bfp, negative_zero_saturates=False)
+    narrow = gemm_error(
+        a, b, gen_bfp=gen_bfp, negative_zero_saturates=False, tree_width=2 * gen_bfp.mantissa_width)
+    assert narrow["relative_frobenius"] > 5 * wide["relative_frobenius"]
+
+
+def test_block_dot_products_large_block():
+    # a block sum of 64 * 63 * 63 >= 2 ** 17 is above the fp16 exponent field
+    gen_bfp = BlockFloatingPoint(64, 10, 8)
+    e = np.array([-6])
+    m = np.full((1, 64), 63)
+    expected = 64 * 63 * 63 * 2.0 ** -12
+    for gen_accum in [FloatingPoint.ieee_fp16, FloatingPoint.ieee_fp32]:
+        result = decode_floating_point(*block_dot_products(e, m, e, m, gen_bfp, gen_accum), gen_accum)
+        assert result[0, 0] == pytest.approx(expected, rel=2.0 ** -gen_accum.mantissa_width)
+
+
+def test_block_dot_products_wrap_exponent():
+    gen_bfp = BlockFloatingPoint(64, 10, 8)
+    gen_accum = FloatingPoint.ieee_fp16
+    m = np.full((1, 64), 63)
+    # in range, the truncated exponents add up to the same result
+    e = np.array([-6])
+    assert np.array_equal(
+        block_dot_products(e, m, e, m, gen_bfp, gen_accum, wrap_exponent=True),
+        block_dot_products(e, m, e, m, gen_bfp, gen_accum))
+    # above the range: saturates, the RTL wraps around
+    e = np.array([3])
+    assert decode_floating_point(*block_dot_products(e, m, e, m, gen_bfp, gen_accum), gen_accum)[0, 0] > 65000
+    rtl = block_dot_products(e, m, e, m, gen_bfp, gen_accum, wrap_exponent=True)
+    assert decode_floating_point(*rtl, gen_accum)[0, 0] < 1
+    # a zero sum: zero, the RTL returns the shared exponents
+    zero = np.zeros((1, 64), dtype=np.int64)
+    assert decode_floating_point(*block_dot_products(e, zero, e, m, gen_bfp, gen_accum), gen_accum)[0, 0] == 0
+    rtl = block_dot_products(e, zero, e, m, gen_bfp, gen_accum, wrap_exponent=True)
+    assert decode_floating_point(*rtl, gen_accum)[0, 0] != 0
+
+
+def test_bfp_gemm_large_positive_blocks():
+    rng = np.random.default_rng(6)
+    # flat blocks: most mantissas close to the largest, the sums above 2 ** 17
+    a = rng.uniform(0.5, 1, (16, 128))
+    b = rng.uniform(0.5, 1, (128, 16))
+    gen_bfp = BlockFloatingPoint(64, 10, 8)
+    fp16 = gemm_error(a, b, gen_bfp=gen_bfp, negative_zero_saturates=False)
+    fp32 = gemm_error(a, b, gen_bfp=gen_bfp, gen_accum=FloatingPoint.ieee_fp32, negative_zero_saturates=False)
+    # the fp16 accumulator only adds its truncation, the block sums do not wrap
+    assert fp16["relative_frobenius"] < fp32["relative_frobenius"] + 2.0 ** -9
+    assert fp16["max_abs"] < 2 * fp32["max_abs"] + 1
@@ -0,0 +1,81 @@
+import pytest
+from area_db import AreaDatabase
+from area_handlers import DotProductAreaHandler
+from cost_graph import *
+from data_types import *
+from modules import *
+
+
+def constant_terms(m: Module):
+    if isinstance(m, (FixedPointWithExponentToFloatingPoint, FloatingPointToBlockFloatingPoint)):
+        return 100.0 + m.gen_fp.bits()
+    return None
+
+
+@pytest.fixture
+def db():
+    area = AreaDatabase()
+    for w in range(1, 33):
+        area.add(Add(SInt(w)), 10.0 * w)
+        area.add(Multiply(SInt(w)), 2.0 * w ** 2)
+    for fp in [FloatingPoint.bfloat16, FloatingPoint.ieee_fp32]:
+        area.add(Add(fp), 500.0)
+        area.add(Multiply(fp), 900.0)
+        area.add(Accumulator(fp), 700.0)
+        area.add(RELU(fp), 50.0)
+    area.add_on_miss(DotProductAreaHandler(area))
+    area.add_on_miss(constant_terms)
+    return area
+
+
+def expected_hbfp(area, n, m, fp=FloatingPoint.bfloat16):
+    dot_product = (n - 1) * area(Add(SInt(2 * m))) + n * area(Multiply(SInt(m))) + area(Add(SInt(10)))
+    return dot_product + 2 * (100.0 + fp.bits()) + area(Accumulator(fp)) + area(RELU(fp))
+
+
+def test_values_and_sharing(db):
+    graph = CostGraph(db)
+    totals = {(n, m): graph_hbfp(graph, FixedPointWithExponent(10, m), FloatingPoint.bfloat16)(n)
+              for n in range(1, 17) for m in range(2, 9)}
+    # the same expression gives the same node
+    assert graph_hbfp(graph, FixedPointWithExponent(10, 4), FloatingPoint.bfloat16)(8) is totals[(8, 4)]
+    assert len(graph.leaf(Accumulator(FloatingPoint.bfloat16)).parents) == len(totals)
+
+    for (n, m), node in totals.items():
+        assert graph.value(node) == pytest.approx(expected_hbfp(db, n, m))
+    # every node is evaluated once
+    assert graph.evaluations == len(graph)
+    for node in totals.values():
+        graph.value(node)
+    assert graph.evaluations == len(graph)
+
+    fpvec = graph_fpvec(graph, FloatingPoint.ieee_fp32)(4)
+    assert graph.value(fpvec) == pytest.approx(3 * 500 + 4 * 900 + 700 + 50)
+    integer = graph_int(graph, 8, FloatingPoint.bfloat16)(16)
+    assert graph.value(integer) == pytest.approx(16 * 128 + 15 * 160 + 700 + 50)
+
+
+def test_incremental_update(db):
+    graph = CostGraph(db)
+    totals = {(n, m): graph_hbfp(graph, FixedPointWithExponent(10, m), FloatingPoint.bfloat16)(n)
+              for n in range(1, 17) for m in range(2, 9)}
+    for node in totals.values():
+        graph.value(node)
+
+    # a new result for the 8-bit adders changes the dot products of HBFP4
+    dot_product = DotProduct(BlockFloatingPoint(8, 10, 4), SInt(8))
+    assert DotProduct(BlockFloatingPoint(8, 10, 4), SInt(8)) in db.dependents(Add(SInt(8)))
+    before = graph.evaluations
+    db.add(Add(SInt(8)), 1000.0)
+    assert db(dot_product) == pytest.approx(7 * 1000.0 + 8 * 32 + 100)
+    for (n, m), node in totals.items():
+        assert graph.value(node) == pytest.approx(expected_hbfp(db, n, m))
+    # the dot product leaf and the total of the 16 HBFP4 block sizes
+    assert graph.evaluations - before == 2 * 16
+
+    # an unrelated update re-evaluates nothing
+    before = graph.evaluations
+    db.add(Multiply(FloatingPoint.ieee_fp32), 1.0)
+    for node in totals.values():
+        graph.value(node)
+    assert graph.evaluations == before
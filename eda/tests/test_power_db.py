@@ -0,0 +1,71 @@
+import os
+import pytest
+from area_handlers import DotProductAreaHandler
+from data_types import *
+from modules import *
+from power_db import PowerDatabase, power_at
+
+POWER_LOG = """\
+****************************************
+Report : power
+        -hier
+****************************************
+
+                                      Switch   Int      Leak     Total
+Hierarchy                             Power    Power    Power    Power    %
+--------------------------------------------------------------------------------
+{design}                             {switch}    0.200 1.00e-03    {total} 100.0
+  sub (Sub_DW01)                         0.010    0.020 1.00e-04    0.030   9.9
+1
+"""
+
+
+def synthesize(dirpath, m, switch):
+    rpt = dirpath / m.to_string() / "RPT" / m.design_name()
+    os.makedirs(rpt)
+    total = switch + 0.2 + 1e-3
+    (rpt / "power.log").write_text(POWER_LOG.format(design=m.design_name(), switch=switch, total=total))
+
+
+def test_power_from_reports(tmp_path):
+    synthesize(tmp_path, Multiply(SInt(4)), 0.5)
+    synthesize(tmp_path, Add(SInt(8)), 0.1)
+    os.makedirs(tmp_path / "op_s16_add")  # no reports yet
+
+    total = PowerDatabase(str(tmp_path))
+    assert total(Multiply(SInt(4))) == pytest.approx(0.701)
+    assert Add(SInt(16)) not in total.data()
+    dynamic = PowerDatabase(str(tmp_path), "dynamic_power")
+    assert dynamic(Add(SInt(8))) == pytest.approx(0.3)
+    leak = PowerDatabase(str(tmp_path), "leak_power")
+    assert leak(Add(SInt(8))) == pytest.approx(1e-3)
+
+    # every metric has its own cache, which is used the next time
+    assert sorted(p for p in os.listdir(tmp_path) if p.endswith(".pickle")) == \
+        ["power_dynamic_power.pickle", "power_leak_power.pickle", "power_total_power.pickle"]
+    os.remove(tmp_path / "op_s4_mult" / "RPT" / "Multiply" / "power.log")
+    assert PowerDatabase(str(tmp_path))(Multiply(SInt(4))) == pytest.approx(0.701)
+
+
+def test_area_handlers_compose_power(tmp_path):
+    synthesize(tmp_path, Multiply(SInt(4)), 0.5)
+    synthesize(tmp_path, Add(SInt(8)), 0.1)
+    synthesize(tmp_path, Add(SInt(10)), 0.05)
+    power = PowerDatabase(str(tmp_path))
+    power.add_on_miss(DotProductAreaHandler(power))
+    m = DotProduct(BlockFloatingPoint(4, 10, 4), SInt(8))
+    assert power(m) == pytest.approx(4 * 0.701 + 3 * 0.301 + 0.251)
+
+
+def test_power_at():
+    # 1 mW of dynamic power at 50 MHz is 16 mW at 800 MHz
+    assert power_at(1.0, 0.5, 800e6) == pytest.approx(16.5e-3)
+
+
+def test_no_reports_no_snapshot(tmp_path):
+    os.makedirs(tmp_path / "op_s8_add")
+    power = PowerDatabase(str(tmp_path))
+    assert len(power.data()) == 0
+    assert not os.path.exists(tmp_path / "power_total_power.pickle")
+    with pytest.raises(KeyError):
+        power(Add(SInt(8)))
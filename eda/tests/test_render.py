@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from render import Axes, Figure, Series, render
+
+pytest.importorskip("matplotlib")
+
+
+def figures(dirpath):
+    x = np.linspace(0, 1, 50)
+    return [
+        Figure(
+            [f"{dirpath}/out/fig{i}.png", f"{dirpath}/out/fig{i}.svg"],
+            [Axes([Series(x, x ** i, label=f"x^{i}", style={"linestyle": "--"})],
+                  title=f"figure {i}", xlim=(0, 1), xticks=[0, 0.5, 1], xticklabels=["0", "1/2", "1"],
+                  grid=True, legend={"loc": "lower right"}),
+             Axes([Series(x, -x)])],
+            figsize=(4, 6), tight_layout=True, rc={"lines.linewidth": 3})
+        for i in range(4)
+    ]
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_render(tmp_path, processes):
+    paths = render(figures(tmp_path), processes=processes)
+    assert paths == [p for f in figures(tmp_path) for p in f.paths]
+    for path in paths:
+        with open(path, "rb") as f:
+            head = f.read(8)
+        assert head.startswith(b"\x89PNG") if path.endswith(".png") else b"<?xml" in head
+
+
+def test_render_keeps_the_backend(tmp_path):
+    import matplotlib
+    import matplotlib.pyplot as plt
+    backend = matplotlib.get_backend()
+    # a backend other than Agg stands for the interactive one of the caller
+    plt.switch_backend("svg")
+    try:
+        render(figures(tmp_path)[:1], processes=1)
+        assert matplotlib.get_backend() == "svg"
+        assert plt.get_fignums() == []
+    finally:
+        plt.switch_backend(backend)
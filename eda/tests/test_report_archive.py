@@ -0,0 +1,100 @@
+import io
+import os
+import tarfile
+import zipfile
+import pytest
+from area_db import AreaDatabase
+from area_handlers import DotProductAreaHandler
+from data_types import *
+from modules import *
+from power_db import PowerDatabase
+from report_archive import ingest, report_member
+from test_area_db import AREA_LOG
+from test_power_db import POWER_LOG
+
+
+def bundle_members(areas, prefix="output"):
+    members = {}
+    for m, area in areas.items():
+        rpt = f"{prefix}/{m.to_string()}/RPT/{m.design_name()}"
+        members[f"{rpt}/area.log"] = AREA_LOG.format(design=m.design_name(), area=area)
+        members[f"{rpt}/power.log"] = POWER_LOG.format(
+            design=m.design_name(), switch=area / 100, total=area / 100 + 0.201)
+        members[f"{rpt}/dc_shell.log"] = "==> Duration: 00:01:00\n"
+    members[f"{prefix}/not_a_module/RPT/X/area.log"] = "garbage"
+    members[f"{prefix}/README"] = "bundle"
+    return members
+
+
+def write_bundle(fpath, members):
+    if fpath.endswith(".zip"):
+        with zipfile.ZipFile(fpath, "w", zipfile.ZIP_DEFLATED) as z:
+            for name, text in members.items():
+                z.writestr(name, text)
+        return
+    mode = "w:gz" if fpath.endswith(".gz") else "w"
+    with tarfile.open(fpath, mode) as tar:
+        for name, text in members.items():
+            data = text.encode()
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+
+def test_report_member():
+    m = Add(SInt(8))
+    assert report_member(f"x/output/{m.to_string()}/RPT/{m.design_name()}/area.log") == (m, "area.log")
+    assert report_member(f"{m.to_string()}/RPT/Wrong/area.log") is None
+    assert report_member(f"{m.to_string()}/area.log") is None
+
+
+@pytest.mark.parametrize("suffix", [".tar", ".tar.gz", ".zip"])
+def test_ingest(tmp_path, suffix):
+    areas = {Add(SInt(w)): 10.0 * w for w in range(8, 12)}
+    areas[Multiply(SInt(4))] = 55.0
+    fpath = str(tmp_path / f"bundle{suffix}")
+    write_bundle(fpath, bundle_members(areas))
+
+    area = AreaDatabase()
+    dynamic = PowerDatabase(None, "dynamic_power")
+    leak = PowerDatabase(None, "leak_power")
+    assert ingest([fpath], [area, dynamic, leak]) == 2 * len(areas)
+    assert area.measured() == areas
+    assert dynamic(Add(SInt(9))) == pytest.approx(0.9 + 0.2)
+    assert leak(Multiply(SInt(4))) == pytest.approx(1e-3)
+    assert len(area.hierarchy) == len(areas)
+    # nothing is extracted
+    assert os.listdir(tmp_path) == [f"bundle{suffix}"]
+
+
+def test_merge_bundles(tmp_path):
+    first = str(tmp_path / "first.tar.gz")
+    second = str(tmp_path / "second.zip")
+    write_bundle(first, bundle_members({Add(SInt(8)): 80.0, Add(SInt(16)): 160.0, Multiply(SInt(4)): 40.0}))
+    write_bundle(second, bundle_members({Add(SInt(8)): 85.0, Add(SInt(10)): 100.0}, prefix="farm/run2/output"))
+
+    area = AreaDatabase()
+    area.add_on_miss(DotProductAreaHandler(area))
+    area.build_from_archive(first)
+    dot_product = DotProduct(BlockFloatingPoint(2, 8, 4), SInt(16))
+    assert area(dot_product) == 160.0 + 2 * 40.0 + 80.0
+
+    updates = []
+    area.add_on_update(updates.append)
+    assert area.build_from_archive(second) == 2
+    assert area.measured() == {Add(SInt(8)): 85.0, Add(SInt(16)): 160.0, Multiply(SInt(4)): 40.0, Add(SInt(10)): 100.0}
+    # the estimate using the replaced report is dropped
+    assert dot_product in set().union(*updates)
+    assert area(dot_product) == 160.0 + 2 * 40.0 + 85.0
+
+
+def test_save_snapshot(tmp_path):
+    fpath = str(tmp_path / "bundle.tar")
+    write_bundle(fpath, bundle_members({Add(SInt(8)): 80.0}))
+    output = tmp_path / "output"
+    os.makedirs(output)
+    area = AreaDatabase(str(output))
+    area.build_from_archive(fpath)
+    area.save()
+    assert AreaDatabase(str(output)).measured() == {Add(SInt(8)): 80.0}
+    assert (output / "cache_hierarchy.npz").exists()
@@ -0,0 +1,166 @@
+import os
+import numpy as np
+import pytest
+from area_db import AreaDatabase
+from data_types import *
+from fixed_point_estimators import register_fixed_point_estimators
+from modules import *
+from result_cache import ResultCache, fingerprint
+
+
+@pytest.fixture
+def area():
+    db = AreaDatabase()
+    for w in range(1, 17):
+        for gen in [SInt, UInt]:
+            db.add(Add(gen(w)), 10.0 * w)
+            db.add(Multiply(gen(w)), 2.0 * w ** 2)
+    register_fixed_point_estimators(db)
+    return db
+
+
+def test_hits_and_keys(tmp_path, area):
+    cache = ResultCache(str(tmp_path), [area])
+    calls = []
+
+    @cache
+    def sweep(gen: FixedPointWithExponent, widths: np.ndarray, scale: float = 1.0):
+        calls.append(gen)
+        return np.array([area(Multiply(SInt(w))) for w in widths]) * scale * gen.mantissa_width
+
+    widths = np.arange(8, 24)
+    first = sweep(FixedPointWithExponent(10, 4), widths)
+    again = sweep(FixedPointWithExponent(10, 4), widths.copy())
+    assert np.array_equal(first, again) and len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # other arguments are other results
+    sweep(FixedPointWithExponent(10, 5), widths)
+    sweep(FixedPointWithExponent(10, 4), widths, scale=2.0)
+    sweep(FixedPointWithExponent(10, 4), widths[:-1])
+    assert len(calls) == 4
+
+    # a new synthesis result changes the fingerprint
+    before = fingerprint(area)
+    area.add(Multiply(SInt(20)), 1.0)
+    assert fingerprint(area) != before
+    assert sweep(FixedPointWithExponent(10, 4), widths)[12] == 4.0
+    assert len(calls) == 5
+
+
+def test_structured_results(tmp_path):
+    cache = ResultCache(str(tmp_path))
+
+    @cache
+    def pair(n: int):
+        return np.arange(n), np.full(n, 3.0)
+
+    @cache
+    def nested(n: int):
+        return np.arange(n), {"a": np.ones(n)}
+
+    @cache
+    def named(n: int):
+        return {"x": np.arange(n), "y": np.zeros((n, 2))}
+
+    for _ in range(2):
+        x, y = pair(3)
+        assert np.array_equal(x, [0, 1, 2]) and np.array_equal(y, [3.0] * 3)
+        result = named(4)
+        assert set(result) == {"x", "y"} and result["y"].shape == (4, 2)
+    assert cache.hits == 2
+    with pytest.raises(TypeError):
+        nested(2)
+
+
+def test_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=3 * 9000)
+
+    @cache
+    def block(i: int):
+        return np.full(1000, i, dtype=np.float64)
+
+    for i in range(3):
+        block(i)
+        # distinct modification times
+        os.utime(f"{tmp_path}/{cache.key(block.__wrapped__, (i,), {})}.npz", ns=(i * 10 ** 9, i * 10 ** 9))
+    # using 0 makes 1 the least recently used
+    block(0)
+    assert cache.hits == 1
+    block(3)
+    files = set(os.listdir(tmp_path))
+    assert len(files) == 3
+    assert f"{cache.key(block.__wrapped__, (1,), {})}.npz" not in files
+    assert f"{cache.key(block.__wrapped__, (0,), {})}.npz" in files
+
+
+def test_callees_in_the_key(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+
+    def helper(x):
+        return x * 2
+
+    @cache
+    def sweep(x):
+        return helper(x)
+
+    assert np.array_equal(sweep(np.arange(3)), [0, 2, 4])
+
+    def helper(x):
+        return x * 3
+
+    assert np.array_equal(sweep(np.arange(3)), [0, 3, 6])
+    assert cache.misses == 2
+
+
+def test_module_edits_in_the_key(tmp_path, monkeypatch):
+    import importlib
+    monkeypatch.syspath_prepend(str(tmp_path))
+    source = """
+import numpy as np
+
+class Cost:
+    @staticmethod
+    def of(x):
+        return x * {k}
+
+def helper(x):
+    return Cost.of(x)
+
+def sweep(x):
+    return helper(np.asarray(x))
+"""
+    (tmp_path / "cached_model.py").write_text(source.format(k=2))
+    import cached_model
+    cache = ResultCache(str(tmp_path / "cache"))
+    assert cache(cached_model.sweep)(3) == 6
+    assert cache(cached_model.sweep)(3) == 6 and cache.hits == 1
+
+    (tmp_path / "cached_model.py").write_text(source.format(k=3))
+    importlib.reload(cached_model)
+    assert cache(cached_model.sweep)(3) == 9
+
+    # a new version drops everything
+    versioned = ResultCache(str(tmp_path / "cache"), version="2")
+    versioned(cached_model.sweep)(3)
+    assert versioned.misses == 1
+
+
+def test_handler_code_in_the_fingerprint():
+    db = AreaDatabase()
+    db.add(Add(SInt(8)), 1.0)
+
+    def handler(m):
+        return None
+
+    db.add_on_miss(handler)
+    before = fingerprint(db)
+
+    other = AreaDatabase()
+    other.add(Add(SInt(8)), 1.0)
+
+    def handler(m):
+        return 1.0
+
+    other.add_on_miss(handler)
+    assert fingerprint(other) != before
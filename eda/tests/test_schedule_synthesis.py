@@ -0,0 +1,128 @@
+import io
+import os
+import subprocess
+import sys
+import pytest
+from analyze_reports import read_synthesis_duration
+from data_types import *
+from modules import *
+from schedule_synthesis import (DEFAULT_DURATION, RuntimeModel, job_module, longest_first, makespan,
+                                module_bits, read_durations)
+from synthesis_index import SynthesisIndex
+
+EDA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DC_SHELL_LOG = """\
+Initializing...
+Information: Updating design information... (UID-85)
+==> Duration: {minutes} min {seconds} sec
+Memory usage for this session 512 Mbytes.
+"""
+
+
+def write_runs(dirpath, durations):
+    for m, seconds in durations.items():
+        os.makedirs(f"{dirpath}/{m.to_string()}")
+        with open(f"{dirpath}/{m.to_string()}/dc_shell.log", "w") as f:
+            f.write(DC_SHELL_LOG.format(minutes=seconds // 60, seconds=seconds % 60))
+
+
+def test_read_synthesis_duration():
+    assert read_synthesis_duration(io.StringIO(DC_SHELL_LOG.format(minutes=12, seconds=7))) == 727
+    assert read_synthesis_duration(io.StringIO(DC_SHELL_LOG.format(minutes=0, seconds=0))) == 0
+    # killed before compile_ultra finished
+    assert read_synthesis_duration(io.StringIO("Initializing...\n")) is None
+
+
+def test_module_bits():
+    assert SInt(8).bits() == 8
+    assert UInt(16).bits() == 16
+    assert module_bits(Multiply(SInt(8))) == 8
+    assert module_bits(Multiply(FloatingPoint.ieee_fp32)) == 32
+    assert module_bits(DotProduct(BlockFloatingPoint(16, 10, 4))) == 16 * 4 + 10
+    assert module_bits(DotProduct(BlockFloatingPoint(16, 10, 4), SInt(8))) == 16 * 4 + 10 + 8
+
+
+def test_read_durations(tmp_path):
+    durations = {Multiply(SInt(8)): 65, Add(SInt(8)): 20}
+    write_runs(tmp_path, durations)
+    # a run in progress
+    os.makedirs(f"{tmp_path}/op_s16_mult")
+    with open(f"{tmp_path}/op_s16_mult/dc_shell.log", "w") as f:
+        f.write("Initializing...\n")
+    os.makedirs(f"{tmp_path}/op_s16_add")
+    assert read_durations(SynthesisIndex(str(tmp_path))) == durations
+
+
+def test_runtime_model_per_kind():
+    # multipliers quadratic in the width, adders linear
+    durations = {
+        **{Multiply(SInt(w)): w * w for w in [4, 8, 16]},
+        **{Add(SInt(w)): 2 * w for w in [4, 8, 16]},
+    }
+    model = RuntimeModel(durations)
+    assert model(Multiply(SInt(32))) == pytest.approx(1024)
+    assert model(Add(SInt(32))) == pytest.approx(64)
+    assert model(Multiply(UInt(12))) == pytest.approx(144)
+
+
+def test_runtime_model_fallbacks():
+    assert RuntimeModel({})(Multiply(SInt(8))) == DEFAULT_DURATION
+    assert RuntimeModel({}, default=5)(None) == 5
+
+    model = RuntimeModel({Multiply(SInt(8)): 100, Add(SInt(8)): 10, Add(SInt(16)): 20})
+    # one width only: the runtime of that width
+    assert model(Multiply(SInt(32))) == pytest.approx(100)
+    # an unseen kind: the fit over every run
+    assert model(RELU(FloatingPoint.bfloat16)) > 0
+    # not a module: the median run
+    assert model(None) == pytest.approx(20)
+
+    # the runtime does not shrink with the width
+    model = RuntimeModel({Add(SInt(8)): 40, Add(SInt(16)): 10})
+    assert model(Add(SInt(64))) == pytest.approx(20)
+
+
+def test_job_module():
+    command, = SynthesisIndex.job_commands([Multiply(FloatingPoint.bfloat16)])
+    assert job_module(command) == Multiply(FloatingPoint.bfloat16)
+    assert job_module('bash ./synthesize.bash "not_a_module" "X"') is None
+    assert job_module("") is None
+
+
+def test_longest_first():
+    modules = [Add(SInt(8)), Multiply(FloatingPoint.ieee_fp64), Add(SInt(16)), Multiply(SInt(8))]
+    commands = SynthesisIndex.job_commands(modules) + ['bash ./synthesize.bash "not_a_module" "X"']
+    model = RuntimeModel({Add(SInt(8)): 10, Add(SInt(16)): 20, Multiply(SInt(8)): 64, Multiply(SInt(16)): 256})
+    jobs = longest_first(commands, model)
+    assert [job_module(command) for command, _ in jobs] == [
+        Multiply(FloatingPoint.ieee_fp64), Multiply(SInt(8)), None, Add(SInt(16)), Add(SInt(8))]
+    durations = [duration for _, duration in jobs]
+    assert durations == sorted(durations, reverse=True)
+
+
+def test_makespan():
+    assert makespan([], 4) == 0
+    assert makespan([4, 1, 1, 1, 1], 2) == 4
+    assert makespan([1, 1, 1, 1, 4], 2) == 6
+    assert makespan([5, 1, 1], 8) == 5
+
+
+def test_longest_first_shortens_the_batch():
+    # a large multiplier listed last starts after the first round
+    durations = [60.0] * 31 + [1800.0]
+    assert makespan(sorted(durations, reverse=True), 16) == 1800
+    assert makespan(durations, 16) == 1860
+
+
+def test_main(tmp_path):
+    write_runs(tmp_path, {Add(SInt(8)): 10, Add(SInt(16)): 20, Multiply(SInt(8)): 64, Multiply(SInt(16)): 256})
+    os.makedirs(f"{tmp_path}/not_a_module")
+    commands = SynthesisIndex.job_commands([Add(SInt(32)), Multiply(SInt(32))])
+    result = subprocess.run(
+        [sys.executable, f"{EDA}/schedule_synthesis.py", "--processes", "1", "--output", str(tmp_path)],
+        input="\n".join(commands) + "\n", capture_output=True, text=True, check=True)
+    assert result.stdout.splitlines() == commands[::-1]
+    # 1024 + 40 seconds
+    assert "Predicted wall-clock time: 0h 17m 44s" in result.stderr
+    assert "Skipping unrecognized directory: not_a_module" in result.stderr
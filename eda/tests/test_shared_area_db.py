@@ -0,0 +1,102 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+import pytest
+from area_db import AreaDatabase
+from area_handlers import DotProductAreaHandler, FloatingPointToBlockFloatingPointAreaHandler
+from data_types import *
+from fixed_point_estimators import register_fixed_point_estimators
+from modules import *
+from shared_area_db import SharedAreaSnapshot
+
+EDA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    Multiply(SInt(8)),  # measured
+    Multiply(SInt(20)),  # fixed-point estimate
+    Add(UInt(24)),  # fixed-point estimate
+    FloatingPointToBlockFloatingPoint(FloatingPoint.bfloat16, BlockFloatingPoint(64, 10, 4)),  # fp2bfp estimate
+    DotProduct(BlockFloatingPoint(16, 10, 4), SInt(8)),  # composed from the above
+]
+
+
+def _make_database() -> AreaDatabase:
+    area = AreaDatabase()
+    area.pickle_load(f"{EDA_DIR}/output/cache.pickle")
+    register_fixed_point_estimators(area)
+    fp2bfp = FloatingPointToBlockFloatingPointAreaHandler(area)
+    fp2bfp.add_estimator(FloatingPoint.bfloat16, FixedPointWithExponent(10, 4), [2, 4, 6, 32])
+    area.add_on_miss(fp2bfp)
+    area.add_on_miss(DotProductAreaHandler(area))
+    return area
+
+
+def _query(name: str):
+    snapshot = SharedAreaSnapshot.attach(name)
+    area = snapshot.database()
+    area.add_on_miss(DotProductAreaHandler(area))
+    result = [area(m) for m in MODULES]
+    snapshot.close()
+    return result
+
+
+@pytest.fixture
+def exported():
+    area = _make_database()
+    expected = [area(m) for m in MODULES]
+    snapshot = SharedAreaSnapshot.export(area)
+    yield snapshot, expected
+    snapshot.close()
+    snapshot.unlink()
+
+
+def test_lookup_and_estimate(exported):
+    snapshot, expected = exported
+    assert snapshot.lookup(Multiply(SInt(8))) == pytest.approx(expected[0])
+    assert snapshot.lookup(Add(SInt(100))) is None
+    assert snapshot.estimate(Multiply(SInt(20))) == pytest.approx(expected[1])
+    assert snapshot.estimate(MODULES[3]) == pytest.approx(expected[3])
+    assert snapshot.estimate(RELU(FloatingPoint.bfloat16)) is None
+
+
+def test_attach_in_process(exported):
+    snapshot, expected = exported
+    assert _query(snapshot.name) == pytest.approx(expected)
+
+
+def test_attach_from_pool(exported):
+    snapshot, expected = exported
+    with multiprocessing.get_context("spawn").Pool(2) as pool:
+        results = pool.map(_query, [snapshot.name] * 4)
+    for result in results:
+        assert result == pytest.approx(expected)
+
+
+def test_unlink_after_workers_attach():
+    # the resource tracker reports problems on stderr of the exporting process
+    script = f"""
+import multiprocessing, sys
+sys.path.insert(0, {EDA_DIR!r})
+sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})
+from test_shared_area_db import _make_database, _query
+from shared_area_db import SharedAreaSnapshot
+
+if __name__ == "__main__":
+    snapshot = SharedAreaSnapshot.export(_make_database())
+    with multiprocessing.get_context("spawn").Pool(2) as pool:
+        pool.map(_query, [snapshot.name] * 4)
+    name = snapshot.name
+    snapshot.close()
+    snapshot.unlink()
+    try:
+        SharedAreaSnapshot.attach(name)
+        print("still exists")
+    except FileNotFoundError:
+        print("unlinked")
+"""
+    r = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=120)
+    assert r.returncode == 0, r.stderr
+    assert r.stdout.strip() == "unlinked"
+    assert "KeyError" not in r.stderr
+    assert "leaked" not in r.stderr
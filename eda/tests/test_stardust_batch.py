@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+from data_types import FloatingPoint
+from stardust import StardustConfigBatch, StardustConfigFloatingPoint, StardustConfigHBFP
+
+METRICS = ["memsz_onchip", "throughput", "area_exec_unit", "area_simd_unit", "area_mem_onchip", "area", "bandwidth_offchip"]
+
+
+def configs():
+    result = []
+    for dim_array in [64, 500, 1999]:
+        for len_mantissa, dim_block in [(2, 4), (4, 16), (8, 32)]:
+            result.append(StardustConfigHBFP(
+                clock_frequency=600e6, dim_array=dim_array, dim_block=dim_block, len_mantissa=len_mantissa,
+                reuse=(3, 7)))
+        for fp in [FloatingPoint.bfloat16, FloatingPoint.ieee_fp32]:
+            result.append(StardustConfigFloatingPoint(dim_array=dim_array, floating_point=fp, reuse=(5, 2)))
+    return result
+
+
+def test_metrics_match_scalar():
+    cfgs = configs()
+    batch = StardustConfigBatch.from_configs(cfgs)
+    for metric in METRICS:
+        expected = [getattr(cfg, metric)() for cfg in cfgs]
+        assert getattr(batch, metric)() == pytest.approx(expected, rel=1e-12), metric
+    assert batch.performance_density(1000) == pytest.approx([cfg.performance_density(1000) for cfg in cfgs])
+
+
+def test_maximize_onchip_area_matches_scalar():
+    cfgs = configs()
+    batch = StardustConfigBatch.from_configs(cfgs)
+    envelope = 830e6 * 0.85
+    feasible = batch.maximize_onchip_area(envelope)
+    for i, cfg in enumerate(cfgs):
+        assert feasible[i] == cfg.maximize_onchip_area(envelope)
+        if feasible[i]:
+            assert batch[i].reuse == cfg.reuse
+
+
+def test_views():
+    batch = StardustConfigBatch.hbfp(dim_array=np.array([128, 256]), len_mantissa=6)
+    assert len(batch) == 2
+    view = batch[1]
+    assert isinstance(view, StardustConfigHBFP)
+    assert view == StardustConfigHBFP(dim_array=256, len_mantissa=6)
+    assert hash(view) == hash(StardustConfigHBFP(dim_array=256, len_mantissa=6))
+    assert view.area() == pytest.approx(batch.area()[1])
+
+    # writes go to the columns
+    view.reuse = (2, 9)
+    view.floating_point = FloatingPoint.ieee_fp16
+    assert (batch.columns["reuse_x"][1], batch.columns["reuse_w"][1]) == (2, 9)
+    assert batch[1].floating_point == FloatingPoint.ieee_fp16
+    assert batch[0].reuse == (12, 12)
+    assert batch[-1].to_config() == StardustConfigHBFP(
+        dim_array=256, len_mantissa=6, floating_point=FloatingPoint.ieee_fp16, reuse=(2, 9))
+
+    both = StardustConfigBatch.concatenate([batch, StardustConfigBatch.floating_point(dim_array=[64, 32])])
+    assert isinstance(both[3], StardustConfigFloatingPoint)
+    assert list(both.select(both.columns["dim_array"] < 200).columns["dim_array"]) == [128, 64, 32]
+
+
+def synthetic_power(scale):
+    from area_db import AreaDatabase
+    from data_types import SInt, UInt
+    from modules import Add, Multiply
+    from stardust import register_handlers
+
+    def cost(m):
+        if not isinstance(m, (Add, Multiply)):
+            return None
+        if isinstance(m.gen, (SInt, UInt)):
+            return scale * (m.gen.width if isinstance(m, Add) else m.gen.width ** 2)
+        return scale * 100.0 * m.gen.bits()
+
+    db = AreaDatabase()
+    db.add_on_miss(cost)
+    register_handlers(db)
+    return db
+
+
+def test_power_matches_scalar(monkeypatch):
+    import stardust
+    dynamic, leak = synthetic_power(1e-3), synthetic_power(1e-5)
+    monkeypatch.setattr(stardust, "_power", (dynamic, leak))
+    cfgs = configs()
+    batch = StardustConfigBatch.from_configs(cfgs)
+    assert batch.power_exec_unit() == pytest.approx([cfg.power_exec_unit() for cfg in cfgs], rel=1e-12)
+    assert batch.power_exec_unit(dynamic, leak) == pytest.approx(batch.power_exec_unit(), rel=1e-12)
+    assert batch.performance_per_watt(1000) == pytest.approx([cfg.performance_per_watt(1000) for cfg in cfgs])
+    assert batch.energy_per_op() == pytest.approx([cfg.energy_per_op() for cfg in cfgs])
+
+
+def test_power_failure_is_cached(monkeypatch, tmp_path):
+    import stardust
+    loads = []
+
+    class CountingPowerDatabase(stardust.PowerDatabase):
+        def __init__(self, *args, **kwargs):
+            loads.append(args)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(stardust, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(stardust, "PowerDatabase", CountingPowerDatabase)
+    monkeypatch.setattr(stardust, "_power", None)
+    monkeypatch.setattr(stardust, "_power_error", None)
+    # no power reports: the estimators cannot be fitted
+    with pytest.raises(KeyError):
+        stardust.power()
+    assert stardust._power is None
+    with pytest.raises(KeyError):
+        stardust.power()
+    assert len(loads) == 2
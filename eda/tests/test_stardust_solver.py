@@ -0,0 +1,60 @@
+import dataclasses
+import pytest
+from data_types import FloatingPoint
+from stardust import StardustConfigBatch, StardustConfigFloatingPoint, StardustConfigHBFP
+
+CONFIGS = [
+    StardustConfigHBFP(len_mantissa=4),
+    StardustConfigHBFP(len_mantissa=8, dim_block=32, clock_frequency=1e9),
+    StardustConfigFloatingPoint(floating_point=FloatingPoint.bfloat16),
+    StardustConfigFloatingPoint(floating_point=FloatingPoint.ieee_fp32, clock_frequency=600e6),
+]
+
+
+def scan(cfg, area_envelope, memory_bandwidth, reuse, max_dim_array=4000):
+    best = None
+    for n in range(1, max_dim_array + 1):
+        c = dataclasses.replace(cfg, dim_array=n)
+        if reuse:
+            fits = c.maximize_onchip_area(area_envelope)
+        else:
+            c.reuse = (1, 1)
+            fits = c.area() <= area_envelope
+        if fits and (memory_bandwidth is None or c.bandwidth_offchip() < memory_bandwidth):
+            best = c
+    return best
+
+
+@pytest.mark.parametrize("cfg", CONFIGS)
+@pytest.mark.parametrize("reuse", [True, False])
+def test_matches_scan(cfg, reuse):
+    for area_envelope, memory_bandwidth in [(830e6 * 0.85, 1000), (300e6, 500), (830e6, None)]:
+        expected = scan(cfg, area_envelope, memory_bandwidth, reuse)
+        assert cfg.solve_dim_array(area_envelope, memory_bandwidth, reuse, max_dim_array=4000) == expected
+
+
+def test_crossings_and_evaluations():
+    cfg = StardustConfigHBFP(len_mantissa=4)
+    calls = []
+
+    class Counting(StardustConfigHBFP):
+        def maximize_onchip_area(s, area_envelope):
+            calls.append(s.dim_array)
+            return super().maximize_onchip_area(area_envelope)
+
+    counting = Counting(**{f.name: getattr(cfg, f.name) for f in dataclasses.fields(cfg)})
+    area_limit, bandwidth_limit = counting.crossings(830e6 * 0.85, 1000)
+    assert len(calls) <= 2 * 17
+    assert area_limit == scan(cfg, 830e6 * 0.85, None, True).dim_array
+    assert bandwidth_limit == scan(cfg, 830e6 * 0.85, 1000, True).dim_array
+    assert bandwidth_limit < area_limit
+    assert cfg.crossings(1.0, 1000) == (0, 0)
+    assert cfg.solve_dim_array(1.0) is None
+
+
+def test_batch_view():
+    batch = StardustConfigBatch.hbfp(dim_array=[16, 32], len_mantissa=6)
+    solved = batch[1].solve_dim_array(830e6 * 0.85, 1000)
+    assert type(solved) is StardustConfigHBFP
+    assert batch.columns["dim_array"][1] == 32
+    assert solved == StardustConfigHBFP(len_mantissa=6).solve_dim_array(830e6 * 0.85, 1000)
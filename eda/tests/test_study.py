@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from stardust import StardustConfigBatch
+from study import *
+
+
+@pytest.fixture(scope="module")
+def cube(tmp_path_factory):
+    return run_study(
+        str(tmp_path_factory.mktemp("study")),
+        formats=["hbfp4", "hbfp6n32", "bfloat16"],
+        dim_array=np.arange(1, 3300, 7),
+        area_sram=[0.244803, 1.041666],
+        efficiency=[0.75, 0.85],
+        critical_bw=[500, 1000],
+        clock_frequency=[800e6, 1000e6],
+        chunk_size=1000)
+
+
+def test_layout(cube):
+    assert cube.shape == (3, 2, 1, 2, 2, 2, 472)
+    assert list(cube.axes["format"]) == ["hbfp4", "hbfp6n32", "bfloat16"]
+    for name in METRICS:
+        assert isinstance(cube[name], np.memmap) and cube[name].shape == cube.shape
+
+
+def test_matches_batch(cube):
+    point = cube.sel(format="hbfp6n32", area_sram=1.041666, reticle_size=830e6, efficiency=0.75,
+                     critical_bw=500, clock_frequency=1000e6)
+    assert list(point.axes) == ["dim_array"]
+
+    dim_array = cube.axes["dim_array"]
+    batch = StardustConfigBatch.hbfp(len_mantissa=6, dim_block=32, dim_array=dim_array,
+                                     clock_frequency=1000e6, area_sram=1.041666)
+    feasible = batch.maximize_onchip_area(830e6 * 0.75)
+    assert np.array_equal(point["feasible"], feasible)
+    assert np.array_equal(point["reuse"], batch.columns["reuse_x"])
+    assert np.allclose(point["throughput"], batch.throughput())
+    assert np.allclose(point["performance_density"], batch.performance_density(500))
+    assert np.array_equal(point["within_bandwidth"], batch.bandwidth_offchip() < 500)
+
+
+def test_sel_keeps_listed_axes(cube):
+    sub = cube.sel(format=["bfloat16", "hbfp4"], critical_bw=1000)
+    assert list(sub.axes) == ["format", "area_sram", "reticle_size", "efficiency", "clock_frequency", "dim_array"]
+    assert list(sub.axes["format"]) == ["bfloat16", "hbfp4"]
+    assert np.array_equal(sub["area"][1], cube["area"][0, :, :, :, 1])
+    with pytest.raises(KeyError):
+        cube.sel(format="fp32")
+
+
+def test_best(cube):
+    best = cube.sel(format="hbfp4", reticle_size=830e6, efficiency=0.85, critical_bw=1000, clock_frequency=800e6) \
+        .best("throughput", where=["feasible", "within_bandwidth"])
+    assert list(best.axes) == ["area_sram"]
+    for i, area_sram in enumerate(best.axes["area_sram"]):
+        point = cube.sel(format="hbfp4", area_sram=area_sram, reticle_size=830e6, efficiency=0.85,
+                         critical_bw=1000, clock_frequency=800e6)
+        ok = point["feasible"] & point["within_bandwidth"]
+        j = np.argmax(np.where(ok, point["throughput"], -np.inf))
+        assert best["dim_array"][i] == cube.axes["dim_array"][j]
+        assert best["throughput"][i] == point["throughput"][j]
+    # denser SRAM leaves room for a larger array
+    assert best["dim_array"][0] > best["dim_array"][1]
+
+
+def test_best_without_candidates(cube):
+    smallest = cube.sel(dim_array=[1, 8]).best("area_exec_unit", where=None, maximize=False)
+    assert np.all(smallest["dim_array"] == 1)
+    none = cube.sel(dim_array=[3298]).best("throughput", where="feasible")
+    assert np.all(np.isnan(none["throughput"])) and np.all(np.isnan(none["dim_array"]))
+
+
+def test_format_batch():
+    assert format_batch("hbfp4n8", dim_array=np.array([2])).columns["dim_block"][0] == 8
+    with pytest.raises(ValueError):
+        format_batch("int8", dim_array=np.array([2]))
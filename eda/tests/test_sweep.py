@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from sweep import *
+
+
+def brute_force_pareto(values):
+    n = len(values)
+    keep = np.ones(n, dtype=bool)
+    for i in range(n):
+        dominated = np.all(values >= values[i], axis=1) & np.any(values > values[i], axis=1)
+        keep[i] = not dominated.any()
+    return keep
+
+
+@pytest.mark.parametrize("k", [2, 3])
+def test_pareto_mask(k):
+    rng = np.random.default_rng(k)
+    values = rng.integers(0, 20, (300, k)).astype(float)
+    keep = pareto_mask(values)
+    expected = brute_force_pareto(values)
+    # duplicates of a frontier point are kept once
+    assert {tuple(v) for v in values[keep]} == {tuple(v) for v in values[expected]}
+    assert keep.sum() == len({tuple(v) for v in values[expected]})
+
+
+def test_grid_chunks():
+    axes = {"a": [1, 2, 3], "b": [10, 20], "c": [0.5, 1.5, 2.5, 3.5]}
+    chunks = list(grid_chunks(axes, chunk_size=5))
+    assert len(chunks) == 5 and all(len(c["a"]) <= 5 for c in chunks)
+    points = {(a, b, c) for chunk in chunks for a, b, c in zip(chunk["a"], chunk["b"], chunk["c"])}
+    assert points == {(a, b, c) for a in axes["a"] for b in axes["b"] for c in axes["c"]}
+
+
+def test_reducers_match_full_evaluation():
+    axes = {"x": np.arange(50), "y": np.linspace(-1, 1, 31)}
+
+    def evaluate(params):
+        x, y = params["x"], params["y"]
+        return {"f": x * np.cos(3 * y), "g": (50 - x) * y ** 2, "ok": x % 3 != 0}
+
+    def ok(metrics):
+        return metrics["ok"]
+
+    reducers = [
+        BestUnderConstraint("f", where=ok),
+        BestUnderConstraint("g", maximize=False),
+        ParetoFrontier(["f", "g"], where=ok),
+        Histogram("f", np.linspace(-50, 50, 11)),
+        TopK("g", 7, where=ok),
+    ]
+    run_sweep(grid_chunks(axes, chunk_size=64), evaluate, reducers)
+
+    full = next(grid_chunks(axes, chunk_size=10 ** 6))
+    full.update(evaluate(full))
+    mask = full["ok"]
+    best = reducers[0].result()
+    assert best["f"] == full["f"][mask].max() and best["x"] % 3 != 0
+    assert reducers[1].result()["g"] == full["g"].min()
+
+    frontier = reducers[2].result()
+    values = np.stack([full["f"][mask], full["g"][mask]], axis=-1)
+    expected = {tuple(v) for v in values[brute_force_pareto(values)]}
+    assert set(zip(frontier["f"], frontier["g"])) == expected
+    assert np.all(np.diff(frontier["f"]) >= 0)
+
+    assert np.array_equal(reducers[3].result(), np.histogram(full["f"], np.linspace(-50, 50, 11))[0])
+    assert list(reducers[4].result()["g"]) == sorted(full["g"][mask], reverse=True)[:7]
+
+
+def test_stardust_sweep_matches_batch():
+    axes = {"dim_array": np.arange(100, 3300, 50), "len_mantissa": [2, 4, 8], "dim_block": [8, 16]}
+    evaluate = stardust_evaluator(830e6 * 0.85, 1000)
+    best = BestUnderConstraint(
+        "throughput", where=lambda m: m["feasible"] & (m["bandwidth_offchip"] < 1000))
+    run_sweep(grid_chunks(axes, chunk_size=100), evaluate, [best])
+    full = next(grid_chunks(axes, chunk_size=10 ** 6))
+    metrics = evaluate(full)
+    mask = metrics["feasible"] & (metrics["bandwidth_offchip"] < 1000)
+    assert best.result()["throughput"] == metrics["throughput"][mask].max()
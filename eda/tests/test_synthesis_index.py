@@ -0,0 +1,83 @@
+import os
+import pickle
+import pytest
+from data_types import *
+from modules import *
+from modules import _registered_modules
+from synthesis_index import SynthesisIndex
+
+CACHE = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + "/output/cache.pickle"
+
+SAMPLES = [
+    Multiply(SInt(8)),
+    Multiply(FloatingPoint.bfloat16),
+    Add(UInt(16)),
+    Add(FloatingPoint.ieee_fp32),
+    RELU(FloatingPoint.fp18),
+    DotProduct(BlockFloatingPoint(16, 10, 4)),
+    DotProduct(BlockFloatingPoint(16, 10, 4), SInt(8)),
+    DotProduct(FloatingPointVec(32, 8, 7)),
+    FixedPointWithExponentToFloatingPoint(FixedPointWithExponent(10, 16), FloatingPoint.bfloat16),
+    FloatingPointToBlockFloatingPoint(FloatingPoint.bfloat16, BlockFloatingPoint(32, 10, 8)),
+    Accumulator(FloatingPoint.ieee_fp16),
+]
+
+
+def test_samples_cover_registered_modules():
+    assert set(_registered_modules) == {type(m) for m in SAMPLES}
+
+
+@pytest.mark.parametrize("m", SAMPLES, ids=repr)
+def test_round_trip(m):
+    assert Module.from_string(m.to_string()) == m
+
+
+def test_round_trip_cached_modules():
+    with open(CACHE, "rb") as f:
+        data = pickle.load(f)
+    for m in data:
+        assert Module.from_string(m.to_string()) == m
+
+
+def test_names():
+    assert Multiply(SInt(8)).to_string() == "op_s8_mult"
+    assert DotProduct(BlockFloatingPoint(16, 10, 4)).to_string() == "op_bfpn16e10m4_dot"
+    assert DotProduct(BlockFloatingPoint(16, 10, 4), SInt(8)).to_string() == "op_bfpn16e10m4_s8_dot"
+    assert FixedPointWithExponentToFloatingPoint(
+        FixedPointWithExponent(10, 16), FloatingPoint.bfloat16).to_string() == "fxe2fp_fxe10m16_fpe8m7"
+
+
+def test_cached_string_does_not_affect_equality():
+    a = Multiply(SInt(8))
+    a.to_string()
+    b = Multiply(SInt(8))
+    assert a == b and hash(a) == hash(b)
+    assert pickle.loads(pickle.dumps(a)) == b
+
+
+def test_index(tmp_path):
+    synthesized = [Multiply(SInt(8)), Accumulator(FloatingPoint.bfloat16)]
+    for m in synthesized:
+        os.makedirs(tmp_path / m.to_string() / "RPT" / m.design_name())
+    os.makedirs(tmp_path / "not_a_module")
+    (tmp_path / "cache.pickle").write_bytes(b"")
+
+    index = SynthesisIndex(str(tmp_path))
+    assert len(index) == 2
+    assert set(index.modules()) == set(synthesized)
+    assert Multiply(SInt(8)) in index
+    assert Add(SInt(8)) not in index
+
+    assert index.report_path(Multiply(SInt(8))) == f"{tmp_path}/op_s8_mult/RPT/Multiply/area.log"
+    assert index.report_path(Accumulator(FloatingPoint.bfloat16), "power.log") == \
+        f"{tmp_path}/accum_fpe8m7/RPT/Accumulator/power.log"
+    assert index.report_path(Add(SInt(8))) is None
+    assert index.directory(Add(SInt(8))) == f"{tmp_path}/op_s8_add"
+
+    assert index.missing([Add(SInt(8)), Multiply(SInt(8))]) == [Add(SInt(8))]
+    assert SynthesisIndex.job_commands([Add(SInt(8))]) == ['bash ./synthesize.bash "op_s8_add" "Add"']
+
+    os.makedirs(tmp_path / "op_s8_add")
+    assert Add(SInt(8)) not in index
+    index.rescan()
+    assert Add(SInt(8)) in index
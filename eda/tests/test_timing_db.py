@@ -0,0 +1,138 @@
+import io
+import os
+import pytest
+from analyze_reports import read_timing_data
+from data_types import *
+from modules import *
+from stardust import StardustConfigFloatingPoint, StardustConfigHBFP
+from timing_db import TimingDatabase, register_timing_estimators
+
+TIMING_LOG = """\
+****************************************
+Report : timing
+        -path full
+        -delay max
+        -max_paths 1
+****************************************
+
+  Startpoint: io_in_a[3] (input port clocked by global_clk)
+  Endpoint: io_out[7] (output port clocked by global_clk)
+  Path Group: global_clk
+  Path Type: max
+
+  Point                                    Incr       Path
+  -----------------------------------------------------------
+  clock global_clk (rise edge)             0.00       0.00
+  clock network delay (ideal)              0.00       0.00
+  input external delay                     0.10       0.10 f
+  io_in_a[3] (in)                          0.00       0.10 f
+  U12/ZN (ND2D1BWP35)                      {delay:.2f}       {arrival:.2f} r
+  io_out[7] (out)                          0.00       {arrival:.2f} r
+  data arrival time                                   {arrival:.2f}
+
+  clock global_clk (rise edge)            20.00      20.00
+  clock network delay (ideal)              0.00      20.00
+  output external delay                   -0.20      19.80
+  data required time                                 19.80
+  -----------------------------------------------------------
+  data required time                                 19.80
+  data arrival time                                  -{arrival:.2f}
+  -----------------------------------------------------------
+  slack (MET)                                        {slack:.2f}
+
+
+1
+"""
+
+
+def timing_log(delay: float) -> str:
+    arrival = 0.1 + delay
+    return TIMING_LOG.format(delay=delay, arrival=arrival, slack=19.8 - arrival)
+
+
+def test_read_timing_data():
+    timing = read_timing_data(io.StringIO(timing_log(1.5)))
+    assert timing["startpoint"] == "io_in_a[3]"
+    assert timing["endpoint"] == "io_out[7]"
+    assert timing["path_group"] == "global_clk"
+    assert timing["data_arrival_time"] == pytest.approx(1.6)
+    assert timing["data_required_time"] == pytest.approx(19.8)
+    assert timing["clock_period"] == pytest.approx(20.0)
+    assert timing["slack"] == pytest.approx(18.2)
+    assert timing["startpoint_kind"] == "input port"
+    assert timing["endpoint_kind"] == "output port"
+
+
+def register_path_log(delay: float, output: bool) -> str:
+    # a pipeline: from a register, to a register or to an output port
+    log = TIMING_LOG.replace(
+        "  Startpoint: io_in_a[3] (input port clocked by global_clk)",
+        "  Startpoint: r0_b_exponent_reg_3_\n"
+        "              (rising edge-triggered flip-flop clocked by global_clk)")
+    log = log.replace("  input external delay                     0.10       0.10 f\n", "")
+    log = log.replace("  io_in_a[3] (in)                          0.00       0.10 f\n", "")
+    if not output:
+        log = log.replace(
+            "  Endpoint: io_out[7] (output port clocked by global_clk)",
+            "  Endpoint: r1_result_mantissa_reg_7_ (rising edge-triggered flip-flop clocked by global_clk)")
+        log = log.replace("output external delay                   -0.20", "library setup time                      -0.20")
+    return log.format(delay=delay, arrival=delay, slack=19.8 - delay)
+
+
+def test_io_delays_only_on_port_paths():
+    timing = read_timing_data(io.StringIO(register_path_log(1.5, output=False)))
+    assert timing["startpoint"] == "r0_b_exponent_reg_3_"
+    assert timing["startpoint_kind"] == "rising edge-triggered flip-flop"
+    assert timing["endpoint_kind"] == "rising edge-triggered flip-flop"
+
+    db = TimingDatabase()
+    # in to out: both constraints removed
+    assert db.read_report(io.StringIO(timing_log(1.5)), Add(SInt(8))) == pytest.approx(1.5)
+    # register to register: the setup time is part of the path
+    assert db.read_report(io.StringIO(register_path_log(1.5, output=False)), Add(SInt(8))) == pytest.approx(1.7)
+    # register to out: only the output delay removed
+    assert db.read_report(io.StringIO(register_path_log(1.5, output=True)), Add(SInt(8))) == pytest.approx(1.5)
+
+
+def delay(m: Module) -> float:
+    if isinstance(m, Add):
+        return 0.1 * m.gen.width if isinstance(m.gen, (SInt, UInt)) else 2.0
+    if isinstance(m, Multiply):
+        return 0.02 * m.gen.width ** 2 if isinstance(m.gen, (SInt, UInt)) else 3.0
+    return 0.05 * m.gen_fxe.mantissa_width + 1
+
+
+@pytest.fixture
+def timing(tmp_path):
+    synthesized = [hwgen(datagen(n)) for hwgen in [Add, Multiply] for datagen in [SInt, UInt] for n in range(8, 17)]
+    synthesized += [Add(FloatingPoint.bfloat16), Multiply(FloatingPoint.bfloat16)]
+    synthesized += [
+        FixedPointWithExponentToFloatingPoint(FixedPointWithExponent(10, w), FloatingPoint.bfloat16) for w in [8, 16]]
+    for m in synthesized:
+        rpt = tmp_path / m.to_string() / "RPT" / m.design_name()
+        os.makedirs(rpt)
+        (rpt / "timing.log").write_text(timing_log(delay(m)))
+    db = TimingDatabase(str(tmp_path))
+    register_timing_estimators(db)
+    return db
+
+
+def test_timing_database(timing):
+    assert timing(Add(SInt(12))) == pytest.approx(1.2, abs=0.01)
+    assert timing(Add(SInt(24))) == pytest.approx(2.4, abs=0.05)
+    assert timing(Multiply(SInt(4))) == pytest.approx(0.32, abs=0.05)
+    gen = BlockFloatingPoint(16, 10, 6)
+    assert timing(DotProduct(gen, SInt(12))) == pytest.approx(0.02 * 36 + 4 * 1.2, abs=0.05)
+    assert timing(DotProduct(FloatingPointVec(8, 8, 7))) == pytest.approx(3.0 + 3 * 2.0, abs=0.01)
+    fxe2fp = FixedPointWithExponentToFloatingPoint(FixedPointWithExponent(10, 12), FloatingPoint.bfloat16)
+    assert timing(fxe2fp) == pytest.approx(1.6, abs=0.01)
+
+
+def test_stardust_critical_path(timing):
+    hbfp = StardustConfigHBFP(len_mantissa=4, dim_block=16)
+    assert hbfp.critical_path(timing) == pytest.approx(2.0, abs=0.05)  # the bfloat16 adder
+    hbfp = StardustConfigHBFP(len_mantissa=8, dim_block=16)
+    assert hbfp.critical_path(timing) == pytest.approx(0.02 * 64 + 2.1, abs=0.05)
+    fp = StardustConfigFloatingPoint(floating_point=FloatingPoint.bfloat16)
+    # the pipelined adder does not add to the multiplier
+    assert fp.critical_path(timing) == pytest.approx(3.0, abs=0.01)
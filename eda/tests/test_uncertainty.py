@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+from area_db import AreaDatabase
+from area_handlers import DotProductAreaHandler
+from data_types import *
+from fixed_point_estimators import FixedPointEstimators, PolynomialEstimator, register_fixed_point_estimators
+from modules import *
+from stardust import StardustConfigBatch, register_handlers
+from uncertainty import *
+
+
+def noisy_area(noise: float = 5.0) -> AreaDatabase:
+    rng = np.random.default_rng(0)
+    area = AreaDatabase()
+    for w in range(2, 17):
+        for gen in [SInt, UInt]:
+            area.add(Add(gen(w)), 10.0 * w + 3 + noise * rng.standard_normal())
+            area.add(Multiply(gen(w)), 2.0 * w ** 2 + noise * rng.standard_normal())
+    for fp in [FloatingPoint.bfloat16, FloatingPoint.ieee_fp32]:
+        area.add(Add(fp), 500.0 + fp.bits())
+        area.add(Multiply(fp), 900.0 + fp.bits())
+    return area
+
+
+def test_residual_std():
+    x = np.arange(10)
+    y = 3 * x + np.random.default_rng(1).standard_normal(10)
+    estimator = PolynomialEstimator(1, x, y)
+    residuals = y - estimator(x)
+    assert estimator.residual_std == pytest.approx(np.sqrt(np.sum(residuals ** 2) / 8))
+    assert PolynomialEstimator(1, [1, 2], [3, 5]).residual_std == 0
+
+
+def test_sampled_database():
+    area = noisy_area()
+    db = SampledDatabase(area, 4000, seed=0)
+    register_fixed_point_estimators(db)
+    estimators = db.on_miss_handlers()[0]
+
+    # measured modules are exact
+    assert db(Add(SInt(8))) == area(Add(SInt(8)))
+
+    m = Add(SInt(24))
+    samples = db(m)
+    assert samples.shape == (4000,)
+    assert db(m) is samples
+    assert np.mean(samples) == pytest.approx(FixedPointEstimators(area, np.arange(8, 17))(m), rel=1e-2)
+    assert np.std(samples) == pytest.approx(estimators.residual_std(m), rel=0.1)
+    assert estimators.residual_std(DotProduct(BlockFloatingPoint(4, 8, 4))) is None
+
+
+def test_composed_samples():
+    db = SampledDatabase(noisy_area(), 100, seed=0)
+    register_fixed_point_estimators(db)
+    db.add_on_miss(DotProductAreaHandler(db))
+    gen = BlockFloatingPoint(16, 20, 18)
+    expected = 15 * db(Add(SInt(36))) + 16 * db(Multiply(SInt(18))) + db(Add(SInt(20)))
+    assert np.allclose(db(DotProduct(gen)), expected)
+
+
+def test_sampled_batch():
+    area = noisy_area()
+    batch = StardustConfigBatch.hbfp(dim_array=np.array([64, 512]), len_mantissa=np.array([4, 8]))
+    area_sram = sample_area_sram(3, seed=0)
+    assert np.all((AREA_SRAM_RANGE[0] <= area_sram) & (area_sram <= AREA_SRAM_RANGE[1]))
+    sampled = sampled_batch(batch, area_sram)
+    assert len(sampled) == 6
+    assert np.array_equal(sampled.columns["sample"], [0, 1, 2, 0, 1, 2])
+
+    # exact fits give every sample the point costs
+    exact = noisy_area(noise=0)
+    point = SampledDatabase(exact, 3)
+    register_handlers(exact)
+    register_handlers(point)
+    assert np.allclose(sampled.area_exec_unit(point).reshape(2, 3), batch.area_exec_unit(exact)[:, None])
+
+    db = SampledDatabase(area, 3, seed=0)
+    register_handlers(db)
+    costs = sampled.area_exec_unit(db).reshape(2, 3)
+    m = 8
+    d2 = 512 ** 2
+    # 16 multipliers and a tree of 8, 4, 2 and 1 adders
+    tree = sum(n * db(Add(SInt(2 * m + level))) for level, n in enumerate([8, 4, 2, 1]))
+    dot_product = 16 * db(Multiply(SInt(m))) + tree
+    expected = d2 / 16 * (dot_product + db(Add(FloatingPoint.bfloat16))) + d2 / 256 * db(Add(SInt(10)))
+    assert np.allclose(costs[1], expected)
+    assert costs[1].std() > 0
+
+
+def test_best_per_sample():
+    objective = np.array([[1.0, 5.0, 2.0], [3.0, 4.0, 1.0], [2.0, 9.0, 0.0]])
+    mask = np.array([[True, True, False], [True, True, False], [False, False, False]])
+    assert list(best_per_sample(objective, mask)) == [1, 0, -1]
+    low, mid, high = bands(np.array([[1.0, 2.0, 3.0, np.nan]]), (0, 0.5, 1))
+    assert (low[0], mid[0], high[0]) == (1, 2, 3)
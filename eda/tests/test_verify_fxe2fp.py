@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from bfp_emulator import fixed_point_with_exponent_to_floating_point
+from data_types import FixedPointWithExponent, FloatingPoint
+from verify_fxe2fp import chunks, reference, verify
+
+
+def ref_hw(exponent, mantissa, gen_fxe, gen_fp):
+    """
+    FixedPointWithExponentToFloatingPoint, one input at a time.
+    """
+    w = gen_fxe.mantissa_width
+    M = gen_fp.mantissa_width
+    offset = (1 << (gen_fp.exponent_width - 1)) - 1
+    exponent_mask = (1 << gen_fp.exponent_width) - 1
+    sign = 1 if mantissa < 0 else 0
+    ext = abs(mantissa)
+    # PriorityEncoder(Reverse(ext)) over w + 1 bits
+    shift = w
+    for i in range(w + 1):
+        if ext & (1 << (w - i)):
+            shift = i
+            break
+    shifted = ext << shift
+    if w >= M:
+        fp_mantissa = (shifted >> (w - M)) & ((1 << M) - 1)
+    else:
+        fp_mantissa = (shifted & ((1 << w) - 1)) << (M - w)
+    fp_exponent = 0 if mantissa == 0 else (w + offset - shift) & exponent_mask
+    if exponent > 0:
+        result_exponent = (fp_exponent + exponent) & exponent_mask
+    elif fp_exponent >= -exponent:
+        result_exponent = fp_exponent + exponent
+    else:
+        result_exponent = 0
+    return sign, result_exponent, fp_mantissa
+
+
+@pytest.mark.parametrize("gen_fxe", [FixedPointWithExponent(5, 6), FixedPointWithExponent(6, 10)])
+@pytest.mark.parametrize("gen_fp", [FloatingPoint(5, 7), FloatingPoint(4, 3)])
+def test_model_matches_rtl(gen_fxe, gen_fp):
+    e, m = np.meshgrid(
+        np.arange(-(1 << (gen_fxe.exponent_width - 1)), 1 << (gen_fxe.exponent_width - 1)),
+        np.arange(-(1 << (gen_fxe.mantissa_width - 1)), 1 << (gen_fxe.mantissa_width - 1)))
+    e, m = e.ravel(), m.ravel()
+    hw = fixed_point_with_exponent_to_floating_point(e, m, gen_fxe, gen_fp)
+    for i in range(e.shape[0]):
+        assert (hw[0][i], hw[1][i], hw[2][i]) == ref_hw(int(e[i]), int(m[i]), gen_fxe, gen_fp)
+
+
+def test_reference_values():
+    gen_fp = FloatingPoint.bfloat16
+    sign, exponent, mantissa, _ = reference(np.array([0, -3, 2, -200, 200]), np.array([1, -3, 5, 1, 1]), gen_fp)
+    # 1, -3/8, 20, underflow, overflow
+    assert sign.tolist() == [0, 1, 0, 0, 0]
+    assert exponent.tolist() == [127, 125, 131, 0, 255]
+    assert mantissa.tolist() == [0, 0x40, 0x20, 0, 0x7f]
+
+
+def test_chunks_cover_input_space():
+    gen_fxe = FixedPointWithExponent(6, 10)
+    c = list(chunks(gen_fxe, FloatingPoint.bfloat16, 1 << 12))
+    assert c[0][2] == -32 and c[-1][3] == 32
+    assert all(a[3] == b[2] for a, b in zip(c, c[1:]))
+
+
+def test_verify():
+    gen_fxe = FixedPointWithExponent(6, 10)
+    report = verify(gen_fxe, FloatingPoint.bfloat16, processes=2, chunk_size=1 << 12)
+    assert sum(report.inputs.values()) == 1 << 16
+    assert report.mismatches["normal"] == 0
+    # a zero mantissa with a positive exponent does not give zero
+    assert report.mismatches["zero"] == 31
+    assert not report.passed()
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from data_types import FloatingPoint
+from stardust import StardustConfigFloatingPoint, StardustConfigHBFP
+from workload import Workload, simulate
+
+
+def test_from_csv(tmp_path):
+    (tmp_path / "w.csv").write_text("name,M,N,K\na,1,2,3\nb,4,5,6\n")
+    w = Workload.from_csv(str(tmp_path / "w.csv"))
+    assert w.names == ["a", "b"]
+    assert list(w.ops()) == [6, 120]
+
+
+def test_single_layer_by_hand():
+    cfg = StardustConfigFloatingPoint(
+        clock_frequency=1e9, dim_array=100, floating_point=FloatingPoint.bfloat16, reuse=(2, 3))
+    w = Workload(["l"], np.array([250]), np.array([700]), np.array([100]))
+    r = simulate(w, [cfg], memory_bandwidth=1)
+    # 3 x 7 x 1 tiles of 100 cycles each
+    assert (r.tiles_m[0, 0], r.tiles_n[0, 0], r.tiles_k[0, 0]) == (3, 7, 1)
+    assert r.compute_time[0, 0] == pytest.approx(2100e-9)
+    assert r.utilization[0, 0] == pytest.approx(250 * 700 * 100 / (2100 * 100 ** 2))
+    # activations: 3 tiles x ceil(7 / 3) fetches, weights: 7 tiles x ceil(3 / 2)
+    tile_bytes = 100 ** 2 * 16 / 8
+    assert r.traffic[0, 0] == pytest.approx((3 * 3 + 7 * 2) * tile_bytes + 250 * 700 * 2)
+    assert r.memory_time[0, 0] == pytest.approx(r.traffic[0, 0] / 1e9)
+    assert r.memory_bound()[0, 0]
+
+
+def test_vectorized_over_configs_and_layers():
+    configs = [
+        StardustConfigHBFP(dim_array=d, len_mantissa=4, reuse=(4, 4)) for d in [64, 128, 256]
+    ] + [StardustConfigFloatingPoint(dim_array=128)]
+    w = Workload(["a", "b", "c"], np.array([128, 1000, 64]), np.array([768, 64, 4096]), np.array([768, 512, 128]))
+    r = simulate(w, configs, memory_bandwidth=500)
+    assert r.time.shape == (4, 3)
+    for i, cfg in enumerate(configs):
+        single = simulate(w, [cfg], memory_bandwidth=500)
+        assert np.allclose(single.time[0], r.time[i])
+    # HBFP moves fewer bytes than bfloat16 on the same array
+    assert np.all(r.traffic[1] < r.traffic[3])
+    assert np.all(r.utilization <= 1)
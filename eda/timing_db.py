@@ -0,0 +1,99 @@
+from typing import Dict, List, TextIO, Tuple, Union
+from analyze_reports import read_timing_data
+from area_db import AreaDatabase
+from data_types import BlockFloatingPoint, FloatingPoint, FloatingPointVec, SInt
+from fixed_point_estimators import PolynomialEstimator, register_fixed_point_estimators
+from modules import Add, DotProduct, FixedPointWithExponentToFloatingPoint, Module, Multiply
+import numpy as np
+
+# set_input_delay and set_output_delay in syn.tcl
+INPUT_DELAY = 0.1
+OUTPUT_DELAY = 0.2
+
+
+class TimingDatabase(AreaDatabase):
+    """
+    Maps modules to the delay of their critical path in ns, from `timing.log`:
+    the clock period minus the slack, without the input delay of a path
+    starting at an input port and the output delay of a path ending at an
+    output port, which `syn.tcl` constrains every design with.
+    """
+
+    CACHE_NAME = "timing"
+    REPORT = "timing.log"
+
+    def read_report(self, f: TextIO, m: Module) -> float:
+        timing = read_timing_data(f)
+        delay = timing["clock_period"] - timing["slack"]
+        if timing.get("startpoint_kind", None) == "input port":
+            delay = delay - INPUT_DELAY
+        if timing.get("endpoint_kind", None) == "output port":
+            delay = delay - OUTPUT_DELAY
+        return delay
+
+
+class DotProductTimingHandler:
+    """
+    Estimates the critical path of the dot products as a multiplier followed
+    by the adder tree, one adder per level.
+    """
+
+    def __init__(self, timing_db: AreaDatabase) -> None:
+        self._timing_db = timing_db
+
+    def __call__(self, m: Module) -> Union[float, None]:
+        if not isinstance(m, DotProduct):
+            return None
+
+        gen = m.gen_vec
+        levels = int(np.ceil(np.log2(gen.block_size)))
+        if isinstance(gen, BlockFloatingPoint):
+            mult = self._timing_db(Multiply(SInt(gen.mantissa_width)))
+            add = self._timing_db(Add(SInt(2 * gen.mantissa_width) if m.gen_accum is None else m.gen_accum))
+            return mult + levels * add
+
+        if isinstance(gen, FloatingPointVec):
+            mult = self._timing_db(Multiply(gen.as_floating_point()))
+            add = self._timing_db(Add(gen.as_floating_point()))
+            return mult + levels * add
+
+        return None
+
+
+class FixedPointWithExponentToFloatingPointTimingHandler:
+    """
+    Fits the critical path of the synthesized fxe2fp converters linearly in
+    the input mantissa width, per output format and exponent width.
+    """
+
+    def __init__(self, timing_db: AreaDatabase) -> None:
+        samples: Dict[Tuple[FloatingPoint, int], List[Tuple[int, float]]] = {}
+        for m, delay in timing_db.measured().items():
+            if isinstance(m, FixedPointWithExponentToFloatingPoint):
+                key = (m.gen_fp, m.gen_fxe.exponent_width)
+                samples.setdefault(key, []).append((m.gen_fxe.mantissa_width, delay))
+
+        self._estimators: Dict[Tuple[FloatingPoint, int], PolynomialEstimator] = {}
+        for key, points in samples.items():
+            if len(points) >= 2:
+                x, y = zip(*points)
+                self._estimators[key] = PolynomialEstimator(1, x, y)
+
+    def __call__(self, m: Module) -> Union[float, None]:
+        if not isinstance(m, FixedPointWithExponentToFloatingPoint):
+            return None
+
+        estimator = self._estimators.get((m.gen_fp, m.gen_fxe.exponent_width), None)
+        if estimator is None:
+            return None
+
+        return float(estimator(m.gen_fxe.mantissa_width))
+
+
+def register_timing_estimators(timing_db: AreaDatabase) -> None:
+    """
+    Registers the critical path estimators of the building blocks.
+    """
+    register_fixed_point_estimators(timing_db)
+    timing_db.add_on_miss(DotProductTimingHandler(timing_db))
+    timing_db.add_on_miss(FixedPointWithExponentToFloatingPointTimingHandler(timing_db))
@@ -0,0 +1,144 @@
+"""
+Monte Carlo propagation of the estimation uncertainty.
+
+A `SampledDatabase` returns `samples` values of every module: the measured
+modules are exact, the estimates of the fitted handlers (the ones with a
+`residual_std(m)`) get normal noise with the residual standard deviation of
+their fit and the composing handlers, registered on the sampled database as
+on an `AreaDatabase`, combine the samples. The costs of `cost_hbfp()` and the
+others are then arrays over the samples, and a `StardustConfigBatch` takes
+the sample of every row from its `sample` column.
+"""
+
+from typing import Callable, Dict, List, Tuple, Union
+import numpy as np
+from area_db import AreaDatabase
+from modules import Module
+from stardust import StardustConfigBatch
+
+# the two SRAM densities of stardust.py, um^2/bit
+AREA_SRAM_RANGE = (0.244803, 1.041666)
+
+
+class SampledDatabase:
+    def __init__(self, db: AreaDatabase, samples: int, seed: int = None) -> None:
+        self._db = db
+        self.samples = samples
+        self._rng = np.random.default_rng(seed)
+        self._measured = db.measured()
+        self._data: Dict[Module, Union[float, np.ndarray]] = {}
+        self._on_miss: List[Callable[[Module], Union[float, None]]] = []
+
+    def add_on_miss(self, on_miss: Callable[[Module], Union[float, None]]) -> None:
+        self._on_miss.append(on_miss)
+
+    def on_miss_handlers(self) -> List[Callable[[Module], Union[float, None]]]:
+        return self._on_miss
+
+    def measured(self) -> Dict[Module, float]:
+        return self._measured
+
+    def _resolve(self, m: Module) -> np.ndarray:
+        for on_miss in self._on_miss:
+            r = on_miss(m)
+            if r is None:
+                continue
+            std = on_miss.residual_std(m) if hasattr(on_miss, "residual_std") else None
+            if std:
+                # a cost cannot be negative
+                r = np.maximum(r + std * self._rng.standard_normal(self.samples), 0)
+            return r
+        raise KeyError(f"We cannot find an estimation for {m} in the {type(self).__name__}")
+
+    def __call__(self, m: Module) -> Union[float, np.ndarray]:
+        """
+        Returns the measured cost, or the samples of the estimated cost
+        (drawn once per module).
+        """
+        r = self._measured.get(m, None)
+        if r is not None:
+            return r
+        r = self._data.get(m, None)
+        if r is None:
+            r = self._resolve(m)
+            self._data[m] = r
+        return r
+
+
+def sample_area_sram(samples: int, seed: int = None, low: float = AREA_SRAM_RANGE[0],
+                     high: float = AREA_SRAM_RANGE[1]) -> np.ndarray:
+    """
+    Draws SRAM densities log-uniformly between the two competing values.
+    """
+    rng = np.random.default_rng(seed)
+    return np.exp(rng.uniform(np.log(low), np.log(high), samples))
+
+
+def sampled_batch(batch: StardustConfigBatch, area_sram: np.ndarray) -> StardustConfigBatch:
+    """
+    Repeats every configuration for every sample, configuration-major, with
+    its sample index and SRAM density. Reshape the results to
+    `(len(batch), len(area_sram))`.
+    """
+    samples = len(area_sram)
+    columns = {name: np.repeat(c, samples) for name, c in batch.columns.items()}
+    columns["sample"] = np.tile(np.arange(samples), len(batch))
+    columns["area_sram"] = np.tile(area_sram, len(batch))
+    return StardustConfigBatch(**columns)
+
+
+def bands(samples: np.ndarray, quantiles: Tuple[float, ...] = (0.05, 0.5, 0.95), axis: int = -1) -> np.ndarray:
+    """
+    Returns the quantiles of the samples (NaN samples ignored), stacked on
+    the first axis.
+    """
+    return np.nanquantile(samples, quantiles, axis=axis)
+
+
+def best_per_sample(objective: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    Returns, for every sample (the columns), the index of the configuration
+    (the rows) with the highest objective among the masked ones, -1 if none.
+    """
+    score = np.where(mask, objective, -np.inf)
+    best = np.argmax(score, axis=0)
+    return np.where(mask.any(axis=0), best, -1)
+
+
+def main() -> None:
+    from data_types import FixedPointWithExponent, FloatingPoint
+    import main as costs
+    import stardust
+
+    samples = 2000
+
+    # area ratios of the dot-product pipelines
+    db = SampledDatabase(costs.area, samples, seed=0)
+    costs.assign_handlers(db)
+    block_sizes = np.array([4, 8, 16, 32, 48])
+    fp_cost = np.stack([
+        np.broadcast_to(costs.cost_fpvec(FloatingPoint.ieee_fp32, breakdown=True, db=db)(n).total(), samples)
+        for n in block_sizes
+    ])
+    for m in [2, 4, 8]:
+        cost = costs.cost_hbfp(FixedPointWithExponent(10, m), FloatingPoint.bfloat16, breakdown=True, db=db)
+        ratio = fp_cost / np.stack([np.broadcast_to(cost(n).total(), samples) for n in block_sizes])
+        for n, (low, mid, high) in zip(block_sizes, bands(ratio).T):
+            print(f"FP32/HBFP{m}, block size {n}: {mid:.2f} (90% band {low:.2f} - {high:.2f})")
+
+    # the optimal HBFP4 array under the SRAM density prior and the fit noise
+    db = SampledDatabase(stardust.area, samples, seed=1)
+    stardust.register_handlers(db)
+    dim_array = np.arange(16, 3300, 4)
+    batch = sampled_batch(StardustConfigBatch.hbfp(dim_array=dim_array), sample_area_sram(samples, seed=2))
+    feasible = batch.maximize_onchip_area(830e6 * 0.85, db=db)
+    within = feasible & (batch.bandwidth_offchip() < 1000)
+    best = best_per_sample(batch.throughput().reshape(len(dim_array), samples),
+                           within.reshape(len(dim_array), samples))
+    optimal = np.where(best >= 0, dim_array[best], np.nan).astype(np.float64)
+    low, mid, high = bands(optimal)
+    print(f"Optimal HBFP4 dim_array: {mid:.0f} (90% band {low:.0f} - {high:.0f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Exhaustive verification of the FixedPointWithExponent-to-FloatingPoint
+conversion (`blockfloat/FixedPointWithExponentToFloating.scala`) against an
+exact reference.
+"""
+from dataclasses import dataclass, field
+import multiprocessing
+from typing import Dict, Iterator, List, Optional, Tuple
+from bfp_emulator import exponent_offset, fixed_point_with_exponent_to_floating_point
+from data_types import FixedPointWithExponent, FloatingPoint
+import numpy as np
+
+# input classes, by the exact result
+CLASSES = ["zero", "normal", "underflow", "overflow"]
+
+# number of mismatching inputs kept per class
+SAMPLES = 8
+
+
+@dataclass
+class VerificationReport:
+    gen_fxe: FixedPointWithExponent
+    gen_fp: FloatingPoint
+    inputs: Dict[str, int] = field(default_factory=lambda: {c: 0 for c in CLASSES})
+    mismatches: Dict[str, int] = field(default_factory=lambda: {c: 0 for c in CLASSES})
+    # (exponent, mantissa) inputs that did not match
+    samples: Dict[str, List[Tuple[int, int]]] = field(default_factory=lambda: {c: [] for c in CLASSES})
+
+    def merge(self, other: "VerificationReport") -> None:
+        for c in CLASSES:
+            self.inputs[c] += other.inputs[c]
+            self.mismatches[c] += other.mismatches[c]
+            self.samples[c] = sorted(self.samples[c] + other.samples[c])[:SAMPLES]
+
+    def passed(self) -> bool:
+        return sum(self.mismatches.values()) == 0
+
+    def __str__(self) -> str:
+        lines = [f"{self.gen_fxe} -> {self.gen_fp}: {'PASS' if self.passed() else 'FAIL'}"]
+        for c in CLASSES:
+            lines.append(f"    {c:<10} {self.mismatches[c]:>10} / {self.inputs[c]:>10} mismatches")
+            if len(self.samples[c]) > 0:
+                lines.append(f"        e.g. (exponent, mantissa) = {self.samples[c][:4]}")
+        return "\n".join(lines)
+
+
+def reference(
+        exponent: np.ndarray,
+        mantissa: np.ndarray,
+        gen_fp: FloatingPoint) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Converts `mantissa * 2 ** exponent` to `gen_fp` exactly, truncating the
+    mantissa like the hardware. Results below the normal range flush to
+    zero, results above it saturate to the largest magnitude. Returns the
+    fields and the class index of every input.
+    """
+    exponent = np.asarray(exponent, dtype=np.int64)
+    mantissa = np.asarray(mantissa, dtype=np.int64)
+    mantissa_width = gen_fp.mantissa_width
+    max_exponent = (1 << gen_fp.exponent_width) - 1
+
+    magnitude = np.abs(mantissa)
+    length = np.frexp(magnitude.astype(np.float64))[1].astype(np.int64)
+    biased = exponent_offset(gen_fp) + length - 1 + exponent
+    # the bits after the leading one, aligned to the mantissa field
+    shift = mantissa_width + 1 - length
+    fraction = np.where(
+        shift >= 0,
+        magnitude << np.maximum(shift, 0),
+        magnitude >> np.maximum(-shift, 0)) & ((1 << mantissa_width) - 1)
+
+    cls = np.where(
+        magnitude == 0, CLASSES.index("zero"),
+        np.where(biased < 1, CLASSES.index("underflow"),
+                 np.where(biased > max_exponent, CLASSES.index("overflow"), CLASSES.index("normal"))))
+    zero = (cls == CLASSES.index("zero")) | (cls == CLASSES.index("underflow"))
+    overflow = cls == CLASSES.index("overflow")
+
+    sign = np.where(zero, 0, (mantissa < 0).astype(np.int64))
+    result_exponent = np.where(zero, 0, np.where(overflow, max_exponent, biased))
+    result_mantissa = np.where(zero, 0, np.where(overflow, (1 << mantissa_width) - 1, fraction))
+    return sign, result_exponent, result_mantissa, cls
+
+
+def verify_chunk(args: Tuple[FixedPointWithExponent, FloatingPoint, int, int]) -> VerificationReport:
+    """
+    Checks every mantissa for the exponents in `[exponent_low, exponent_high)`.
+    """
+    gen_fxe, gen_fp, exponent_low, exponent_high = args
+    mantissas = np.arange(-(1 << (gen_fxe.mantissa_width - 1)), 1 << (gen_fxe.mantissa_width - 1), dtype=np.int64)
+    exponent, mantissa = np.meshgrid(
+        np.arange(exponent_low, exponent_high, dtype=np.int64), mantissas, indexing="ij")
+    exponent = exponent.ravel()
+    mantissa = mantissa.ravel()
+
+    hw = fixed_point_with_exponent_to_floating_point(exponent, mantissa, gen_fxe, gen_fp)
+    *ref, cls = reference(exponent, mantissa, gen_fp)
+    bad = (hw[0] != ref[0]) | (hw[1] != ref[1]) | (hw[2] != ref[2])
+
+    report = VerificationReport(gen_fxe, gen_fp)
+    inputs = np.bincount(cls, minlength=len(CLASSES))
+    mismatches = np.bincount(cls[bad], minlength=len(CLASSES))
+    for i, c in enumerate(CLASSES):
+        report.inputs[c] = int(inputs[i])
+        report.mismatches[c] = int(mismatches[i])
+        idx = np.flatnonzero(bad & (cls == i))[:SAMPLES]
+        report.samples[c] = [(int(exponent[j]), int(mantissa[j])) for j in idx]
+    return report
+
+
+def chunks(
+        gen_fxe: FixedPointWithExponent,
+        gen_fp: FloatingPoint,
+        chunk_size: int) -> Iterator[Tuple[FixedPointWithExponent, FloatingPoint, int, int]]:
+    exponents_per_chunk = max(1, chunk_size >> gen_fxe.mantissa_width)
+    low = -(1 << (gen_fxe.exponent_width - 1))
+    high = 1 << (gen_fxe.exponent_width - 1)
+    for e in range(low, high, exponents_per_chunk):
+        yield (gen_fxe, gen_fp, e, min(e + exponents_per_chunk, high))
+
+
+def verify(
+        gen_fxe: FixedPointWithExponent,
+        gen_fp: FloatingPoint,
+        processes: Optional[int] = None,
+        chunk_size: int = 1 << 20) -> VerificationReport:
+    """
+    Checks all `2 ** (exponent_width + mantissa_width)` inputs, split into
+    chunks of about `chunk_size` inputs, which bounds the memory per worker.
+    """
+    report = VerificationReport(gen_fxe, gen_fp)
+    with multiprocessing.Pool(processes) as pool:
+        for r in pool.imap_unordered(verify_chunk, chunks(gen_fxe, gen_fp, chunk_size)):
+            report.merge(r)
+    return report
+
+
+def main() -> None:
+    import time
+    for mantissa_width in [16, 14, 12]:
+        start = time.time()
+        report = verify(FixedPointWithExponent(10, mantissa_width), FloatingPoint.bfloat16)
+        print(report)
+        print(f"    ({time.time() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
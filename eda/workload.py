@@ -0,0 +1,151 @@
+"""
+Layer-level GEMM workloads on Stardust configurations.
+
+A layer computes `C (M x N) = A (M x K) @ B (K x N)`, with `A` the
+activations and `B` the weights, on a `dim_array x dim_array` array that
+multiplies a pair of `dim_array x dim_array` tiles in `dim_array` cycles. With
+a reuse of `(x, w)`, `x` activation tiles and `w` weight tiles are kept on
+chip, so every activation tile is fetched once for every `w` weight tile
+columns and every weight tile once for every `x` activation tile rows.
+Outputs are written once in the floating-point format.
+
+Every quantity is computed on arrays of shape `(configs, layers)`.
+"""
+
+import csv
+import dataclasses
+from typing import List
+import numpy as np
+from stardust import StardustConfig, StardustConfigHBFP
+
+
+@dataclasses.dataclass(frozen=True)
+class Workload:
+    names: List[str]
+    m: np.ndarray
+    n: np.ndarray
+    k: np.ndarray
+
+    @staticmethod
+    def from_csv(fpath: str) -> "Workload":
+        """
+        Reads a CSV file with the columns `name`, `M`, `N` and `K`.
+        """
+        with open(fpath, newline="") as f:
+            rows = list(csv.DictReader(f))
+        return Workload(
+            [row["name"] for row in rows],
+            np.array([int(row["M"]) for row in rows], dtype=np.int64),
+            np.array([int(row["N"]) for row in rows], dtype=np.int64),
+            np.array([int(row["K"]) for row in rows], dtype=np.int64))
+
+    def ops(self) -> np.ndarray:
+        """
+        Returns the multiply-accumulates of every layer.
+        """
+        return self.m * self.n * self.k
+
+
+@dataclasses.dataclass(frozen=True)
+class WorkloadResult:
+    tiles_m: np.ndarray
+    tiles_n: np.ndarray
+    tiles_k: np.ndarray
+    reuse_x: np.ndarray
+    reuse_w: np.ndarray
+    utilization: np.ndarray
+    traffic: np.ndarray  # bytes
+    compute_time: np.ndarray  # s
+    memory_time: np.ndarray  # s
+    time: np.ndarray  # s
+
+    def total_time(self) -> np.ndarray:
+        """
+        Returns the end-to-end time of every configuration.
+        """
+        return self.time.sum(axis=-1)
+
+    def memory_bound(self) -> np.ndarray:
+        return self.memory_time > self.compute_time
+
+
+def config_columns(configs: List[StardustConfig]) -> dict:
+    """
+    Returns the parameters of the configurations needed by `simulate()` as
+    columns of shape `(configs, 1)`.
+    """
+    def column(f) -> np.ndarray:
+        return np.array([f(cfg) for cfg in configs], dtype=np.float64)[:, None]
+
+    return {
+        "dim_array": column(lambda cfg: cfg.dim_array).astype(np.int64),
+        "clock_frequency": column(lambda cfg: cfg.clock_frequency),
+        "reuse_x": column(lambda cfg: cfg.reuse[0]).astype(np.int64),
+        "reuse_w": column(lambda cfg: cfg.reuse[1]).astype(np.int64),
+        "bits_per_elem": column(
+            lambda cfg: cfg.bfp_bits_per_elem() if isinstance(cfg, StardustConfigHBFP) else cfg.floating_point.bits()),
+        "output_bits": column(lambda cfg: cfg.floating_point.bits())
+    }
+
+
+def simulate(workload: Workload, configs: List[StardustConfig], memory_bandwidth: float) -> WorkloadResult:
+    """
+    Runs the workload on every configuration, with an off-chip memory
+    bandwidth in GB/s.
+    """
+    c = config_columns(configs)
+    d = c["dim_array"]
+    m, n, k = workload.m[None, :], workload.n[None, :], workload.k[None, :]
+
+    tiles_m = -(-m // d)
+    tiles_n = -(-n // d)
+    tiles_k = -(-k // d)
+    cycles = tiles_m * tiles_n * tiles_k * d
+    utilization = (m * n * k) / (cycles * d ** 2)
+
+    reuse_x = np.minimum(c["reuse_x"], tiles_m)
+    reuse_w = np.minimum(c["reuse_w"], tiles_n)
+    tile_fetches = tiles_m * tiles_k * -(-tiles_n // reuse_w) + tiles_n * tiles_k * -(-tiles_m // reuse_x)
+    traffic = (tile_fetches * d ** 2 * c["bits_per_elem"] + m * n * c["output_bits"]) / 8
+
+    compute_time = cycles / c["clock_frequency"]
+    memory_time = traffic / (memory_bandwidth * 1e9)
+    return WorkloadResult(
+        tiles_m, tiles_n, tiles_k, reuse_x, reuse_w, utilization, traffic,
+        compute_time, memory_time, np.maximum(compute_time, memory_time))
+
+
+def main() -> None:
+    import argparse
+    import os
+    from data_types import FloatingPoint
+    from stardust import StardustConfigFloatingPoint
+
+    parser = argparse.ArgumentParser(description="Runs a GEMM workload on Stardust configurations.")
+    parser.add_argument(
+        "workload", nargs="?",
+        default=os.path.dirname(os.path.abspath(__file__)) + "/workloads/bert_base_seq128.csv")
+    parser.add_argument("--bandwidth", type=float, default=1000, help="off-chip bandwidth [GB/s]")
+    args = parser.parse_args()
+
+    workload = Workload.from_csv(args.workload)
+    area_envelope = 830e6 * 0.85
+    configs = []
+    for dim_array in [128, 256, 512, 1024, 2048]:
+        configs.append(StardustConfigHBFP(dim_array=dim_array, len_mantissa=4))
+        configs.append(StardustConfigFloatingPoint(dim_array=dim_array, floating_point=FloatingPoint.bfloat16))
+    configs = [cfg for cfg in configs if cfg.maximize_onchip_area(area_envelope)]
+
+    result = simulate(workload, configs, args.bandwidth)
+    ops = workload.ops().sum()
+    for i, cfg in enumerate(configs):
+        name = "hbfp" if isinstance(cfg, StardustConfigHBFP) else str(cfg.floating_point)
+        print(f"{name:8} dim = {cfg.dim_array:4} reuse = {cfg.reuse}: "
+              f"time = {result.total_time()[i] * 1e6:9.2f} us, "
+              f"{ops / result.total_time()[i] / 1e12:8.2f} TOps/s achieved of {cfg.throughput():8.2f}, "
+              f"utilization = {np.average(result.utilization[i], weights=workload.ops()):.3f}, "
+              f"memory bound layers = {result.memory_bound()[i].sum()}/{len(workload.names)}")
+
+
+if __name__ == "__main__":
+    main()